@@ -1,4 +1,9 @@
+from collections.abc import Iterator
+
 import pytest
+from django.core.cache import cache
+
+from ascii.textmode.postings import PostingIndex
 
 
 # Allow database access in all unit tests
@@ -10,3 +15,15 @@ def pytest_collection_modifyitems(items):
 @pytest.fixture(autouse=True)
 def _media_storage(settings, tmpdir) -> None:
     settings.MEDIA_ROOT = tmpdir.strpath
+
+
+@pytest.fixture(autouse=True)
+def _posting_index(monkeypatch) -> None:
+    # Test transactions roll back the catalog counters along with the data
+    monkeypatch.setattr("ascii.textmode.postings._index", PostingIndex())
+
+
+@pytest.fixture(autouse=True)
+def _cache() -> Iterator[None]:
+    yield
+    cache.clear()
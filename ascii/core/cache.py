@@ -0,0 +1,130 @@
+"""
+Whole-page response cache and conditional GET with generation based
+invalidation.
+
+Each namespace has a generation token stored in the cache. Page keys and
+ETags include the current token, so bumping it (e.g. from a post_save
+signal) invalidates every cached page in the namespace at once and the
+stale entries are left to expire or be culled by the backend. The token
+starts with the time it was bumped, which doubles as the Last-Modified
+date for the namespace.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def get_generation(namespace: str) -> str:
+    generation = cache.get(f"generation:{namespace}")
+    if generation is None:
+        generation = bump_generation(namespace)
+    return generation
+
+
+def bump_generation(namespace: str) -> str:
+    generation = f"{time.time():.6f}-{uuid.uuid4().hex}"
+    cache.set(f"generation:{namespace}", generation, timeout=None)
+    return generation
+
+
+def get_generation_time(generation: str) -> float:
+    return float(generation.split("-", 1)[0])
+
+
+def get_request_digest(request: HttpRequest, *parts: object) -> str:
+    # htmx requests get a partial template for the same URL
+    is_htmx = bool(request.headers.get("Hx-Request"))
+    data = "|".join(str(part) for part in (request.get_full_path(), is_htmx, *parts))
+    return hashlib.md5(data.encode()).hexdigest()
+
+
+def get_page_cache_key(request: HttpRequest, namespace: str) -> str:
+    return f"page:{namespace}:{get_generation(namespace)}:{get_request_digest(request)}"
+
+
+class PageCacheMixin:
+    """
+    Serve anonymous GET requests for a view from the page cache.
+
+    Logged in users can see extra admin links, so they always get a fresh
+    page.
+    """
+
+    page_cache_namespace: str
+
+    def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if request.method not in ("GET", "HEAD") or request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)  # type: ignore[misc]
+
+        key = get_page_cache_key(request, self.page_cache_namespace)
+        if (response := cache.get(key)) is not None:
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)  # type: ignore[misc]
+        if response.status_code != 200 or response.streaming or response.cookies:
+            return response
+
+        def store(response: HttpResponse) -> None:
+            cache.set(key, response, timeout=settings.PAGE_CACHE_TIMEOUT)
+
+        if hasattr(response, "add_post_render_callback"):
+            response.add_post_render_callback(store)
+        else:
+            store(response)
+
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Answer conditional GET requests for a view with a 304 before any of the
+    page is rendered.
+
+    Views implement get_version() to return a short string identifying the
+    object being shown (e.g. its id and timestamp) using a cheap query, or
+    None if it doesn't exist. The ETag combines it with the namespace
+    generation and the request URL.
+    """
+
+    page_cache_namespace: str
+
+    def get_version(self, **kwargs) -> tuple[str, datetime | None] | None:
+        """
+        Return the version string and the last modified date of the object.
+        """
+        raise NotImplementedError
+
+    def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if request.method not in ("GET", "HEAD") or request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)  # type: ignore[misc]
+
+        if (version := self.get_version(**kwargs)) is None:
+            return super().dispatch(request, *args, **kwargs)  # type: ignore[misc]
+
+        generation = get_generation(self.page_cache_namespace)
+        etag = f'"{get_request_digest(request, version[0], generation)}"'
+
+        last_modified = get_generation_time(generation)
+        if version[1] is not None:
+            last_modified = max(last_modified, version[1].timestamp())
+        last_modified = int(last_modified)
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)  # type: ignore[misc]
+
+        if response.status_code in (200, 304):
+            response.headers.setdefault("ETag", etag)
+            response.headers.setdefault("Last-Modified", http_date(last_modified))
+
+        return response
@@ -1,4 +1,5 @@
 import logging
+import threading
 import time
 
 import requests
@@ -7,6 +8,35 @@ from requests.adapters import HTTPAdapter, Retry
 _logger = logging.getLogger(__name__)
 
 
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    A single bucket can be shared between multiple sessions/threads to cap
+    their combined request rate to a host.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+
+            time.sleep(wait_time)
+
+
 class BaseSession(requests.Session):
     def __init__(
         self,
@@ -14,9 +44,11 @@ class BaseSession(requests.Session):
         default_params: dict | None = None,
         retry: Retry | None = None,
         timeout: float = 10,
+        rate_limiter: TokenBucket | None = None,
     ):
         super().__init__()
         self.request_delay = request_delay
+        self.rate_limiter = rate_limiter
         self.default_params = default_params or {}
 
         self.timeout = timeout
@@ -36,6 +68,9 @@ class BaseSession(requests.Session):
         self.mount("https://", adapter)
 
     def apply_rate_limit(self) -> None:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
         now = time.time()
         if self.request_delay is not None:
             elapsed_time = now - self.last_request_timestamp
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from ascii.fudan.models import Menu, MenuLink
+from ascii.mozz.models import ArtPost
+from ascii.textmode.models import ArtPack
+
+
+class Command(BaseCommand):
+    help = "Recompute the prev/next positions for artfiles, fudan menu links and mozz posts"
+
+    def handle(self, *args, **options):
+        count = ArtPack.objects.all().refresh_artfile_positions()
+        self.stdout.write(f"Refreshed positions for {count} artfiles")
+
+        count = MenuLink.refresh_positions(Menu.objects.all())
+        self.stdout.write(f"Refreshed positions for {count} menu links")
+
+        count = ArtPost.objects.refresh_positions()
+        self.stdout.write(f"Refreshed positions for {count} art posts")
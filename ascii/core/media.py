@@ -0,0 +1,171 @@
+"""
+Serving files from MEDIA_ROOT.
+
+In production the response only carries an internal redirect header
+(X-Accel-Redirect for nginx, X-Sendfile for apache/lighttpd) and the front
+proxy sends the file itself, including any byte ranges. Otherwise the file
+is streamed from django with support for single byte ranges, so seeking in
+the <audio>/<video> players doesn't re-download the whole file.
+
+Some files are overwritten in place under the same name (e.g. the rendered
+artfile images), so clients revalidate with the ETag/Last-Modified headers
+instead of caching them for a fixed time.
+"""
+
+from __future__ import annotations
+
+import mimetypes
+import os
+import re
+from collections.abc import Iterator
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.http.response import HttpResponseBase
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+CACHE_CONTROL = "public, no-cache"
+
+# Compressed files are served as-is, like django's FileResponse does. Sending
+# a Content-Encoding would make the browser decompress them on download.
+ENCODING_CONTENT_TYPES = {
+    "br": "application/x-brotli",
+    "bzip2": "application/x-bzip",
+    "compress": "application/x-compress",
+    "gzip": "application/gzip",
+    "xz": "application/x-xz",
+}
+
+CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def get_media_path(path: str) -> str:
+    # Raises SuspiciousFileOperation (a 400) for paths outside the root
+    filepath = safe_join(settings.MEDIA_ROOT, path)
+    if not os.path.isfile(filepath):
+        raise Http404(path)
+
+    return filepath
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parse a single "bytes=start-end" range into an inclusive (start, end)
+    pair, clamped to the file size. Returns None for a range that can't be
+    satisfied. Multiple ranges aren't supported.
+    """
+    if not (match := RANGE_RE.match(header.strip())):
+        raise ValueError(header)
+
+    start, end = match.groups()
+    if not start and not end:
+        raise ValueError(header)
+
+    if not start:
+        # Suffix range, the last N bytes of the file
+        length = int(end)
+        if length == 0 or size == 0:
+            return None
+        return max(size - length, 0), size - 1
+
+    first, last = int(start), int(end) if end else size - 1
+    if first >= size or last < first:
+        return None
+    return first, min(last, size - 1)
+
+
+def iter_file_range(filepath: str, start: int, length: int) -> Iterator[bytes]:
+    with open(filepath, "rb") as fp:
+        fp.seek(start)
+        while length > 0:
+            chunk = fp.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def get_range_header(request: HttpRequest, etag: str, last_modified: int) -> str | None:
+    """
+    Return the Range header, unless an If-Range header says that the
+    client's copy of the file is out of date.
+    """
+    if not (header := request.headers.get("Range")):
+        return None
+
+    if if_range := request.headers.get("If-Range"):
+        if if_range.startswith(("W/", '"')):
+            if if_range != etag:
+                return None
+        elif parse_http_date_safe(if_range) != last_modified:
+            return None
+
+    return header
+
+
+def get_content_type(filepath: str) -> str:
+    content_type, encoding = mimetypes.guess_type(filepath)
+    if encoding:
+        content_type = ENCODING_CONTENT_TYPES.get(encoding, content_type)
+    return content_type or "application/octet-stream"
+
+
+def serve_media_file(request: HttpRequest, path: str) -> HttpResponseBase:
+    response: HttpResponseBase
+
+    filepath = get_media_path(path)
+    content_type = get_content_type(filepath)
+
+    if header := settings.MEDIA_SENDFILE_HEADER:
+        # The proxy handles the validators and byte ranges itself
+        if header == "X-Accel-Redirect":
+            location = quote(settings.MEDIA_ACCEL_PREFIX + path)
+        else:
+            location = filepath
+        response = HttpResponse(content_type=content_type)
+        response.headers[header] = location
+        response.headers["Cache-Control"] = CACHE_CONTROL
+        return response
+
+    stat = os.stat(filepath)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    last_modified = int(stat.st_mtime)
+
+    if not_modified := get_conditional_response(request, etag=etag, last_modified=last_modified):
+        return not_modified
+
+    byte_range = None
+    if range_header := get_range_header(request, etag, last_modified):
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except ValueError:
+            # Malformed or multiple ranges, send the whole file instead
+            pass
+        else:
+            if byte_range is None:
+                response = HttpResponse(status=416)
+                response.headers["Content-Range"] = f"bytes */{stat.st_size}"
+                return response
+
+    if byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            iter_file_range(filepath, start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response.headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        response.headers["Content-Length"] = str(end - start + 1)
+    else:
+        response = FileResponse(open(filepath, "rb"), content_type=content_type)
+
+    response.headers["Accept-Ranges"] = "bytes"
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = http_date(last_modified)
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
@@ -0,0 +1,187 @@
+"""
+Keyset (a.k.a. cursor) pagination.
+
+Instead of ``OFFSET n``, each page is fetched with a WHERE clause that seeks
+past the sort key of the last row on the previous page, so deep pages cost
+the same as the first one. The total count is only computed for the first
+page and is carried forward in the cursor.
+
+The page objects mimic the parts of ``django.core.paginator.Page`` that the
+templates use, so they can be swapped in for the default paginator.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+from django.core import signing
+from django.db.models import Q, QuerySet
+
+CURSOR_SALT = "ascii.core.pagination"
+
+
+class CursorPaginator:
+    """
+    Paginate a queryset using keyset pagination over the given ordering.
+
+    The ordering fields must be non-nullable, and may reference related
+    fields (e.g. "pack__year") or annotations on the queryset. The primary
+    key is always appended as a tie-breaker to keep the ordering stable.
+    """
+
+    def __init__(self, queryset: QuerySet, ordering: list[str], per_page: int):
+        self.per_page = per_page
+
+        ordering = list(ordering)
+        if not any(field.lstrip("-") in ("id", "pk") for field in ordering):
+            ordering.append("id")
+
+        self.ordering = ordering
+        self.keys = [(field.lstrip("-"), field.startswith("-")) for field in ordering]
+        self.queryset = queryset.order_by(*ordering)
+        self.count = 0
+
+    def get_value(self, obj: Any, field: str) -> Any:
+        if isinstance(obj, dict):
+            # Rows from a values() queryset
+            return obj[field]
+
+        for attr in field.split("__"):
+            obj = getattr(obj, attr)
+        return obj
+
+    def build_seek_filter(self, values: list[Any]) -> Q:
+        """
+        Build the equivalent of ``(a, b, c) > (x, y, z)``, respecting the
+        direction of each field in the ordering.
+        """
+        query = Q()
+        for i, (field, descending) in enumerate(self.keys):
+            lookup = "lt" if descending else "gt"
+            condition = Q(**{f"{field}__{lookup}": values[i]})
+            for j, (prev_field, _) in enumerate(self.keys[:i]):
+                condition &= Q(**{prev_field: values[j]})
+            query |= condition
+
+        return query
+
+    def decode_cursor(self, cursor: str | None) -> dict | None:
+        if not cursor:
+            return None
+
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            return None
+
+        if not isinstance(data, dict) or len(data.get("k", [])) != len(self.ordering):
+            return None
+
+        return data
+
+    def encode_cursor(self, obj: Any, offset: int) -> str:
+        data = {
+            "k": [self.get_value(obj, field) for field, _ in self.keys],
+            "n": offset,
+            "c": self.count,
+        }
+        return signing.dumps(data, salt=CURSOR_SALT, compress=True)
+
+    def page(self, cursor: str | None) -> CursorPage:
+        """
+        Return the page following the given cursor, or the first page if the
+        cursor is missing or invalid.
+        """
+        qs = self.queryset
+        offset = 0
+
+        if data := self.decode_cursor(cursor):
+            qs = qs.filter(self.build_seek_filter(data["k"]))
+            offset = data["n"]
+            self.count = data["c"]
+        else:
+            self.count = self.queryset.count()
+
+        object_list = list(qs[: self.per_page + 1])
+        has_next = len(object_list) > self.per_page
+        object_list = object_list[: self.per_page]
+
+        next_cursor = None
+        if has_next:
+            next_cursor = self.encode_cursor(object_list[-1], offset + len(object_list))
+
+        return CursorPage(object_list, offset, next_cursor, self)
+
+
+class CursorPage:
+    def __init__(
+        self,
+        object_list: list,
+        offset: int,
+        next_cursor: str | None,
+        paginator: CursorPaginator | IdListPaginator,
+    ):
+        self.object_list = object_list
+        self.offset = offset
+        self.next_cursor = next_cursor
+        self.paginator = paginator
+
+    def __repr__(self):
+        return f"<CursorPage {self.start_index()}-{self.end_index()}>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def next_page_number(self) -> str | None:
+        # Named to match django's Page API, the "page number" is the cursor.
+        return self.next_cursor
+
+    def start_index(self) -> int:
+        if not self.object_list:
+            return 0
+        return self.offset + 1
+
+    def end_index(self) -> int:
+        return self.offset + len(self.object_list)
+
+
+class IdListPaginator:
+    """
+    Paginate a precomputed, ordered list of primary keys.
+
+    Only the rows on the requested page are loaded from the queryset, which
+    may be a values() queryset as long as it includes the "id". The
+    "cursor" is the offset into the list, which is cheap to seek to since
+    the list is already in memory.
+    """
+
+    def __init__(self, queryset: QuerySet, ids: Sequence[int] | np.ndarray, per_page: int):
+        self.queryset = queryset
+        self.ids = ids
+        self.per_page = per_page
+        self.count = len(ids)
+
+    def page(self, cursor: str | None) -> CursorPage:
+        try:
+            offset = max(int(cursor or 0), 0)
+        except ValueError:
+            offset = 0
+
+        page_ids = [int(pk) for pk in self.ids[offset : offset + self.per_page]]
+        rows = self.queryset.filter(pk__in=page_ids)
+        objects = {row["id"] if isinstance(row, dict) else row.pk: row for row in rows}
+        object_list = [objects[pk] for pk in page_ids if pk in objects]
+
+        next_cursor = None
+        if offset + self.per_page < self.count:
+            next_cursor = str(offset + self.per_page)
+
+        return CursorPage(object_list, offset, next_cursor, self)
@@ -0,0 +1,89 @@
+"""
+Precomputed ordinal positions for prev/next navigation.
+
+Models that support it store their 1-based position within a container
+(e.g. an ArtFile within its pack) in a "position" column, so both
+neighbors can be fetched with a single equality lookup instead of two
+ordered range queries.
+"""
+
+from __future__ import annotations
+
+from typing import Any, cast
+
+from django.db import connections
+from django.db.models import Field, Model, QuerySet, Window
+from django.db.models.functions import RowNumber
+
+
+def refresh_positions(
+    queryset: QuerySet,
+    order_by: list[str],
+    partition_by: str | None = None,
+) -> int:
+    """
+    Number the rows in the queryset from 1 in the given order, restarting for
+    each value of partition_by, and store it in the position column with a
+    single UPDATE. Returns the number of rows updated.
+    """
+    model = queryset.model
+    table = model._meta.db_table
+    pk = model._meta.pk.column
+
+    window = Window(RowNumber(), partition_by=partition_by, order_by=order_by)
+    ranked = queryset.order_by().annotate(new_position=window).values("pk", "new_position")
+    sql, params = ranked.query.sql_with_params()
+
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            f'UPDATE "{table}" SET "position" = ranked.new_position FROM ({sql}) AS ranked '
+            f'WHERE "{table}"."{pk}" = ranked.pk',
+            params,
+        )
+        return cursor.rowcount
+
+
+def get_neighbors(queryset: QuerySet, position: int) -> tuple[Any, Any]:
+    """
+    Return the (previous, next) objects around the given position, the
+    queryset should already be limited to the container.
+    """
+    neighbors = {
+        obj.position: obj for obj in queryset.filter(position__in=[position - 1, position + 1])
+    }
+    return neighbors.get(position - 1), neighbors.get(position + 1)
+
+
+def get_changed_fields(
+    instance: Model,
+    fields: list[str],
+    update_fields: frozenset[str] | None = None,
+) -> dict[str, Any]:
+    """
+    Return the saved values of the fields that the save is about to change,
+    called from a pre_save signal to check if the sort order is affected.
+    New rows count as changing every field, with None as the saved value.
+    """
+    opts = instance._meta
+    attnames = {name: cast(Field, opts.get_field(name)).attname for name in fields}
+    if update_fields is not None:
+        attnames = {
+            name: attname
+            for name, attname in attnames.items()
+            if name in update_fields or attname in update_fields
+        }
+        if not attnames:
+            return {}
+
+    saved: dict[str, Any] | None = None
+    if not instance._state.adding:
+        rows = type(instance)._default_manager.filter(pk=instance.pk)
+        saved = rows.values(*attnames.values()).first()
+    if saved is None:
+        return dict.fromkeys(attnames)
+
+    return {
+        name: saved[attname]
+        for name, attname in attnames.items()
+        if saved[attname] != getattr(instance, attname)
+    }
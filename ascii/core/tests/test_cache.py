@@ -0,0 +1,45 @@
+from django.urls import reverse
+
+from ascii.textmode.choices import TagCategory
+from ascii.textmode.tests.factories import ArtFileFactory, ArtFileTagFactory
+
+
+def test_page_cache(client, django_assert_num_queries):
+    url = reverse("textmode-tag-list")
+    response = client.get(url)
+    assert response.status_code == 200
+
+    with django_assert_num_queries(0):
+        cached = client.get(url)
+    assert cached.content == response.content
+
+    # The query string and htmx requests get their own entries
+    with django_assert_num_queries(6):
+        client.get(url, {"q": "mozz"})
+        client.get(url, headers={"Hx-Request": "true"})
+
+    # Any change to the textmode models invalidates the cache
+    ArtFileTagFactory(category=TagCategory.ARTIST, name="mozz", artfile_count=1)
+    response = client.get(url)
+    assert b"mozz" in response.content
+
+
+def test_conditional_get(client, django_assert_num_queries):
+    artfile = ArtFileFactory()
+    url = artfile.public_url
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    with django_assert_num_queries(1):
+        response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = client.get(url, headers={"If-Modified-Since": response.headers["Last-Modified"]})
+    assert response.status_code == 304
+
+    # Any change to the textmode models changes the ETag
+    ArtFileTagFactory(category=TagCategory.ARTIST, name="mozz")
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
@@ -0,0 +1,15 @@
+import time
+
+from ascii.core.clients import TokenBucket
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=50, capacity=2)
+
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+
+    # Two requests burst immediately, the remaining four wait for refills
+    assert 0.07 < elapsed < 0.5
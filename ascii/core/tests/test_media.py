@@ -0,0 +1,69 @@
+import os
+
+import pytest
+from django.urls import reverse
+
+DATA = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def url(settings) -> str:
+    os.makedirs(os.path.join(settings.MEDIA_ROOT, "videos"))
+    with open(os.path.join(settings.MEDIA_ROOT, "videos", "demo.mp4"), "wb") as fp:
+        fp.write(DATA)
+    return reverse("media", args=["videos/demo.mp4"])
+
+
+def test_serve_media(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response["Content-Type"] == "video/mp4"
+    assert response["Accept-Ranges"] == "bytes"
+    assert response["Cache-Control"] == "public, no-cache"
+    assert b"".join(response.streaming_content) == DATA
+
+    response = client.get(url, headers={"If-None-Match": response["ETag"]})
+    assert response.status_code == 304
+
+    assert client.get(reverse("media", args=["videos/missing.mp4"])).status_code == 404
+    assert client.get(reverse("media", args=["../secret.txt"])).status_code == 400
+
+
+def test_serve_media_range(client, url):
+    response = client.get(url, headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response["Content-Range"] == "bytes 10-19/1024"
+    assert b"".join(response.streaming_content) == DATA[10:20]
+
+    response = client.get(url, headers={"Range": "bytes=-4"})
+    assert b"".join(response.streaming_content) == DATA[-4:]
+
+    response = client.get(url, headers={"Range": "bytes=1000-"})
+    assert b"".join(response.streaming_content) == DATA[1000:]
+
+    response = client.get(url, headers={"Range": "bytes=2000-"})
+    assert response.status_code == 416
+    assert response["Content-Range"] == "bytes */1024"
+
+    # A stale If-Range sends the whole file
+    response = client.get(url, headers={"Range": "bytes=10-19", "If-Range": '"stale"'})
+    assert response.status_code == 200
+
+
+def test_serve_media_compressed(client, settings):
+    os.makedirs(os.path.join(settings.MEDIA_ROOT, "packs"))
+    with open(os.path.join(settings.MEDIA_ROOT, "packs", "demo.tar.gz"), "wb") as fp:
+        fp.write(DATA)
+
+    response = client.get(reverse("media", args=["packs/demo.tar.gz"]))
+    assert response["Content-Type"] == "application/gzip"
+    assert "Content-Encoding" not in response
+    assert b"".join(response.streaming_content) == DATA
+
+
+def test_serve_media_sendfile(client, settings, url):
+    settings.MEDIA_SENDFILE_HEADER = "X-Accel-Redirect"
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response["X-Accel-Redirect"] == "/protected-media/videos/demo.mp4"
+    assert response.content == b""
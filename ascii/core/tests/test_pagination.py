@@ -0,0 +1,62 @@
+from django.db.models import F
+
+from ascii.core.pagination import CursorPaginator
+from ascii.textmode.models import ArtCollection, ArtCollectionMapping, ArtFile
+from ascii.textmode.tests.factories import ArtFileFactory, ArtPackFactory
+
+
+def collect_pages(paginator: CursorPaginator) -> list:
+    results = []
+    page = paginator.page(None)
+    while True:
+        assert page.start_index() == len(results) + 1
+        results.extend(page.object_list)
+        assert page.end_index() == len(results)
+        assert page.paginator.count == 5
+        if not page.has_next():
+            return results
+        page = paginator.page(page.next_page_number())
+
+
+def test_cursor_paginator():
+    """
+    Walking the pages should return every row exactly once, in order.
+    """
+    pack = ArtPackFactory()
+    for name in ["b", "a", "d", "c"]:
+        ArtFileFactory(pack=pack, name=name)
+    ArtFileFactory(pack=pack, name="z", is_fileid=True)
+
+    artfiles = pack.artfiles.all()
+    paginator = CursorPaginator(artfiles, ["-is_fileid", "name"], per_page=2)
+    results = collect_pages(paginator)
+    assert [artfile.name for artfile in results] == ["z", "a", "b", "c", "d"]
+
+    paginator = CursorPaginator(artfiles, ["-pack__year", "-name"], per_page=3)
+    results = collect_pages(paginator)
+    assert [artfile.name for artfile in results] == ["z", "d", "c", "b", "a"]
+
+
+def test_cursor_paginator_annotation():
+    """
+    Seeking on an m2m annotation should not match mappings from other collections.
+    """
+    artfiles = [ArtFileFactory() for _ in range(5)]
+
+    collection = ArtCollection.objects.create(name="test")
+    other = ArtCollection.objects.create(name="other")
+    for i, artfile in enumerate(artfiles):
+        ArtCollectionMapping.objects.create(collection=collection, artfile=artfile, order=-i)
+        ArtCollectionMapping.objects.create(collection=other, artfile=artfile, order=i)
+
+    qs = collection.artfiles.annotate(collection_order=F("artcollectionmapping__order"))
+    paginator = CursorPaginator(qs, ["collection_order"], per_page=2)
+    assert collect_pages(paginator) == artfiles[::-1]
+
+
+def test_cursor_paginator_invalid_cursor():
+    ArtFileFactory()
+
+    page = CursorPaginator(ArtFile.objects.all(), [], 2).page("garbage")
+    assert page.start_index() == 1
+    assert not page.has_next()
@@ -1,7 +1,18 @@
 from __future__ import annotations
 
-from django.views.generic.base import TemplateView
+from django.http import HttpRequest
+from django.http.response import HttpResponseBase
+from django.views.generic.base import TemplateView, View
+
+from ascii.core.media import serve_media_file
 
 
 class IndexView(TemplateView):
     template_name = "core/index.html"
+
+
+class MediaFileView(View):
+    http_method_names = ["get", "head"]
+
+    def get(self, request: HttpRequest, path: str) -> HttpResponseBase:
+        return serve_media_file(request, path)
@@ -0,0 +1,109 @@
+"""
+Zip archives that are streamed to the client as they're written.
+
+The members are copied from storage in small chunks, and zipfile falls
+back to writing data descriptors after each member when the output isn't
+seekable, so memory use stays bounded no matter how large the archive is.
+
+In stored (uncompressed) mode the size of the archive only depends on the
+member names and sizes, so it can be worked out up front for the
+Content-Length header.
+"""
+
+from __future__ import annotations
+
+import zipfile
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.core.files.storage import Storage
+
+CHUNK_SIZE = 64 * 1024
+
+# Sizes of the fixed parts of a zip file without zip64 extensions
+LOCAL_HEADER_SIZE = 30
+DATA_DESCRIPTOR_SIZE = 16
+CENTRAL_HEADER_SIZE = 46
+END_RECORD_SIZE = 22
+
+
+@dataclass(slots=True)
+class ZipMember:
+    name: str
+    storage: Storage
+    path: str
+    size: int
+    modified: datetime
+
+    def get_info(self, compress_type: int) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(self.name, self.modified.timetuple()[:6])
+        info.compress_type = compress_type
+        info.file_size = self.size
+        return info
+
+
+class ZipSink:
+    """
+    Write-only file object that holds the bytes written by zipfile until
+    they're collected.
+    """
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def collect(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_zip(members: Iterable[ZipMember], compress_type: int) -> Iterator[bytes]:
+    sink = ZipSink()
+    with zipfile.ZipFile(sink, "w", compression=compress_type) as zf:
+        for member in members:
+            info = member.get_info(compress_type)
+            with member.storage.open(member.path, "rb") as src, zf.open(info, "w") as dst:
+                while chunk := src.read(CHUNK_SIZE):
+                    dst.write(chunk)
+                    if data := sink.collect():
+                        yield data
+
+            # The data descriptor is written when the member is closed
+            yield sink.collect()
+
+    # Central directory
+    yield sink.collect()
+
+
+def get_stored_zip_size(members: Iterable[ZipMember]) -> int | None:
+    """
+    Return the exact size of the archive that iter_zip() writes in stored
+    mode, or None if it would need zip64 extensions.
+    """
+    size = END_RECORD_SIZE
+    count = 0
+    for member in members:
+        # zipfile encodes names as ascii if possible and utf-8 otherwise
+        name_size = len(member.get_info(zipfile.ZIP_STORED).filename.encode())
+        if member.size * 1.05 > zipfile.ZIP64_LIMIT:
+            return None
+
+        size += LOCAL_HEADER_SIZE + name_size + member.size + DATA_DESCRIPTOR_SIZE
+        size += CENTRAL_HEADER_SIZE + name_size
+        count += 1
+
+    if size > zipfile.ZIP64_LIMIT or count >= zipfile.ZIP_FILECOUNT_LIMIT:
+        return None
+
+    return size
@@ -1,5 +1,7 @@
+import functools
 import logging
 import re
+from collections.abc import Iterator
 from dataclasses import dataclass
 from typing import cast
 
@@ -19,6 +21,9 @@ class ANSIParser:
     _re_split_spaces = re.compile(r"(\s+|[^ ]+)")
     _re_compress_whitespace = re.compile(r"[ \t]+")
 
+    # The same line boundaries as str.splitlines()
+    _re_line_break = re.compile(r"\r\n|[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
+
     @dataclass
     class State:
         fg: int = 7
@@ -31,21 +36,13 @@ class ANSIParser:
         self.text = text
         self.ansi = Ansi(text)
 
-    def build_span(self, text, attributes: dict) -> str:
+    def get_line_indents(self) -> list[int]:
         """
-        Build a <span></span> element with the given attributes.
+        Return the width of the leading whitespace and drawing characters on
+        each line, used to line the translated text up with the original.
         """
-        parts = [f"{name}='{val}'" for name, val in attributes.items()]
-        span = f"<span {' '.join(parts)}>{text}</span>"
-        return span
-
-    def apply_line_indents(self, text: str) -> str:
-        plaintext = self.to_plaintext()
-
-        buffer: list[str] = []
-        for text_line, plaintext_line in zip(
-            text.splitlines(), plaintext.splitlines(), strict=False
-        ):
+        indents = []
+        for plaintext_line in self.to_plaintext().splitlines():
             offset = 0
             for ch in plaintext_line:
                 if ch == " ":
@@ -55,9 +52,17 @@ class ANSIParser:
                 else:
                     break
 
-            buffer.append(" " * offset + text_line)
+            indents.append(offset)
 
-        return "\n".join(buffer)
+        return indents
+
+    @staticmethod
+    def indent_lines(text: str, indents: list[int]) -> str:
+        lines = zip(text.splitlines(), indents, strict=False)
+        return "\n".join(" " * offset + line for line, offset in lines)
+
+    def apply_line_indents(self, text: str) -> str:
+        return self.indent_lines(text, self.get_line_indents())
 
     def to_plaintext(self) -> str:
         return "".join(part for part in self.ansi.instructions() if isinstance(part, str))
@@ -69,78 +74,145 @@ class ANSIParser:
         text = "\n".join(line.strip() for line in text.splitlines())
         return text
 
-    def to_html(self) -> str:
+    def get_run_key(self, state: State) -> tuple[str, bool]:
+        """
+        Return what a run of text with the SGR state renders to, as the
+        opening <span> tag and whether the text blinks.
+        """
+        fg = state.fg + 8 if state.bold else state.fg
+        return get_span_tag(fg, state.bg, state.underline), state.blink
+
+    def render_run(self, text: str, span_tag: str, blink: bool) -> str:
+        parts = [span_tag]
+        if blink:
+            # Blink should apply to all characters EXCEPT spaces (" ").
+            # So we need to split the string up and selectively wrap
+            # non-empty segments with blink tags.
+            for seg in self._re_split_spaces.findall(text):
+                if seg[0] == " ":
+                    parts.append(seg)
+                else:
+                    parts.extend(("<span class='blink'>", escape(seg), "</span>"))
+        else:
+            parts.append(escape(text))
+
+        parts.append("</span>")
+        return "".join(parts)
+
+    def iter_runs(self) -> Iterator[tuple[str, str, bool]]:
+        """
+        Yield each run of text with its run key. Consecutive text that would
+        render the same way is merged into a single run, even when there
+        were escape codes in between.
+        """
         state = self.State()
-        buffer = ""
+        key: tuple[str, bool] | None = None
+        run: list[str] = []
 
         for instruction in self.ansi.instructions():
             if isinstance(instruction, str):
-                classes: list[str] = []
-                style_props: list[str] = []
-                attributes: dict[str, str] = {}
-
-                if state.blink:
-                    # Blink should apply to all characters EXCEPT spaces (" ").
-                    # So we need to split the string up and selectively wrap
-                    # non-empty segments with blink tags.
-                    inner = ""
-                    for seg in self._re_split_spaces.findall(instruction):
-                        if seg[0] == " ":
-                            inner += seg
-                        else:
-                            inner += self.build_span(escape(seg), {"class": "blink"})
-                else:
-                    inner = escape(instruction)
+                if not instruction:
+                    continue
+
+                next_key = self.get_run_key(state)
+                if next_key != key:
+                    if key is not None:
+                        yield "".join(run), *key
+                    key, run = next_key, []
+                run.append(instruction)
+            else:
+                state = self.update_state(instruction, state)
 
-                if state.bold:
-                    fg = state.fg + 8
-                else:
-                    fg = state.fg
-
-                if fg != self.State.fg:
-                    style_props.append(f"color: var(--c{fg})")
-                if state.bg != self.State.bg:
-                    style_props.append(f"background-color: var(--c{state.bg})")
-
-                if state.underline:
-                    classes.append("underline")
-
-                if style_props:
-                    attributes["style"] = "; ".join(style_props)
-                if classes:
-                    attributes["class"] = " ".join(classes)
-
-                buffer += self.build_span(inner, attributes)
-
-            elif isinstance(instruction, SetColor):
-                code = cast(int, instruction.color.code)  # noqa
-                if code < 8:
-                    match instruction.role:
-                        case ColorRole.FOREGROUND:
-                            state.fg = code
-                        case ColorRole.BACKGROUND:
-                            state.bg = code
-                        case _:
-                            raise ValueError
-                else:
-                    _logger.warning(f"Unhandled ANSI: {instruction}")
+        if key is not None:
+            yield "".join(run), *key
 
-            elif isinstance(instruction, SetAttribute):
-                match instruction.attribute:
-                    case Attribute.NORMAL:
-                        state = self.State()
-                    case Attribute.BOLD:
-                        state.bold = True
-                    case Attribute.UNDERLINE:
-                        state.underline = True
-                    case Attribute.NOT_UNDERLINE:
-                        state.underline = False
-                    case Attribute.BLINK:
-                        state.blink = True
+    def update_state(self, instruction, state: State) -> State:
+        """
+        Apply an escape sequence to the SGR state.
+        """
+        if isinstance(instruction, SetColor):
+            code = cast(int, instruction.color.code)  # noqa
+            if code < 8:
+                match instruction.role:
+                    case ColorRole.FOREGROUND:
+                        state.fg = code
+                    case ColorRole.BACKGROUND:
+                        state.bg = code
                     case _:
-                        _logger.warning(f"Unhandled ANSI: {instruction}")
-
+                        raise ValueError
             else:
                 _logger.warning(f"Unhandled ANSI: {instruction}")
 
-        return mark_safe(buffer)
+        elif isinstance(instruction, SetAttribute):
+            match instruction.attribute:
+                case Attribute.NORMAL:
+                    state = self.State()
+                case Attribute.BOLD:
+                    state.bold = True
+                case Attribute.UNDERLINE:
+                    state.underline = True
+                case Attribute.NOT_UNDERLINE:
+                    state.underline = False
+                case Attribute.BLINK:
+                    state.blink = True
+                case _:
+                    _logger.warning(f"Unhandled ANSI: {instruction}")
+
+        else:
+            _logger.warning(f"Unhandled ANSI: {instruction}")
+
+        return state
+
+    def to_html(self) -> str:
+        return mark_safe("".join(self.render_run(*run) for run in self.iter_runs()))
+
+    def to_html_lines(self) -> list[str]:
+        """
+        Render the HTML for each line of the text separately, so that any
+        range of lines can be shown by joining them back together.
+
+        The SGR state carries over between lines, and the spans are closed
+        at the end of each line and re-opened on the next one.
+        """
+        if not self.text:
+            return []
+
+        lines: list[str] = []
+        buffer: list[str] = []
+
+        for text, span_tag, blink in self.iter_runs():
+            first, *rest = self._re_line_break.split(text)
+            if first:
+                buffer.append(self.render_run(first, span_tag, blink))
+            for part in rest:
+                lines.append("".join(buffer))
+                buffer = [self.render_run(part, span_tag, blink)] if part else []
+
+        # Like splitlines(), a trailing line break doesn't start a new line
+        if not self._re_line_break.match(self.text[-1]):
+            lines.append("".join(buffer))
+
+        return lines
+
+
+@functools.cache
+def get_span_tag(fg: int, bg: int, underline: bool) -> str:
+    """
+    Build the opening <span> tag for the colors. There are only a few
+    hundred combinations, so the tags are shared between all of the runs.
+    """
+    default = ANSIParser.State()
+
+    style_props = []
+    if fg != default.fg:
+        style_props.append(f"color: var(--c{fg})")
+    if bg != default.bg:
+        style_props.append(f"background-color: var(--c{bg})")
+
+    attributes = []
+    if style_props:
+        attributes.append(f"style='{'; '.join(style_props)}'")
+    if underline:
+        attributes.append("class='underline'")
+
+    return f"<span {' '.join(attributes)}>"
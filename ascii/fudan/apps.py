@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class FundanAppConfig(AppConfig):
     name = "ascii.fudan"
+
+    def ready(self):
+        import ascii.fudan.signals  # noqa: E402, F401
@@ -1,3 +1,10 @@
+# Namespace for the page cache generation, see ascii.core.cache
+PAGE_CACHE_NAMESPACE = "fudan"
+
+# Shown in place of translations that are queued for the translate_pending
+# command
+TRANSLATION_PENDING = "(translation pending)"
+
 # These are characters that are typically used in ANSI art and should be
 # stripped from a BBS screen when trying to extract the plain text for
 # translation, etc. Some characters like punctuation marks can be used
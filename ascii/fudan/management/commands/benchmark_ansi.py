@@ -0,0 +1,165 @@
+import time
+from html.parser import HTMLParser
+from typing import cast
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.html import escape
+from stransi import SetAttribute, SetColor
+from stransi.attribute import Attribute
+from stransi.color import ColorRole
+
+from ascii.fudan.ansi import ANSIParser
+from ascii.fudan.models import Document, ScratchFile
+
+Cell = tuple[str, str, frozenset[str]]
+
+
+def legacy_to_html(parser: ANSIParser) -> str:
+    """
+    The previous renderer, kept as the reference for the benchmark. It
+    emits a <span> for every text instruction and builds the output with
+    string concatenation.
+    """
+    state = parser.State()
+    buffer = ""
+
+    for instruction in parser.ansi.instructions():
+        if isinstance(instruction, str):
+            classes: list[str] = []
+            style_props: list[str] = []
+            attributes: dict[str, str] = {}
+
+            if state.blink:
+                inner = ""
+                for seg in parser._re_split_spaces.findall(instruction):
+                    if seg[0] == " ":
+                        inner += seg
+                    else:
+                        inner += f"<span class='blink'>{escape(seg)}</span>"
+            else:
+                inner = escape(instruction)
+
+            if state.bold:
+                fg = state.fg + 8
+            else:
+                fg = state.fg
+
+            if fg != parser.State.fg:
+                style_props.append(f"color: var(--c{fg})")
+            if state.bg != parser.State.bg:
+                style_props.append(f"background-color: var(--c{state.bg})")
+
+            if state.underline:
+                classes.append("underline")
+
+            if style_props:
+                attributes["style"] = "; ".join(style_props)
+            if classes:
+                attributes["class"] = " ".join(classes)
+
+            parts = [f"{name}='{val}'" for name, val in attributes.items()]
+            buffer += f"<span {' '.join(parts)}>{inner}</span>"
+
+        elif isinstance(instruction, SetColor):
+            code = cast(int, instruction.color.code)  # noqa
+            if code < 8:
+                match instruction.role:
+                    case ColorRole.FOREGROUND:
+                        state.fg = code
+                    case ColorRole.BACKGROUND:
+                        state.bg = code
+
+        elif isinstance(instruction, SetAttribute):
+            match instruction.attribute:
+                case Attribute.NORMAL:
+                    state = parser.State()
+                case Attribute.BOLD:
+                    state.bold = True
+                case Attribute.UNDERLINE:
+                    state.underline = True
+                case Attribute.NOT_UNDERLINE:
+                    state.underline = False
+                case Attribute.BLINK:
+                    state.blink = True
+
+    return buffer
+
+
+class CellParser(HTMLParser):
+    """
+    Flatten the rendered HTML into the style and classes that apply to
+    each character, which is what ends up on the screen.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.stack: list[tuple[str, list[str]]] = []
+        self.cells: list[Cell] = []
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        self.stack.append((attributes.get("style") or "", (attributes.get("class") or "").split()))
+
+    def handle_endtag(self, tag):
+        self.stack.pop()
+
+    def handle_data(self, data):
+        style = "; ".join(style for style, _ in self.stack if style)
+        classes = frozenset(name for _, names in self.stack for name in names)
+        for ch in data:
+            # Blink only changes the opacity, which can't be seen on whitespace
+            self.cells.append((ch, style, classes - {"blink"} if ch.isspace() else classes))
+
+
+def get_cells(html: str) -> list[Cell]:
+    parser = CellParser()
+    parser.feed(html)
+    parser.close()
+    return parser.cells
+
+
+class Command(BaseCommand):
+    help = "Compare the ANSI renderer against the previous one on the fudan documents"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        texts = list(Document.objects.values_list("text", flat=True)[: options["limit"]])
+        texts += ScratchFile.objects.values_list("text", flat=True)
+        self.stdout.write(f"Rendering {len(texts)} texts ...")
+
+        legacy_time, current_time = 0.0, 0.0
+        legacy_size, current_size = 0, 0
+        mismatches = 0
+        for text in texts:
+            parser = ANSIParser(text)
+
+            legacy_html, current_html = "", ""
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                legacy_html = legacy_to_html(parser)
+                legacy_time += time.perf_counter() - start
+
+                start = time.perf_counter()
+                current_html = parser.to_html()
+                current_time += time.perf_counter() - start
+
+            legacy_size += len(legacy_html.encode())
+            current_size += len(current_html.encode())
+
+            # The coalesced runs change the markup, so the outputs are
+            # compared by what each character renders as.
+            if get_cells(legacy_html) != get_cells(current_html):
+                mismatches += 1
+
+        self.stdout.write(f"Legacy:  {legacy_time:.3f}s, {legacy_size} bytes")
+        self.stdout.write(f"Current: {current_time:.3f}s, {current_size} bytes")
+        if current_time:
+            self.stdout.write(f"Speedup: {legacy_time / current_time:.2f}x")
+
+        if mismatches:
+            raise CommandError(f"Found {mismatches} rendering mismatches")
+
+        self.stdout.write("All texts rendered identically")
@@ -84,7 +84,11 @@ class Command(BaseCommand):
                 if ">>" not in link.text:
                     link.text = " " * 5 + link.text
 
+        for link in menu_links:
+            link.original_hash = link.get_original_hash()
+
         MenuLink.objects.bulk_create(menu_links)
+        MenuLink.refresh_positions(Menu.objects.filter(pk=menu.pk))
 
         return menu
 
@@ -0,0 +1,45 @@
+from typing import TypeVar
+
+from django.core.management.base import BaseCommand
+from django.db.models import QuerySet
+
+from ascii.core.cache import bump_generation
+from ascii.fudan.constants import PAGE_CACHE_NAMESPACE
+from ascii.fudan.models import Document, ScratchFile
+
+_M = TypeVar("_M", Document, ScratchFile)
+
+
+class Command(BaseCommand):
+    help = "Re-render the stored HTML for the fudan documents and scratch files"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        fields = ["original_hash", "html_lines", "line_indents"]
+        count = self.render(Document.objects.defer(*fields), fields, batch_size)
+        self.stdout.write(f"Rendered {count} documents")
+
+        fields = ["html"]
+        count = self.render(ScratchFile.objects.defer(*fields), fields, batch_size)
+        self.stdout.write(f"Rendered {count} scratch files")
+
+        bump_generation(PAGE_CACHE_NAMESPACE)
+
+    def render(self, qs: QuerySet[_M], fields: list[str], batch_size: int) -> int:
+        count = 0
+        batch: list[_M] = []
+        for obj in qs.iterator(chunk_size=batch_size):
+            obj.render()
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                qs.bulk_update(batch, fields)
+                count += len(batch)
+                batch = []
+
+        qs.bulk_update(batch, fields)
+        count += len(batch)
+        return count
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+
+from ascii.core.cache import bump_generation
+from ascii.fudan.constants import PAGE_CACHE_NAMESPACE
+from ascii.fudan.models import Document, MenuLink
+from ascii.translations.choices import TranslationLanguages
+from ascii.translations.memory import TranslationPipeline
+from ascii.translations.models import Translation
+
+
+class Command(BaseCommand):
+    help = "Translate all of the fudan documents and menu links that don't have a translation"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Concurrent client requests")
+        parser.add_argument("--batch-size", type=int, default=100, help="Lines per request")
+
+    def handle(self, *args, **options):
+        language = TranslationLanguages.CHINESE_SIMPLIFIED
+
+        translations = Translation.objects.filter(language=language).exclude(translated="")
+        translated = set(translations.values_list("original_hash", flat=True))
+
+        # Texts shared by several documents or links are only translated once
+        originals: dict[str, str] = {}
+        for model in (Document, MenuLink):
+            objects = model.objects.exclude(original_hash="").only("text", "original_hash")
+            for obj in objects.iterator():
+                if obj.original_hash not in translated:
+                    originals[obj.original_hash] = obj.get_original_text()
+
+        self.stdout.write(f"Translating {len(originals)} texts ...")
+        pipeline = TranslationPipeline(
+            language,
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+        )
+        results = pipeline.translate(originals.values())
+
+        Translation.objects.bulk_create(
+            [
+                Translation(
+                    language=language,
+                    original=original,
+                    original_hash=original_hash,
+                    translated=results[original],
+                )
+                for original_hash, original in originals.items()
+                if original in results
+            ],
+            update_conflicts=True,
+            unique_fields=["original_hash", "language"],
+            update_fields=["translated"],
+            batch_size=500,
+        )
+        self.stdout.write(f"Translated {len(results)} texts")
+
+        bump_generation(PAGE_CACHE_NAMESPACE)
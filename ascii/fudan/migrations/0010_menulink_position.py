@@ -0,0 +1,31 @@
+# Generated by Django 5.2.10 on 2026-10-18 13:38
+
+from django.db import migrations, models
+
+BACKFILL_SQL = """
+UPDATE fudan_menulink SET position = ranked.position
+FROM (
+    SELECT id, ROW_NUMBER() OVER (PARTITION BY menu_id ORDER BY "order", id) AS position
+    FROM fudan_menulink
+) AS ranked
+WHERE fudan_menulink.id = ranked.id;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("fudan", "0009_assetfile"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="menulink",
+            name="position",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="menulink",
+            index=models.Index(fields=["menu", "position"], name="menulink_menu_position"),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.10 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+from ascii.fudan.ansi import ANSIParser
+from ascii.translations.utils import get_text_hash
+
+
+def backfill_original_hash(apps, schema_editor):
+    for model_name in ["Document", "MenuLink"]:
+        model = apps.get_model("fudan", model_name)
+
+        batch = []
+        for obj in model.objects.only("text").iterator(chunk_size=500):
+            original = ANSIParser(obj.text).to_stripped_text()
+            obj.original_hash = get_text_hash(original) if original.strip() else ""
+            batch.append(obj)
+            if len(batch) >= 500:
+                model.objects.bulk_update(batch, ["original_hash"])
+                batch = []
+
+        model.objects.bulk_update(batch, ["original_hash"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("fudan", "0010_menulink_position"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="original_hash",
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name="menulink",
+            name="original_hash",
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.RunPython(backfill_original_hash, migrations.RunPython.noop),
+    ]
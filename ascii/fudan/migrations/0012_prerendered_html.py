@@ -0,0 +1,52 @@
+# Generated by Django 5.2.10 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+import ascii.core.fields
+from ascii.fudan.ansi import ANSIParser
+
+
+def backfill_html(apps, schema_editor):
+    Document = apps.get_model("fudan", "Document")
+    ScratchFile = apps.get_model("fudan", "ScratchFile")
+
+    batch = []
+    for document in Document.objects.only("text").iterator(chunk_size=500):
+        parser = ANSIParser(document.text)
+        document.html_lines = parser.to_html_lines()
+        document.line_indents = parser.get_line_indents()
+        batch.append(document)
+        if len(batch) >= 500:
+            Document.objects.bulk_update(batch, ["html_lines", "line_indents"])
+            batch = []
+
+    Document.objects.bulk_update(batch, ["html_lines", "line_indents"])
+
+    for scratch_file in ScratchFile.objects.only("text"):
+        scratch_file.html = ANSIParser(scratch_file.text).to_html()
+        scratch_file.save(update_fields=["html"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("fudan", "0011_original_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="html_lines",
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="line_indents",
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name="scratchfile",
+            name="html",
+            field=ascii.core.fields.NonStrippingTextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(backfill_html, migrations.RunPython.noop),
+    ]
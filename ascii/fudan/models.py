@@ -1,14 +1,20 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
+
 from django.db import models
 from django.urls import reverse
+from django.utils.safestring import mark_safe
 
 from ascii.core.fields import NonStrippingCharField, NonStrippingTextField
 from ascii.core.models import BaseModel
+from ascii.core.positions import get_neighbors, refresh_positions
 from ascii.fudan.ansi import ANSIParser
 from ascii.fudan.choices import MenuLinkType
+from ascii.fudan.constants import TRANSLATION_PENDING
 from ascii.translations.choices import TranslationLanguages
 from ascii.translations.models import Translation
+from ascii.translations.utils import get_text_hash
 
 
 class Menu(BaseModel):
@@ -35,6 +41,13 @@ class Document(BaseModel):
     data = models.BinaryField()
     text = NonStrippingTextField()
 
+    # Translation lookup key for the stripped text, see get_original_hash()
+    original_hash = models.CharField(max_length=32, blank=True, editable=False)
+
+    # Rendered from the text on save, see render()
+    html_lines = models.JSONField(default=list, editable=False)
+    line_indents = models.JSONField(default=list, editable=False)
+
     def __str__(self):
         return f"Document: {self.pk}"
 
@@ -50,39 +63,66 @@ class Document(BaseModel):
     def public_url(self) -> str:
         return reverse("fudan-bbs-document", args=[self.path[1:]])
 
-    def get_translation(self) -> Translation | None:
+    def save(self, *args, **kwargs):
+        self.render()
+        super().save(*args, **kwargs)
+
+    def render(self) -> None:
+        """
+        Precompute everything that's derived from the text, so the views
+        don't need to parse the ANSI escape codes.
+        """
         parser = ANSIParser(self.text)
-        original = parser.to_stripped_text()
+        self.original_hash = self.get_original_hash()
+        self.html_lines = parser.to_html_lines()
+        self.line_indents = parser.get_line_indents()
+
+    def get_original_text(self) -> str:
+        return ANSIParser(self.text).to_stripped_text()
+
+    def get_original_hash(self) -> str:
+        # Left blank when there's nothing to translate
+        original = self.get_original_text()
+        return get_text_hash(original) if original.strip() else ""
+
+    def get_translation(self) -> Translation | None:
+        if not self.original_hash:
+            return None
 
         translation = Translation.objects.filter(
-            original=original,
+            original_hash=self.original_hash,
             language=TranslationLanguages.CHINESE_SIMPLIFIED,
         ).first()
 
         return translation
 
     def get_translated_text(self, start: int | None = None, end: int | None = None) -> str:
-        parser = ANSIParser(self.text)
-        original = parser.to_stripped_text()
-
-        translation, created = Translation.objects.get_or_create(
-            original=original,
-            language=TranslationLanguages.CHINESE_SIMPLIFIED,
-        )
-        if created:
-            translation.populate_translation()
-
-        translated_text = translation.translated
-        translated_text = parser.apply_line_indents(translated_text)
+        """
+        Return the translated text, or a placeholder if the translation is
+        still pending.
+        """
+        translated_text: str | None = ""
+        if self.original_hash:
+            translations = Translation.objects.get_by_hash(
+                [self.original_hash], TranslationLanguages.CHINESE_SIMPLIFIED
+            )
+            if self.original_hash not in translations:
+                Translation.objects.enqueue(
+                    [self.get_original_text()], TranslationLanguages.CHINESE_SIMPLIFIED
+                )
+            translated_text = translations.get(self.original_hash)
+
+        if translated_text is None:
+            return TRANSLATION_PENDING
+
+        translated_text = ANSIParser.indent_lines(translated_text, self.line_indents)
 
         # Slice after translating to avoid busting the cache.
         translated_text = "\n".join(translated_text.splitlines()[start:end])
         return translated_text
 
     def get_html(self, start: int | None = None, end: int | None = None) -> str:
-        text = "\n".join(self.text.splitlines()[start:end])
-        parser = ANSIParser(text)
-        return parser.to_html()
+        return mark_safe("\n".join(self.html_lines[start:end]))
 
 
 class MenuLink(BaseModel):
@@ -109,12 +149,42 @@ class MenuLink(BaseModel):
         related_name="parents",
     )
 
+    # Index within the menu, see MenuLink.refresh_positions
+    position = models.PositiveIntegerField(blank=True, null=True, editable=False)
+
+    # Translation lookup key for the stripped text, see get_original_hash()
+    original_hash = models.CharField(max_length=32, blank=True, editable=False)
+
+    # Set by MenuLink.load_translations
+    translated_text: str
+
     class Meta:
         ordering = ["order", "id"]
+        indexes = [
+            models.Index(fields=["menu", "position"], name="menulink_menu_position"),
+        ]
 
     def __str__(self):
         return f"MenuLink: {self.pk}"
 
+    def save(self, *args, **kwargs):
+        self.original_hash = self.get_original_hash()
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def refresh_positions(cls, menus: models.QuerySet[Menu]) -> int:
+        links = cls.objects.filter(menu__in=menus.values("pk"))
+        return refresh_positions(links, ["order", "id"], partition_by="menu_id")
+
+    def get_neighbors(self) -> tuple[MenuLink | None, MenuLink | None]:
+        """
+        Return the previous and next links in the menu.
+        """
+        if self.position is None:
+            return self.get_prev(), self.get_next()
+
+        return get_neighbors(MenuLink.objects.filter(menu_id=self.menu_id), self.position)
+
     @property
     def data(self) -> bytes:
         return self.text.encode("gb18030")
@@ -169,44 +239,77 @@ class MenuLink(BaseModel):
         qs = MenuLink.objects.filter(menu=self.menu, order__gt=self.order)
         return qs.order_by("order").first()
 
+    def get_original_text(self) -> str:
+        return ANSIParser(self.text).to_stripped_text()
+
+    def get_original_hash(self) -> str:
+        # Left blank when there's nothing to translate
+        original = self.get_original_text()
+        return get_text_hash(original) if original.strip() else ""
+
     def get_translation(self) -> Translation | None:
-        parser = ANSIParser(self.text)
-        original = parser.to_stripped_text()
+        if not self.original_hash:
+            return None
 
         translation = Translation.objects.filter(
-            original=original,
+            original_hash=self.original_hash,
             language=TranslationLanguages.CHINESE_SIMPLIFIED,
         ).first()
 
         return translation
 
-    def get_translated_text(self) -> str:
-        parser = ANSIParser(self.text)
-        original = parser.to_stripped_text()
-
-        translation, created = Translation.objects.get_or_create(
-            original=original,
-            language=TranslationLanguages.CHINESE_SIMPLIFIED,
+    @classmethod
+    def load_translations(cls, links: Iterable[MenuLink]) -> None:
+        """
+        Set translated_text on each of the links, using a single query to
+        look up the translations. Missing translations are queued and get
+        a placeholder.
+        """
+        links = list(links)
+        translations = Translation.objects.get_by_hash(
+            [link.original_hash for link in links if link.original_hash],
+            TranslationLanguages.CHINESE_SIMPLIFIED,
         )
-        if created:
-            translation.populate_translation()
 
-        translated_text = translation.translated or "-"
-        # translated_text = parser.apply_line_indents(translated_text)
-        return translated_text
+        missing = {
+            link.original_hash: link
+            for link in links
+            if link.original_hash and link.original_hash not in translations
+        }
+        if missing:
+            Translation.objects.enqueue(
+                [link.get_original_text() for link in missing.values()],
+                TranslationLanguages.CHINESE_SIMPLIFIED,
+            )
+
+        for link in links:
+            if not link.original_hash:
+                link.translated_text = "-"
+            elif (translated_text := translations.get(link.original_hash)) is None:
+                link.translated_text = TRANSLATION_PENDING
+            else:
+                link.translated_text = translated_text
 
 
 class ScratchFile(BaseModel):
     slug = models.SlugField(unique=True)
     text = NonStrippingTextField()
 
+    # Rendered from the text on save
+    html = NonStrippingTextField(blank=True, editable=False)
+
     def __str__(self):
         return f"Scratch: {self.pk}"
 
+    def save(self, *args, **kwargs):
+        self.render()
+        super().save(*args, **kwargs)
+
+    def render(self) -> None:
+        self.html = ANSIParser(self.text).to_html()
+
     def get_html(self) -> str:
-        parser = ANSIParser(self.text)
-        html = parser.to_html()
-        return html
+        return mark_safe(self.html)
 
     @property
     def public_url(self) -> str:
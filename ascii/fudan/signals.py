@@ -0,0 +1,24 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from ascii.core.cache import bump_generation
+from ascii.fudan.constants import PAGE_CACHE_NAMESPACE
+from ascii.fudan.models import Menu, MenuLink
+
+
+@receiver(post_save, sender=MenuLink)
+@receiver(post_delete, sender=MenuLink)
+def update_menulink_positions(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and "order" not in update_fields:
+        return
+
+    MenuLink.refresh_positions(Menu.objects.filter(pk=instance.menu_id))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+@receiver(m2m_changed)
+def invalidate_page_cache(sender, **kwargs):
+    # The document pages also show the cached translations
+    if sender._meta.app_label in ("fudan", "translations"):
+        bump_generation(PAGE_CACHE_NAMESPACE)
@@ -0,0 +1,43 @@
+from django.core.management import call_command
+
+from ascii.fudan.ansi import ANSIParser
+from ascii.fudan.models import Document
+
+
+def test_to_html_lines():
+    text = "\x1b[1;31mred\r\nstill red\x1b[0m\n\nplain\n"
+    lines = ANSIParser(text).to_html_lines()
+    assert len(lines) == len(text.splitlines())
+
+    # The color carries over to the next line
+    assert lines[1] == "<span style='color: var(--c9)'>still red</span>"
+    assert lines[2] == ""
+    assert lines[3] == "<span >plain</span>"
+
+    # Without any state to carry over, the lines match rendering the slice
+    for i, line in enumerate(text.splitlines()[2:], start=2):
+        assert lines[i] == ANSIParser(line).to_html()
+
+    assert ANSIParser("").to_html_lines() == []
+
+
+def test_to_html_coalesces_runs():
+    text = "\x1b[31mred \x1b[31mstill red\x1b[1m bold\x1b[0m\x1b[5m a <b>"
+    html = ANSIParser(text).to_html()
+    assert html == (
+        "<span style='color: var(--c1)'>red still red</span>"
+        "<span style='color: var(--c9)'> bold</span>"
+        "<span > <span class='blink'>a</span> <span class='blink'>&lt;b&gt;</span></span>"
+    )
+
+
+def test_benchmark_ansi(capsys):
+    texts = [
+        "\x1b[1;33;44mhello\x1b[0m world\n",
+        "\x1b[4;5;32m  blinking\x1b[31m red \x1b[24mtext\x1b[0m\r\n<tag> & more",
+    ]
+    for i, text in enumerate(texts):
+        Document.objects.create(path=f"/{i}", data=b"", text=text)
+
+    call_command("benchmark_ansi", repeat=1)
+    assert "All texts rendered identically" in capsys.readouterr().out
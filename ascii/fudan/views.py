@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Any
 
 from django.http import HttpRequest, HttpResponse
@@ -5,8 +6,10 @@ from django.shortcuts import get_object_or_404, redirect
 from django.views import View
 from django.views.generic import TemplateView
 
+from ascii.core.cache import ConditionalGetMixin
 from ascii.core.utils import get_query_param
-from ascii.fudan.models import AssetFile, Document, Menu, ScratchFile
+from ascii.fudan.constants import PAGE_CACHE_NAMESPACE
+from ascii.fudan.models import AssetFile, Document, Menu, MenuLink, ScratchFile
 
 
 class FudanScratchFileView(TemplateView):
@@ -29,11 +32,11 @@ class FudanBBSMenuView(TemplateView):
     def get_context_data(self, **kwargs) -> dict[str, Any]:
         obj = get_object_or_404(Menu, path=f"/{kwargs['path']}")
 
-        links = obj.links.all()
-        parents = obj.parents.all().select_related("menu")
+        links = list(obj.links.all())
+        parents = list(obj.parents.all().select_related("menu"))
+        MenuLink.load_translations([*links, *parents])
         if parents:
-            next_link = parents[0].get_next()
-            prev_link = parents[0].get_prev()
+            prev_link, next_link = parents[0].get_neighbors()
         else:
             next_link = None
             prev_link = None
@@ -48,8 +51,17 @@ class FudanBBSMenuView(TemplateView):
         }
 
 
-class FudanBBSDocumentView(TemplateView):
+class FudanBBSDocumentView(ConditionalGetMixin, TemplateView):
     template_name = "fudan/bbs_document.html"
+    page_cache_namespace = PAGE_CACHE_NAMESPACE
+
+    def get_version(self, **kwargs) -> tuple[str, datetime | None] | None:
+        # The documents are never edited after they're ingested, the
+        # translations and menus are covered by the generation.
+        documents = Document.objects.filter(path=f"/{kwargs['path']}")
+        if pk := documents.values_list("id", flat=True).first():
+            return str(pk), None
+        return None
 
     def get_template_names(self) -> list[str]:
         if get_query_param(self.request, "plain"):
@@ -58,7 +70,9 @@ class FudanBBSDocumentView(TemplateView):
         return [self.template_name]
 
     def get_context_data(self, **kwargs) -> dict[str, Any]:
-        obj = get_object_or_404(Document, path=f"/{kwargs['path']}")
+        # The HTML and line indents are stored, so the raw data isn't needed
+        documents = Document.objects.defer("data", "text")
+        obj = get_object_or_404(documents, path=f"/{kwargs['path']}")
 
         start, end = None, None
         if _range := get_query_param(self.request, "range"):
@@ -78,10 +92,10 @@ class FudanBBSDocumentView(TemplateView):
         else:
             content_en = obj.get_translated_text(start=start, end=end)
 
-        parents = obj.parents.all().select_related("menu")
+        parents = list(obj.parents.all().select_related("menu"))
+        MenuLink.load_translations(parents)
         if parents:
-            next_link = parents[0].get_next()
-            prev_link = parents[0].get_prev()
+            prev_link, next_link = parents[0].get_neighbors()
         else:
             next_link = None
             prev_link = None
@@ -0,0 +1,2 @@
+# Namespace for the page cache generation, see ascii.core.cache
+PAGE_CACHE_NAMESPACE = "mozz"
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from ascii.core.cache import bump_generation
+from ascii.mozz.constants import PAGE_CACHE_NAMESPACE
+from ascii.mozz.models import ArtPost
+
+
+class Command(BaseCommand):
+    help = "Backfill the stored width/height columns for ArtPost images"
+
+    def handle(self, *args, **options):
+        posts = ArtPost.objects.filter(image_x1__gt="", image_x1_width__isnull=True)
+        for post in posts:
+            # The ImageField fills in the dimension fields when the row is loaded,
+            # write them back without going through ArtPost.save().
+            ArtPost.objects.filter(pk=post.pk).update(
+                image_x1_width=post.image_x1_width,
+                image_x1_height=post.image_x1_height,
+            )
+            self.stdout.write(f"{post.slug}: {post.image_x1_width}x{post.image_x1_height}")
+
+        bump_generation(PAGE_CACHE_NAMESPACE)
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.10 on 2026-10-18 13:05
+
+import ascii.mozz.models
+import django.core.files.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mozz", "0021_artpost_artfile_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="artpost",
+            name="image_x1_height",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="artpost",
+            name="image_x1_width",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="artpost",
+            name="image_x1",
+            field=models.ImageField(
+                blank=True,
+                height_field="image_x1_height",
+                null=True,
+                storage=django.core.files.storage.FileSystemStorage(allow_overwrite=True),
+                upload_to=ascii.mozz.models.upload_to,
+                verbose_name="Image (x1)",
+                width_field="image_x1_width",
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.10 on 2026-10-18 13:38
+
+from django.db import migrations, models
+
+BACKFILL_SQL = """
+UPDATE mozz_artpost SET position = ranked.position
+FROM (
+    SELECT id, ROW_NUMBER() OVER (ORDER BY date DESC, id DESC) AS position
+    FROM mozz_artpost WHERE visible
+) AS ranked
+WHERE mozz_artpost.id = ranked.id;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("mozz", "0022_artpost_image_x1_dimensions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="artpost",
+            name="position",
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
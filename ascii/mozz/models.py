@@ -11,6 +11,7 @@ from imagekit.models import ImageSpecField
 from imagekit.processors import ResizeToFit
 
 from ascii.core.models import BaseModel
+from ascii.core.positions import get_neighbors, refresh_positions
 from ascii.core.sauce import get_sauce_data
 from ascii.mozz.choices import ArtPostFileType, ArtPostFontName
 from ascii.textmode.models import ArtFile
@@ -21,6 +22,14 @@ class ArtPostQuerySet(models.QuerySet):
     def visible(self) -> ArtPostQuerySet:
         return self.filter(visible=True)
 
+    def refresh_positions(self) -> int:
+        """
+        Renumber all of the visible posts from newest to oldest, hidden posts
+        don't get a position. Always covers the whole table.
+        """
+        ArtPost.objects.filter(visible=False).update(position=None)
+        return refresh_positions(ArtPost.objects.visible(), ["-date", "-id"])
+
 
 ArtPostManager = Manager.from_queryset(ArtPostQuerySet)  # noqa
 
@@ -53,7 +62,11 @@ class ArtPost(BaseModel):
         verbose_name="Image (x1)",
         blank=True,
         null=True,
+        width_field="image_x1_width",
+        height_field="image_x1_height",
     )
+    image_x1_width = models.PositiveIntegerField(blank=True, null=True)
+    image_x1_height = models.PositiveIntegerField(blank=True, null=True)
     image_tn = ImageSpecField(
         source="image_x1",
         processors=[ResizeToFit(height=300, width=400)],
@@ -77,6 +90,10 @@ class ArtPost(BaseModel):
         null=True,
     )
 
+    # Index among the visible posts from newest to oldest, see
+    # ArtPostQuerySet.refresh_positions
+    position = models.PositiveIntegerField(blank=True, null=True, editable=False, db_index=True)
+
     objects = ArtPostManager()
 
     class Meta:
@@ -108,6 +125,15 @@ class ArtPost(BaseModel):
         _, ext = os.path.splitext(self.image_x1.name)
         return ext.lower() if ext else ""
 
+    def get_neighbors(self) -> tuple[ArtPost | None, ArtPost | None]:
+        """
+        Return the previous (newer) and next (older) visible posts.
+        """
+        if self.position is None:
+            return self.get_prev(), self.get_next()
+
+        return get_neighbors(ArtPost.objects.visible(), self.position)
+
     def get_prev(self) -> ArtPost | None:
         qs = ArtPost.objects.visible().filter(
             Q(date__gt=self.date) | Q(date=self.date, id__gt=self.id)
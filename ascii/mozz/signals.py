@@ -0,0 +1,33 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from ascii.core.cache import bump_generation
+from ascii.core.positions import get_changed_fields
+from ascii.mozz.constants import PAGE_CACHE_NAMESPACE
+from ascii.mozz.models import ArtPost
+
+
+@receiver(pre_save, sender=ArtPost)
+def check_artpost_position(sender, instance, update_fields=None, **kwargs):
+    # The positions only depend on the date and visibility of the posts
+    changed = get_changed_fields(instance, ["date", "visible"], update_fields)
+    instance._position_changed = bool(changed)
+
+
+@receiver(post_save, sender=ArtPost)
+def update_artpost_positions(sender, instance, **kwargs):
+    if instance._position_changed:
+        ArtPost.objects.refresh_positions()
+
+
+@receiver(post_delete, sender=ArtPost)
+def update_artpost_positions_on_delete(sender, instance, **kwargs):
+    ArtPost.objects.refresh_positions()
+
+
+@receiver(post_save)
+@receiver(post_delete)
+@receiver(m2m_changed)
+def invalidate_page_cache(sender, **kwargs):
+    if sender._meta.app_label == "mozz":
+        bump_generation(PAGE_CACHE_NAMESPACE)
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import Any
 
 from django.http.response import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.views.generic.base import TemplateView, View
 
+from ascii.core.cache import ConditionalGetMixin
+from ascii.mozz.constants import PAGE_CACHE_NAMESPACE
 from ascii.mozz.forms import MozzGalleryFilterForm
 from ascii.mozz.models import ArtPost, ScrollFile
 
@@ -34,8 +37,15 @@ class MozzIndexView(TemplateView):
         }
 
 
-class MozzArtPostView(TemplateView):
+class MozzArtPostView(ConditionalGetMixin, TemplateView):
     template_name = "mozz/artpost.html"
+    page_cache_namespace = PAGE_CACHE_NAMESPACE
+
+    def get_version(self, **kwargs) -> tuple[str, datetime | None] | None:
+        posts = ArtPost.objects.filter(date=kwargs["date"], slug=kwargs["slug"])
+        if row := posts.values_list("id", "updated_at").first():
+            return f"{row[0]}:{row[1].isoformat()}", row[1]
+        return None
 
     def get_context_data(self, **kwargs) -> dict[str, Any]:
         post = get_object_or_404(
@@ -43,10 +53,11 @@ class MozzArtPostView(TemplateView):
             date=kwargs["date"],
             slug=kwargs["slug"],
         )
+        prev, next = post.get_neighbors()
         return {
             "post": post,
-            "prev": post.get_prev(),
-            "next": post.get_next(),
+            "prev": prev,
+            "next": next,
         }
 
 
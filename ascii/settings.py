@@ -211,6 +211,14 @@ LOGGING = {
 MEDIA_ROOT = os.path.join(DATA_ROOT, "media")
 MEDIA_URL = "/media/"
 
+# Hand media files off to the front proxy with an internal redirect, either
+# "X-Accel-Redirect" (nginx) or "X-Sendfile" (apache/lighttpd). When unset
+# they're streamed by django, see ascii.core.media
+MEDIA_SENDFILE_HEADER = env.str("MEDIA_SENDFILE_HEADER", "")
+
+# Internal nginx location that aliases MEDIA_ROOT, for X-Accel-Redirect
+MEDIA_ACCEL_PREFIX = env.str("MEDIA_ACCEL_PREFIX", "/protected-media/")
+
 REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 100,
@@ -228,3 +236,38 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.SessionAuthentication",
     ],
 }
+
+# Combined request rate for all 16colo.rs importer threads
+SIXTEENCOLORS_REQUESTS_PER_SECOND = env.float("SIXTEENCOLORS_REQUESTS_PER_SECOND", 1)
+
+# How often each worker checks the catalog counters for changes to the
+# search posting index (in seconds)
+SEARCH_INDEX_CHECK_INTERVAL = 0 if IS_RUNNING_TESTS else 10
+
+# Build the search posting index when the WSGI app is loaded, with gunicorn
+# --preload the workers then share the pages copy-on-write
+SEARCH_INDEX_PRELOAD = env.bool("SEARCH_INDEX_PRELOAD", False)
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(DATA_ROOT, "cache"),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+}
+if IS_RUNNING_TESTS:
+    CACHES["default"] = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+
+# Backend for the translations app, see ascii.translations.clients
+TRANSLATION_CLIENT = env.str(
+    "TRANSLATION_CLIENT", "ascii.translations.clients.GoogleTranslateClient"
+)
+if IS_RUNNING_TESTS:
+    TRANSLATION_CLIENT = "ascii.translations.clients.LocalTranslateClient"
+
+# Most artfiles that can go in a single zip download
+ZIP_DOWNLOAD_MAX_FILES = 1000
+
+# Cached pages are invalidated by signals (see ascii.core.cache), the timeout
+# only bounds how long unused entries stick around
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
@@ -0,0 +1,102 @@
+"""
+Lightweight ArtFile projection for the grid views.
+
+The grids only need a handful of columns per card, so they load plain
+values() rows instead of full model instances (skipping sauce_data and
+comments), and the URLs are built from a template reversed once per page
+instead of calling reverse() for every card.
+"""
+
+from __future__ import annotations
+
+import mimetypes
+from collections.abc import Iterable
+from dataclasses import dataclass
+from urllib.parse import quote
+
+from django.db.models import QuerySet
+from django.urls import reverse
+from django.utils.http import RFC3986_SUBDELIMS
+
+from ascii.textmode.models import ArtFile
+
+CARD_FIELDS = [
+    "id",
+    "name",
+    "is_fileid",
+    "image_tn",
+    "image_tn_width",
+    "image_tn_height",
+    "pack__name",
+    "year",
+]
+
+THUMB_WIDTH = 160
+THUMB_MAX_HEIGHT = 800
+
+# 2*160px + 2*5px padding + 20px gap
+THUMB_WIDTH_2X = 2 * THUMB_WIDTH + 30
+
+# Same as the escaping that reverse() applies to the generated path
+URL_SAFE = RFC3986_SUBDELIMS + "/~:@"
+
+
+@dataclass(slots=True)
+class ArtFileCard:
+    id: int
+    name: str
+    is_fileid: bool
+    pack_name: str
+    pack_year: int
+    public_url: str
+    image_tn_url: str | None
+    thumb_width: int
+    thumb_height: int
+    thumb_width_2x: int
+    thumb_height_2x: int
+
+    @property
+    def mimetype(self) -> str | None:
+        return mimetypes.guess_type(self.name, strict=False)[0]
+
+
+def card_values(queryset: QuerySet[ArtFile], *extra: str) -> QuerySet:
+    """
+    Limit an ArtFile queryset to the card columns, plus any extra fields or
+    annotations that the paginator sorts on.
+    """
+    return queryset.values(*CARD_FIELDS, *extra)
+
+
+def build_cards(rows: Iterable[dict]) -> list[ArtFileCard]:
+    url_template = reverse("textmode-artfile", args=[0, "pack", "artfile"])
+    url_prefix = url_template.removesuffix("/0/pack/a/artfile")
+    storage = ArtFile.image_tn.field.storage
+
+    cards = []
+    for row in rows:
+        pack_name = quote(row["pack__name"], safe=URL_SAFE)
+        name = quote(row["name"], safe=URL_SAFE)
+        public_url = f"{url_prefix}/{row['year']}/{pack_name}/a/{name}"
+
+        aspect_ratio = 1.0
+        if row["image_tn_width"] and row["image_tn_height"]:
+            aspect_ratio = row["image_tn_height"] / row["image_tn_width"]
+
+        cards.append(
+            ArtFileCard(
+                id=row["id"],
+                name=row["name"],
+                is_fileid=row["is_fileid"],
+                pack_name=row["pack__name"],
+                pack_year=row["year"],
+                public_url=public_url,
+                image_tn_url=storage.url(row["image_tn"]) if row["image_tn"] else None,
+                thumb_width=THUMB_WIDTH,
+                thumb_height=min(int(THUMB_WIDTH * aspect_ratio), THUMB_MAX_HEIGHT),
+                thumb_width_2x=THUMB_WIDTH_2X,
+                thumb_height_2x=min(int(THUMB_WIDTH_2X * aspect_ratio), THUMB_MAX_HEIGHT),
+            )
+        )
+
+    return cards
@@ -1,4 +1,10 @@
-from ascii.core.clients import BaseSession
+from django.conf import settings
+
+from ascii.core.clients import BaseSession, TokenBucket
+
+# Shared by every client instance, so that concurrent importers still stay
+# within the politeness budget for the host.
+RATE_LIMITER = TokenBucket(rate=settings.SIXTEENCOLORS_REQUESTS_PER_SECOND)
 
 
 class SixteenColorsClient:
@@ -9,8 +15,8 @@ class SixteenColorsClient:
     BASE_URL = "https://16colo.rs"
     BASE_API = "https://api.16colo.rs/v1"
 
-    def __init__(self):
-        self.session = BaseSession(request_delay=1)
+    def __init__(self, rate_limiter: TokenBucket = RATE_LIMITER):
+        self.session = BaseSession(rate_limiter=rate_limiter)
 
     def get_pack(self, name: str) -> dict:
         params = {
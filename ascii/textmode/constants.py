@@ -1,3 +1,6 @@
+# Namespace for the page cache generation, see ascii.core.cache
+PAGE_CACHE_NAMESPACE = "textmode"
+
 ANSI_COLORS = [
     "Black",
     "Red",
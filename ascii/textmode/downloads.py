@@ -0,0 +1,80 @@
+"""
+Zip downloads for groups of artfiles, see ascii.core.zipstream.
+"""
+
+from __future__ import annotations
+
+import logging
+import zipfile
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.http.response import HttpResponseBase
+from django.utils.http import content_disposition_header
+
+from ascii.core.zipstream import ZipMember, get_stored_zip_size, iter_zip
+from ascii.textmode.models import ArtFile
+
+_logger = logging.getLogger(__name__)
+
+
+def get_zip_members(
+    artfiles: QuerySet[ArtFile], ids: Sequence[int] | None = None
+) -> list[ZipMember]:
+    """
+    Build the archive members for the artfiles, in the queryset's order or
+    in the order of the given ids. Each file goes in a directory named
+    after its pack.
+    """
+    artfiles = artfiles.exclude(raw_file="")
+    if ids is not None:
+        artfiles = artfiles.filter(pk__in=ids)
+
+    rows = artfiles.values_list("id", "name", "raw_file", "pack__name", "pack__created_at")
+    if ids is not None:
+        rows_by_id = {row[0]: row for row in rows}
+        rows = [rows_by_id[pk] for pk in ids if pk in rows_by_id]  # type: ignore[assignment]
+
+    storage = ArtFile.raw_file.field.storage
+
+    members = []
+    for _, name, path, pack_name, created_at in rows:
+        try:
+            size = storage.size(path)
+        except OSError:
+            _logger.warning(f"Missing raw file for {pack_name}/{name}: {path}")
+            continue
+
+        members.append(ZipMember(f"{pack_name}/{name}", storage, path, size, created_at))
+
+    return members
+
+
+def build_zip_response(
+    artfiles: QuerySet[ArtFile],
+    filename: str,
+    ids: Sequence[int] | None = None,
+    compress: bool = False,
+) -> HttpResponseBase:
+    count = len(ids) if ids is not None else artfiles.count()
+    if count > settings.ZIP_DOWNLOAD_MAX_FILES:
+        return HttpResponseBadRequest(
+            f"Downloads are limited to {settings.ZIP_DOWNLOAD_MAX_FILES} files, "
+            f"this one has {count}."
+        )
+
+    members = get_zip_members(artfiles, ids)
+    compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+
+    response = StreamingHttpResponse(
+        iter_zip(members, compress_type),
+        content_type="application/zip",
+    )
+    if content_disposition := content_disposition_header(True, filename):
+        response.headers["Content-Disposition"] = content_disposition
+    if not compress and (size := get_stored_zip_size(members)) is not None:
+        response.headers["Content-Length"] = str(size)
+
+    return response
@@ -0,0 +1,135 @@
+"""
+Materialized facets for the search and filter forms.
+
+Building the form choices straight from the catalog takes several
+DISTINCT scans and grouped aggregates per page load. Instead, they are
+computed when the catalog is written to and stored: global vocabularies
+in CatalogFacet rows, and per-pack counts in ArtPack.facets. Imports
+refresh them once they're done, and the textmode signals refresh them
+after changes made elsewhere (e.g. in the admin).
+
+Missing entries are computed without being stored, so a fresh database
+works without running refresh_facets first.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable, Iterable
+
+from django.db import transaction
+from django.db.models import Count
+
+from ascii.core.cache import bump_generation
+from ascii.textmode.choices import TagCategory
+from ascii.textmode.constants import PAGE_CACHE_NAMESPACE
+from ascii.textmode.models import ArtFile, ArtPack, ArtPackQuerySet, CatalogFacet
+
+GLOBAL_FACETS: dict[str, Callable[[], list]] = {
+    "file_extensions": lambda: ArtFile.objects.visible().file_extensions(),
+    "font_names": lambda: ArtFile.objects.visible().font_names(),
+    "pack_years": lambda: ArtPack.objects.list_years(),
+}
+
+PACK_TAG_CATEGORIES = [TagCategory.ARTIST, TagCategory.GROUP]
+
+
+_pending = threading.local()
+
+
+def refresh_global_facets(keys: Iterable[str] | None = None) -> None:
+    for key in GLOBAL_FACETS if keys is None else keys:
+        values = GLOBAL_FACETS[key]()
+        CatalogFacet.objects.update_or_create(key=key, defaults={"values": values})
+
+
+def get_global_facets() -> dict[str, list]:
+    facets = dict(CatalogFacet.objects.values_list("key", "values"))
+    for key in GLOBAL_FACETS.keys() - facets.keys():
+        facets[key] = GLOBAL_FACETS[key]()
+
+    return facets
+
+
+def compute_pack_facets(pack_ids: list[int]) -> dict[int, dict[str, list]]:
+    """
+    Compute the filter counts for the given packs, with one grouped query
+    per facet regardless of the number of packs.
+    """
+    facets: dict[int, dict[str, list]] = {
+        pack_id: {"artist": [], "group": [], "extension": [], "collab": []} for pack_id in pack_ids
+    }
+
+    tag_counts = (
+        ArtFile.tags.through.objects.filter(
+            artfile__pack_id__in=pack_ids,
+            artfiletag__category__in=PACK_TAG_CATEGORIES,
+        )
+        .values_list("artfile__pack_id", "artfiletag__category", "artfiletag__name")
+        .annotate(count=Count("artfile_id", distinct=True))
+        .order_by("-count", "artfiletag__name")
+    )
+    for pack_id, category, name, count in tag_counts:
+        facets[pack_id][category].append([name, count])
+
+    artfiles = ArtFile.objects.filter(pack_id__in=pack_ids)
+
+    extension_counts = (
+        artfiles.exclude(file_extension="")
+        .values_list("pack_id", "file_extension")
+        .annotate(count=Count("id"))
+        .order_by("-count", "file_extension")
+    )
+    for pack_id, extension, count in extension_counts:
+        facets[pack_id]["extension"].append([extension, count])
+
+    collab_counts = (
+        artfiles.values_list("pack_id", "is_joint")
+        .annotate(count=Count("id"))
+        .order_by("-count", "is_joint")
+    )
+    for pack_id, is_joint, count in collab_counts:
+        facets[pack_id]["collab"].append([is_joint, count])
+
+    return facets
+
+
+def refresh_pack_facets(packs: ArtPackQuerySet) -> int:
+    facets = compute_pack_facets(list(packs.values_list("id", flat=True)))
+    objs = [ArtPack(id=pack_id, facets=data) for pack_id, data in facets.items()]
+    ArtPack.objects.bulk_update(objs, fields=["facets"], batch_size=500)
+    return len(objs)
+
+
+def get_pack_facets(pack: ArtPack) -> dict[str, list]:
+    if not pack.facets:
+        return compute_pack_facets([pack.pk])[pack.pk]
+
+    return pack.facets
+
+
+def refresh_facets_on_commit(pack_ids: Iterable[int] = (), keys: Iterable[str] = ()) -> None:
+    """
+    Refresh the pack facets and the global facets with the given keys once
+    the current transaction commits. Changes made in the same transaction,
+    like the files removed when a pack is deleted, are refreshed together.
+    """
+    if not hasattr(_pending, "pack_ids"):
+        _pending.pack_ids, _pending.keys = set(), set()
+
+    _pending.pack_ids.update(pack_ids)
+    _pending.keys.update(keys)
+    transaction.on_commit(_refresh_pending)
+
+
+def _refresh_pending() -> None:
+    pack_ids, keys = _pending.pack_ids, _pending.keys
+    _pending.pack_ids, _pending.keys = set(), set()
+
+    if pack_ids:
+        refresh_pack_facets(ArtPack.objects.filter(pk__in=pack_ids))
+    if keys:
+        refresh_global_facets(keys)
+
+    # Pages may have been cached between the change and the refresh
+    bump_generation(PAGE_CACHE_NAMESPACE)
@@ -3,18 +3,18 @@ from django import forms
 from django.db.models import Count
 
 from ascii.textmode.choices import AspectRatio, LetterSpacing, TagCategory
+from ascii.textmode.facets import get_global_facets, get_pack_facets
 from ascii.textmode.models import ArtFileQuerySet, ArtFileTag, ArtPack
 
 
 class ArtFileTagChoiceField(forms.ModelChoiceField):
-    def __init__(self, category: TagCategory, artfiles: ArtFileQuerySet, **kwargs):
-        queryset = ArtFileTag.objects.filter(category=category, artfiles__in=artfiles)
-        queryset = queryset.annotate(tag_count=Count("name")).order_by("-tag_count")
-        initial = queryset.values_list("id", flat=True)
-        super().__init__(queryset=queryset, initial=initial, **kwargs)
+    """
+    Tag choices with file counts, the submitted name is resolved to an ArtFileTag.
+    """
 
-    def label_from_instance(self, obj: ArtFileTag) -> str:
-        return f"{obj.name} ({obj.tag_count})"
+    def __init__(self, category: TagCategory, counts: list[list], **kwargs):
+        super().__init__(queryset=ArtFileTag.objects.filter(category=category), **kwargs)
+        self.choices = [(name, f"{name} ({count})") for name, count in counts]
 
 
 class PackChoiceField(forms.ModelChoiceField):
@@ -29,9 +29,9 @@ class PackChoiceField(forms.ModelChoiceField):
 
 
 class FileExtensionChoiceField(forms.ChoiceField):
-    def __init__(self, artfiles: ArtFileQuerySet, **kwargs):
+    def __init__(self, counts: list[list], **kwargs):
         choices = []
-        for ext, count in artfiles.count_file_extensions():
+        for ext, count in counts:
             choices.append((ext, f"{ext} ({count})"))
 
         super().__init__(choices=choices, **kwargs)
@@ -40,15 +40,15 @@ class FileExtensionChoiceField(forms.ChoiceField):
 class PackYearChoiceField(forms.ChoiceField):
     def __init__(self, **kwargs):
         choices = [("", "all years")]
-        for year in ArtPack.objects.list_years():
+        for year in get_global_facets()["pack_years"]:
             choices.append((str(year), str(year)))
         super().__init__(choices=choices, **kwargs)
 
 
 class CollabChoiceField(forms.ChoiceField):
-    def __init__(self, artfiles: ArtFileQuerySet, **kwargs):
+    def __init__(self, counts: list[list], **kwargs):
         choices = []
-        for is_joint, count in artfiles.count_is_joint():
+        for is_joint, count in counts:
             if is_joint:
                 choices.append(("joint", f"joint ({count})"))
             else:
@@ -58,14 +58,14 @@ class CollabChoiceField(forms.ChoiceField):
 
 
 class PackFilterForm(forms.Form):
-    def __init__(self, artfiles: ArtFileQuerySet, *args, **kwargs):
+    def __init__(self, pack: ArtPack, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self.artfiles = artfiles
+        facets = get_pack_facets(pack)
 
         self.fields["artist"] = ArtFileTagChoiceField(
             category=TagCategory.ARTIST,
-            artfiles=artfiles,
+            counts=facets["artist"],
             required=False,
             to_field_name="name",
             label="Artist",
@@ -77,7 +77,7 @@ class PackFilterForm(forms.Form):
         )
         self.fields["group"] = ArtFileTagChoiceField(
             category=TagCategory.GROUP,
-            artfiles=artfiles,
+            counts=facets["group"],
             required=False,
             to_field_name="name",
             label="Group",
@@ -88,7 +88,7 @@ class PackFilterForm(forms.Form):
             ),
         )
         self.fields["collab"] = CollabChoiceField(
-            artfiles=artfiles,
+            counts=facets["collab"],
             required=False,
             label="Collab",
             widget=forms.RadioSelect(
@@ -98,7 +98,7 @@ class PackFilterForm(forms.Form):
             ),
         )
         self.fields["extension"] = FileExtensionChoiceField(
-            artfiles=artfiles,
+            counts=facets["extension"],
             required=False,
             label="Extension",
             widget=forms.RadioSelect(
@@ -221,22 +221,24 @@ class SearchPackForm(forms.Form):
 
 
 class AdvancedSearchForm(forms.Form):
-    def __init__(self, artfiles: ArtFileQuerySet, *args, **kwargs):
+    def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+        facets = get_global_facets()
+
         self.fields["q"] = forms.CharField(
             required=False,
-            label="Filename",
+            label="Keywords",
             widget=forms.TextInput(
                 attrs={
-                    "placeholder": "Name",
+                    "placeholder": "name, title, author, tags...",
                     "autocomplete": "off",
                     "class": "advanced-search-input",
                 },
             ),
         )
         self.fields["extension"] = forms.MultipleChoiceField(
-            choices=[(val, val) for val in artfiles.file_extensions()],
+            choices=[(val, val) for val in facets["file_extensions"]],
             label="Extension",
             required=False,
             widget=autocomplete.Select2Multiple,
@@ -266,7 +268,7 @@ class AdvancedSearchForm(forms.Form):
             required=False,
         )
         self.fields["font_name"] = forms.MultipleChoiceField(
-            choices=[(val, val) for val in artfiles.font_names()],
+            choices=[(val, val) for val in facets["font_names"]],
             label="Font Name",
             required=False,
             widget=autocomplete.Select2Multiple,
@@ -352,7 +354,7 @@ class AdvancedSearchForm(forms.Form):
             ),
         )
 
-        pack_years = list(ArtPack.objects.list_years())
+        pack_years = facets["pack_years"] or [None]
 
         self.fields["min_year"] = forms.IntegerField(
             min_value=pack_years[0],
@@ -1,12 +1,31 @@
+from __future__ import annotations
+
+import io
 import logging
+import os
+import threading
+import time
+import zipfile
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from urllib.parse import quote
 
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
+from django.db import connection, transaction
+from django.db.models.fields.files import FieldFile
+from PIL import Image
 
+from ascii.core.cache import bump_generation
+from ascii.core.sauce import get_sauce_data
 from ascii.textmode.choices import TagCategory
 from ascii.textmode.clients import SixteenColorsClient
+from ascii.textmode.constants import PAGE_CACHE_NAMESPACE
+from ascii.textmode.facets import refresh_pack_facets
 from ascii.textmode.models import ArtFile, ArtFileTag, ArtPack
+from ascii.textmode.render import get_render_options, is_renderable, render_artfile, render_pngs
 from ascii.textmode.sauce import Sauce
+from ascii.textmode.signals import defer_pack_refresh
 
 _logger = logging.getLogger(__name__)
 
@@ -16,21 +35,130 @@ BLACKLIST = [
     "yoda16",  # Empty, broken pack
 ]
 
+# Number of files that are tagged together, see SixteenColorsPackImporter.apply_tags()
+TAG_BATCH_SIZE = 200
+
+
+@dataclass
+class ImportStats:
+    files: int = 0
+    failed: int = 0
+    requests: int = 0
+    bytes: int = 0
+    started: float = field(default_factory=time.monotonic)
+    finished: float | None = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    def __str__(self):
+        elapsed = max(self.elapsed, 0.001)
+        return (
+            f"{self.files} files ({self.failed} failed), {self.requests} requests, "
+            f"{self.bytes / 1e6:.1f} MB "
+            f"in {elapsed:.1f}s, {self.files / elapsed:.2f} files/s, "
+            f"{self.bytes / 1e6 / elapsed:.2f} MB/s"
+        )
+
 
 class SixteenColorsPackImporter:
     """
     Import a single art pack and all associated metadata from 16colo.rs.
+
+    With workers > 1, the files in the pack are downloaded on a thread pool.
+    All clients share the same rate limiter, so the request rate to the
+    host is bounded regardless of the number of workers.
+
+    With archive_first, raw files are read out of the pack's zip archive and
+    only files that can't be found in the archive are downloaded
+    individually. The pre-rendered images from 16colo.rs are always
+    downloaded when they exist, and rendered locally when they don't.
     """
 
     fileid: str
     year: int
     pack: ArtPack
 
-    def __init__(self, name: str, skip_tags: bool = False, skip_existing: bool = False):
+    def __init__(
+        self,
+        name: str,
+        skip_tags: bool = False,
+        skip_existing: bool = False,
+        workers: int = 1,
+        archive_first: bool = True,
+    ):
         self.name = name
-        self.client = SixteenColorsClient()
         self.skip_tags = skip_tags
         self.skip_existing = skip_existing
+        self.workers = workers
+        self.archive_first = archive_first
+        self.stats = ImportStats()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.members: dict[str, zipfile.ZipInfo] = {}
+        self.open_files: list = []
+        self.pending_tags: list[tuple[int, list[tuple[str, str]]]] = []
+        self.untagged: set[str] = set()
+
+    @property
+    def client(self) -> SixteenColorsClient:
+        # requests.Session isn't thread-safe, give each worker its own client.
+        if not hasattr(self.local, "client"):
+            self.local.client = SixteenColorsClient()
+        return self.local.client
+
+    def download(self, path: str) -> bytes:
+        data = self.client.get_file(path)
+        with self.lock:
+            self.stats.requests += 1
+            self.stats.bytes += len(data)
+        return data
+
+    @property
+    def archive(self) -> zipfile.ZipFile:
+        # Each worker reads from its own handle to the zip file.
+        if not hasattr(self.local, "archive"):
+            fp = self.pack.zip_file.storage.open(self.pack.zip_file.name, "rb")
+            self.local.archive = zipfile.ZipFile(fp)
+            with self.lock:
+                self.open_files.extend([self.local.archive, fp])
+        return self.local.archive
+
+    def load_archive_members(self) -> None:
+        """
+        Index the members of the pack's zip file from its central directory.
+        """
+        if not self.archive_first or not self.pack.zip_file:
+            return
+
+        try:
+            infolist = self.archive.infolist()
+        except (OSError, zipfile.BadZipFile) as e:
+            _logger.warning(f"Unable to read pack archive, falling back to HTTP: {e}")
+            return
+
+        for info in infolist:
+            if not info.is_dir():
+                self.members.setdefault(info.filename, info)
+        for info in infolist:
+            if not info.is_dir():
+                basename = os.path.basename(info.filename).lower()
+                self.members.setdefault(basename, info)
+
+    def close_archive(self) -> None:
+        for fp in self.open_files:
+            fp.close()
+        self.open_files.clear()
+
+    def open_archive_member(self, name: str) -> File | None:
+        info = self.members.get(name) or self.members.get(os.path.basename(name).lower())
+        if info is None:
+            return None
+
+        content = File(self.archive.open(info), name=name)
+        content.size = info.file_size
+        return content
 
     def process(self) -> ArtPack | None:
         if self.name in BLACKLIST:
@@ -46,6 +174,8 @@ class SixteenColorsPackImporter:
         except Exception as e:
             _logger.warning(f"Skipping pack with error: {e}")
             return None
+        finally:
+            self.stats.requests += 1
 
         if "fileid" not in data:
             _logger.warning(f"Skipping pack with missing fileid: {self.name}")
@@ -62,32 +192,79 @@ class SixteenColorsPackImporter:
             elif zip_name.startswith("mist1019"):
                 zip_name = "mist1019.zip"
 
-            zip_data = self.client.get_file(f"/archive/{self.year}/{quote(zip_name)}")
+            zip_data = self.download(f"/archive/{self.year}/{quote(zip_name)}")
             return ContentFile(zip_data, name=zip_name)
 
         try:
-            self.pack, _ = ArtPack.objects.get_or_create(
-                name=self.name,
-                defaults={
-                    "year": self.year,
-                    "zip_file": get_zip_file,
-                },
-            )
+            pack = ArtPack.objects.filter(name=self.name).first()
+            if pack is None:
+                # Download before opening the write transaction, not inside of it.
+                zip_file = get_zip_file()
+                pack, _ = ArtPack.objects.get_or_create(
+                    name=self.name,
+                    defaults={"year": self.year, "zip_file": zip_file},
+                )
+            self.pack = pack
         except Exception as e:
             # See https://16colo.rs/pack/fuel27/, returns 403 FORBIDDEN
             _logger.warning(f"Failed to download pack: {self.name=}, {data=}, {e=}")
             return None
 
-        for artfile_name, artfile_data in data["files"].items():
+        self.load_archive_members()
+
+        if not self.skip_tags:
+            # Files left over from an interrupted import still need their tags
+            untagged = ArtFile.objects.filter(pack=self.pack, tags__isnull=True)
+            self.untagged = set(untagged.values_list("name", flat=True))
+
+        files = list(data["files"].items())
+        with defer_pack_refresh(self.pack.pk):
             try:
-                self.process_file(artfile_name, artfile_data)
-            except Exception as e:
-                _logger.warning(
-                    f"Failed to process file: {artfile_name=}, {artfile_data=}, {e=}",
-                )
+                if self.workers > 1:
+                    with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                        futures = [
+                            executor.submit(self.process_file_in_thread, *item) for item in files
+                        ]
+                        for i, _ in enumerate(as_completed(futures), start=1):
+                            if i % 50 == 0:
+                                _logger.info(f"{self.name}: {i}/{len(files)} files, {self.stats}")
+                else:
+                    for artfile_name, artfile_data in files:
+                        self.try_process_file(artfile_name, artfile_data)
+            finally:
+                self.close_archive()
+
+            self.apply_tags()
 
+        packs = ArtPack.objects.filter(pk=self.pack.pk)
+        ArtFile.objects.filter(pack=self.pack).refresh_sauce_tags()
+        packs.refresh_artfile_positions()
+        refresh_pack_facets(packs)
+        # The tags and SAUCE links are written without signals
+        bump_generation(PAGE_CACHE_NAMESPACE)
+
+        self.stats.finished = time.monotonic()
+        _logger.info(f"Imported pack {self.name}: {self.stats}")
         return self.pack
 
+    def process_file_in_thread(self, name, data) -> None:
+        try:
+            self.try_process_file(name, data)
+        finally:
+            # Worker threads get their own database connection
+            connection.close()
+
+    def try_process_file(self, name, data) -> None:
+        try:
+            self.process_file(name, data)
+        except Exception as e:
+            _logger.warning(f"Failed to process file: {name=}, {data=}, {e=}")
+            with self.lock:
+                self.stats.failed += 1
+        finally:
+            with self.lock:
+                self.stats.files += 1
+
     def process_file(self, name, data):
         is_joint = len(data.get("artists", [])) > 1
         sauce = Sauce(data.get("sauce", {}))
@@ -100,7 +277,10 @@ class SixteenColorsPackImporter:
 
         def get_raw_file():
             raw_name = data["file"]["raw"]
-            raw_data = self.client.get_file(f"/pack/{self.name}/raw/{quote(raw_name)}")
+            if content := self.open_archive_member(raw_name):
+                return content
+
+            raw_data = self.download(f"/pack/{self.name}/raw/{quote(raw_name)}")
             return ContentFile(raw_data, name=raw_name)
 
         def get_image_tn():
@@ -108,7 +288,7 @@ class SixteenColorsPackImporter:
                 return None
 
             image_tn_name = data["file"]["tn"]["file"]
-            image_tn_data = self.client.get_file(f"/pack/{self.name}/tn/{quote(image_tn_name)}")
+            image_tn_data = self.download(f"/pack/{self.name}/tn/{quote(image_tn_name)}")
             return ContentFile(image_tn_data, name=image_tn_name)
 
         def get_image_x1():
@@ -116,15 +296,18 @@ class SixteenColorsPackImporter:
                 return None
 
             image_x1_name = data["file"]["x1"]["file"]
-            image_x1_data = self.client.get_file(f"/pack/{self.name}/x1/{quote(image_x1_name)}")
+            image_x1_data = self.download(f"/pack/{self.name}/x1/{quote(image_x1_name)}")
             return ContentFile(image_x1_data, name=image_x1_name)
 
-        create_defaults = {
-            **defaults,
-            "raw_file": get_raw_file,
-            "image_tn": get_image_tn,
-            "image_x1": get_image_x1,
-        }
+        create_defaults = defaults
+        if not ArtFile.objects.filter(name=name, pack=self.pack).exists():
+            # Download before opening the write transaction, not inside of it.
+            create_defaults = {
+                **defaults,
+                "raw_file": get_raw_file(),
+                "image_tn": get_image_tn(),
+                "image_x1": get_image_x1(),
+            }
 
         artfile, created = ArtFile.objects.update_or_create(
             defaults=defaults,
@@ -133,25 +316,274 @@ class SixteenColorsPackImporter:
             pack=self.pack,
         )
 
-        if created and not self.skip_tags:
-            tags: list[ArtFileTag] = []
-            for tag_name in data.get("artists", []):
-                tag, _ = ArtFileTag.objects.get_or_create(
-                    category=TagCategory.ARTIST,
-                    name=tag_name,
-                )
-                tags.append(tag)
-            for tag_name in data.get("content", []):
-                tag, _ = ArtFileTag.objects.get_or_create(
-                    category=TagCategory.CONTENT,
-                    name=tag_name,
-                )
-                tags.append(tag)
-            for tag_name in data.get("groups", []):
-                tag, _ = ArtFileTag.objects.get_or_create(
-                    category=TagCategory.GROUP,
-                    name=tag_name,
+        if created and not artfile.image_x1 and is_renderable(artfile):
+            # 16colo.rs didn't provide any images
+            try:
+                render_artfile(artfile)
+            except Exception as e:
+                _logger.warning(f"Failed to render file: {artfile=}, {e=}")
+
+        if (created or name in self.untagged) and not self.skip_tags:
+            tags: list[tuple[str, str]] = [
+                *((TagCategory.ARTIST, name) for name in data.get("artists", [])),
+                *((TagCategory.CONTENT, name) for name in data.get("content", [])),
+                *((TagCategory.GROUP, name) for name in data.get("groups", [])),
+            ]
+            with self.lock:
+                self.pending_tags.append((artfile.pk, tags))
+                batch_full = len(self.pending_tags) >= TAG_BATCH_SIZE
+
+            if batch_full:
+                self.apply_tags()
+
+    def apply_tags(self) -> None:
+        """
+        Tag the files that have been created since the last batch.
+
+        The through table rows are inserted directly, so the m2m_changed
+        counter signals don't fire and the affected tag counts are
+        recomputed in one statement instead.
+        """
+        with self.lock:
+            pending, self.pending_tags = self.pending_tags, []
+
+        if not pending:
+            return
+
+        keys = {key for _, tags in pending for key in tags}
+        with transaction.atomic():
+            tags = ArtFileTag.objects.get_or_create_many(keys)
+
+            through = ArtFile.tags.through
+            rows = {(artfile_id, tags[key].pk) for artfile_id, keys in pending for key in keys}
+            through.objects.bulk_create(
+                [
+                    through(artfile_id=artfile_id, artfiletag_id=tag_id)
+                    for artfile_id, tag_id in rows
+                ],
+                ignore_conflicts=True,
+            )
+
+            tag_ids = [tag.pk for tag in tags.values()]
+            ArtFileTag.objects.filter(pk__in=tag_ids).refresh_artfile_count()
+
+
+def import_packs(
+    names: list[str],
+    pack_workers: int = 1,
+    **kwargs,
+) -> Iterator[SixteenColorsPackImporter]:
+    """
+    Import several packs, optionally in parallel, yielding each importer as it finishes.
+    """
+
+    def run(name: str) -> SixteenColorsPackImporter:
+        importer = SixteenColorsPackImporter(name, **kwargs)
+        try:
+            importer.process()
+        finally:
+            if pack_workers > 1:
+                connection.close()
+        return importer
+
+    if pack_workers <= 1:
+        yield from map(run, names)
+        return
+
+    with ThreadPoolExecutor(max_workers=pack_workers) as executor:
+        futures = [executor.submit(run, name) for name in names]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+@dataclass
+class LocalArtFile:
+    """
+    A file read out of a local pack archive, ready to be written to storage.
+    """
+
+    name: str
+    data: bytes
+    fields: dict
+    image_x1: bytes | None = None
+    image_tn: bytes | None = None
+
+
+def read_local_pack(path: str, render: bool = True) -> list[LocalArtFile]:
+    """
+    Extract every member of a pack zip, parse its SAUCE record and optionally
+    render its images.
+
+    This doesn't touch the database or network, so it can be run in a process pool.
+    """
+    files: list[LocalArtFile] = []
+    seen: set[str] = set()
+
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            name = os.path.basename(info.filename)
+            if info.is_dir() or not name or name in seen:
+                continue
+            seen.add(name)
+
+            data = zf.read(info)
+            try:
+                fields = Sauce(get_sauce_data(data) or {}).as_artfile_fields()
+            except ValueError as e:
+                _logger.warning(f"Ignoring invalid SAUCE record: {path=}, {name=}, {e=}")
+                fields = Sauce({}).as_artfile_fields()
+
+            fields["is_fileid"] = name.lower() == "file_id.diz"
+            localfile = LocalArtFile(name=name, data=data, fields=fields)
+
+            artfile = ArtFile(name=name, **fields)
+            if render and is_renderable(artfile):
+                try:
+                    localfile.image_x1, localfile.image_tn = render_pngs(
+                        data, **get_render_options(artfile)
+                    )
+                except Exception as e:
+                    _logger.warning(f"Failed to render file: {path=}, {name=}, {e=}")
+
+            files.append(localfile)
+
+    return files
+
+
+class LocalPackImporter:
+    """
+    Import an art pack from a local zip file, without any network access.
+
+    Unlike the 16colo.rs importer, there is no artist/group/content metadata
+    available so the files are not tagged.
+    """
+
+    def __init__(self, path: str, year: int):
+        self.path = path
+        self.year = year
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.stats = ImportStats()
+
+    def process(self, files: list[LocalArtFile]) -> ArtPack:
+        pack = ArtPack.objects.filter(name=self.name).first()
+        if pack is None:
+            with open(self.path, "rb") as fp:
+                pack = ArtPack.objects.create(
+                    name=self.name,
+                    year=self.year,
+                    zip_file=File(fp, name=os.path.basename(self.path)),
                 )
-                tags.append(tag)
 
-            artfile.tags.set(tags)
+        existing = set(pack.artfiles.values_list("name", flat=True))
+        artfiles = [
+            self.build_artfile(pack, localfile)
+            for localfile in files
+            if localfile.name not in existing
+        ]
+
+        # Every file has been written to storage at this point, so the write
+        # transaction only covers the inserts.
+        with transaction.atomic():
+            ArtFile.objects.bulk_create(artfiles, batch_size=500)
+
+        ArtFile.objects.filter(pack=pack).refresh_sauce_tags()
+        ArtPack.objects.filter(pk=pack.pk).refresh_artfile_positions()
+        refresh_pack_facets(ArtPack.objects.filter(pk=pack.pk))
+        # The files are bulk inserted without signals
+        bump_generation(PAGE_CACHE_NAMESPACE)
+
+        self.stats.files = len(artfiles)
+        self.stats.bytes = sum(artfile.filesize for artfile in artfiles)
+        self.stats.finished = time.monotonic()
+        return pack
+
+    def build_artfile(self, pack: ArtPack, localfile: LocalArtFile) -> ArtFile:
+        artfile = ArtFile(
+            name=localfile.name,
+            pack=pack,
+            file_extension=os.path.splitext(localfile.name)[1].lower(),
+            filesize=len(localfile.data),
+            year=pack.year,
+            visible=pack.visible,
+            **localfile.fields,
+        )
+
+        # Write the files up front, so the insert transaction doesn't include any file I/O
+        self.save_file(artfile.raw_file, localfile.name, localfile.data)
+
+        image_name = f"{localfile.name}.png"
+        for prefix, data in (("image_x1", localfile.image_x1), ("image_tn", localfile.image_tn)):
+            if data is None:
+                continue
+
+            self.save_file(getattr(artfile, prefix), image_name, data)
+            with Image.open(io.BytesIO(data)) as image:
+                setattr(artfile, f"{prefix}_width", image.width)
+                setattr(artfile, f"{prefix}_height", image.height)
+
+        return artfile
+
+    def save_file(self, fieldfile: FieldFile, filename: str, data: bytes) -> None:
+        name = fieldfile.field.generate_filename(fieldfile.instance, filename)
+        fieldfile.name = fieldfile.storage.save(
+            name, ContentFile(data), max_length=fieldfile.field.max_length
+        )
+
+
+def find_local_packs(path: str, year: int | None = None) -> list[tuple[str, int]]:
+    """
+    Find pack zip files at the given path, which can be a single zip or a
+    directory laid out like the 16colo.rs archive (<year>/<pack>.zip).
+    """
+    if os.path.isfile(path):
+        paths = [path]
+    else:
+        paths = sorted(
+            os.path.join(dirpath, filename)
+            for dirpath, _, filenames in os.walk(path)
+            for filename in filenames
+            if filename.lower().endswith(".zip")
+        )
+
+    packs = []
+    for zip_path in paths:
+        dirname = os.path.basename(os.path.dirname(os.path.abspath(zip_path)))
+        pack_year = year or (int(dirname) if dirname.isdigit() else None)
+        if pack_year is None:
+            _logger.warning(f"Skipping pack with unknown year: {zip_path}")
+            continue
+        packs.append((zip_path, pack_year))
+
+    return packs
+
+
+def import_local_packs(
+    packs: list[tuple[str, int]],
+    workers: int = 1,
+    render: bool = True,
+) -> Iterator[LocalPackImporter]:
+    """
+    Import local pack zip files, yielding each importer as it finishes.
+
+    Reading, SAUCE parsing and rendering are spread across a process pool,
+    while the storage and database writes happen in the calling process.
+    """
+    packs = [
+        (path, year)
+        for path, year in packs
+        if os.path.splitext(os.path.basename(path))[0] not in BLACKLIST
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(read_local_pack, path, render): (path, year) for path, year in packs
+        }
+        for future in as_completed(futures):
+            path, year = futures[future]
+            importer = LocalPackImporter(path, year)
+            try:
+                files = future.result()
+                importer.process(files)
+            except Exception as e:
+                _logger.warning(f"Failed to import local pack: {path=}, {e=}")
+                importer.stats.failed += 1
+            yield importer
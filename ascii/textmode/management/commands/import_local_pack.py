@@ -0,0 +1,38 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ascii.textmode.facets import refresh_global_facets
+from ascii.textmode.loaders import find_local_packs, import_local_packs
+
+
+class Command(BaseCommand):
+    help = "Import art packs from a local zip file, or a directory mirroring the 16colo.rs archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=str, help="A pack zip file, or a directory of zip files")
+        parser.add_argument(
+            "--year",
+            type=int,
+            help="Pack year, by default this is taken from the parent directory name",
+        )
+        parser.add_argument("--workers", type=int, default=os.cpu_count())
+        parser.add_argument("--no-render", action="store_false", dest="render")
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options["path"]):
+            raise CommandError(f"Path '{options['path']}' does not exist.")
+
+        packs = find_local_packs(options["path"], options["year"])
+        self.stdout.write(f"Importing {len(packs)} packs ...")
+
+        importers = import_local_packs(
+            packs,
+            workers=options["workers"],
+            render=options["render"],
+        )
+        for importer in importers:
+            self.stdout.write(f"{importer.name}: {importer.stats}")
+
+        refresh_global_facets()
+        self.stdout.write("Import finished")
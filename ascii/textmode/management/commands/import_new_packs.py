@@ -3,23 +3,38 @@ from datetime import datetime
 from django.core.management.base import BaseCommand
 
 from ascii.textmode.clients import SixteenColorsClient
-from ascii.textmode.loaders import SixteenColorsPackImporter
+from ascii.textmode.facets import refresh_global_facets
+from ascii.textmode.loaders import import_packs
 
 
 class Command(BaseCommand):
     help = "Import all new packs from https://16colo.rs"
 
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Files per pack")
+        parser.add_argument("--pack-workers", type=int, default=2, help="Concurrent packs")
+        parser.add_argument(
+            "--no-archive",
+            action="store_false",
+            dest="archive_first",
+            help="Download every file over HTTP instead of reading from the pack archive",
+        )
+
     def handle(self, *args, **options):
         now = datetime.now()
 
         client = SixteenColorsClient()
         data = client.get_year(now.year)
-        for pack_data in data:
-            importer = SixteenColorsPackImporter(
-                pack_data["name"],
-                skip_tags=False,
-                skip_existing=True,
-            )
-            importer.process()
+        importers = import_packs(
+            [pack_data["name"] for pack_data in data],
+            pack_workers=options["pack_workers"],
+            skip_tags=False,
+            skip_existing=True,
+            workers=options["workers"],
+            archive_first=options["archive_first"],
+        )
+        for importer in importers:
+            self.stdout.write(f"{importer.name}: {importer.stats}")
 
+        refresh_global_facets()
         self.stdout.write("Import finished")
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 
+from ascii.textmode.facets import refresh_global_facets
 from ascii.textmode.loaders import SixteenColorsPackImporter
 
 
@@ -9,8 +10,21 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument("name", type=str, help="The name of the pack")
         parser.add_argument("--skip-tags", action="store_true", default=False)
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument(
+            "--no-archive",
+            action="store_false",
+            dest="archive_first",
+            help="Download every file over HTTP instead of reading from the pack archive",
+        )
 
     def handle(self, *args, **options):
-        importer = SixteenColorsPackImporter(options["name"], options["skip_tags"])
+        importer = SixteenColorsPackImporter(
+            options["name"],
+            options["skip_tags"],
+            workers=options["workers"],
+            archive_first=options["archive_first"],
+        )
         pack = importer.process()
-        self.stdout.write(f"Import finished: {pack}")
+        refresh_global_facets()
+        self.stdout.write(f"Import finished: {pack}, {importer.stats}")
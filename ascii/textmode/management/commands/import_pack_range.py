@@ -1,7 +1,8 @@
 from django.core.management.base import BaseCommand
 
 from ascii.textmode.clients import SixteenColorsClient
-from ascii.textmode.loaders import SixteenColorsPackImporter
+from ascii.textmode.facets import refresh_global_facets
+from ascii.textmode.loaders import import_packs
 
 
 class Command(BaseCommand):
@@ -11,13 +12,28 @@ class Command(BaseCommand):
         parser.add_argument("min_year", type=int)
         parser.add_argument("max_year", type=int)
         parser.add_argument("--skip-tags", action="store_true", default=False)
+        parser.add_argument("--workers", type=int, default=4, help="Files per pack")
+        parser.add_argument("--pack-workers", type=int, default=2, help="Concurrent packs")
+        parser.add_argument(
+            "--no-archive",
+            action="store_false",
+            dest="archive_first",
+            help="Download every file over HTTP instead of reading from the pack archive",
+        )
 
     def handle(self, *args, **options):
         for year in range(options["min_year"], options["max_year"] + 1):
             client = SixteenColorsClient()
             data = client.get_year(year)
-            for pack_data in data:
-                importer = SixteenColorsPackImporter(pack_data["name"], options["skip_tags"])
-                importer.process()
+            importers = import_packs(
+                [pack_data["name"] for pack_data in data],
+                pack_workers=options["pack_workers"],
+                skip_tags=options["skip_tags"],
+                workers=options["workers"],
+                archive_first=options["archive_first"],
+            )
+            for importer in importers:
+                self.stdout.write(f"{importer.name}: {importer.stats}")
 
+        refresh_global_facets()
         self.stdout.write("Import finished")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ascii.textmode.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ArtFile full-text search index"
+
+    def handle(self, *args, **options):
+        count = rebuild_search_index()
+        self.stdout.write(f"Indexed {count} files")
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from ascii.core.cache import bump_generation
+from ascii.textmode.constants import PAGE_CACHE_NAMESPACE
+from ascii.textmode.models import ArtFile
+
+
+class Command(BaseCommand):
+    help = "Recompute the pack year/visible and SAUCE tag links stored on each ArtFile"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pack", action="append", default=[])
+
+    def handle(self, *args, **options):
+        artfiles = ArtFile.objects.all()
+        if options["pack"]:
+            artfiles = artfiles.filter(pack__name__in=options["pack"])
+
+        count = artfiles.refresh_pack_fields()
+        self.stdout.write(f"Refreshed pack fields for {count} files")
+
+        count = artfiles.refresh_sauce_tags()
+        self.stdout.write(f"Refreshed SAUCE tags for {count} files")
+
+        bump_generation(PAGE_CACHE_NAMESPACE)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from ascii.core.cache import bump_generation
+from ascii.textmode.constants import PAGE_CACHE_NAMESPACE
+from ascii.textmode.facets import refresh_global_facets, refresh_pack_facets
+from ascii.textmode.models import ArtPack
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed search/filter facets for all packs"
+
+    def handle(self, *args, **options):
+        count = refresh_pack_facets(ArtPack.objects.all())
+        self.stdout.write(f"Refreshed facets for {count} packs")
+
+        refresh_global_facets()
+        self.stdout.write("Refreshed global facets")
+
+        bump_generation(PAGE_CACHE_NAMESPACE)
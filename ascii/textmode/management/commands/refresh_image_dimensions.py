@@ -0,0 +1,58 @@
+from django.core.files.images import get_image_dimensions
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from ascii.textmode.models import ArtFile
+
+
+class Command(BaseCommand):
+    help = "Backfill the stored width/height columns for ArtFile images"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", default=False)
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        qs = ArtFile.objects.filter(Q(image_tn__gt="") | Q(image_x1__gt=""))
+        if not options["all"]:
+            qs = qs.filter(
+                Q(image_tn_width__isnull=True, image_tn__gt="")
+                | Q(image_x1_width__isnull=True, image_x1__gt="")
+            )
+
+        # Read the names directly so that loading the rows doesn't trigger the
+        # ImageField post_init hook, which would open the files a second time.
+        rows = qs.order_by("id").values_list("id", "image_tn", "image_x1")
+
+        storage = ArtFile._meta.get_field("image_tn").storage
+        batch: list[ArtFile] = []
+        count = 0
+        for pk, image_tn, image_x1 in rows.iterator(chunk_size=options["batch_size"]):
+            artfile = ArtFile(id=pk)
+            for name, prefix in ((image_tn, "image_tn"), (image_x1, "image_x1")):
+                width, height = None, None
+                if name:
+                    try:
+                        with storage.open(name, "rb") as fp:
+                            width, height = get_image_dimensions(fp)
+                    except Exception as e:
+                        self.stderr.write(f"Failed to read {name}: {e}")
+
+                setattr(artfile, f"{prefix}_width", width)
+                setattr(artfile, f"{prefix}_height", height)
+
+            batch.append(artfile)
+            if len(batch) >= options["batch_size"]:
+                count += self.flush(batch)
+
+        count += self.flush(batch)
+        self.stdout.write(f"Updated image dimensions for {count} files")
+
+    def flush(self, batch: list[ArtFile]) -> int:
+        ArtFile.objects.bulk_update(
+            batch,
+            fields=["image_tn_width", "image_tn_height", "image_x1_width", "image_x1_height"],
+        )
+        count = len(batch)
+        batch.clear()
+        return count
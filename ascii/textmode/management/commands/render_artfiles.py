@@ -0,0 +1,65 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from ascii.textmode.models import ArtFile
+from ascii.textmode.render import (
+    get_render_options,
+    is_renderable,
+    render_pngs,
+    save_artfile_images,
+)
+
+
+def _render(args: tuple[bytes, dict]) -> tuple[bytes, bytes] | Exception:
+    data, options = args
+    try:
+        return render_pngs(data, **options)
+    except Exception as e:
+        return e
+
+
+class Command(BaseCommand):
+    help = "Render thumbnail and x1 images for ANSI/ASCII files using the local renderer"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pack", action="append", default=[])
+        parser.add_argument("--all", action="store_true", default=False)
+        parser.add_argument("--workers", type=int, default=os.cpu_count())
+        parser.add_argument("--batch-size", type=int, default=100)
+
+    def handle(self, *args, **options):
+        qs = ArtFile.objects.select_related("pack").order_by("id")
+        if options["pack"]:
+            qs = qs.filter(pack__name__in=options["pack"])
+        if not options["all"]:
+            qs = qs.filter(image_x1="")
+
+        artfiles = [artfile for artfile in qs.iterator() if is_renderable(artfile)]
+        self.stdout.write(f"Rendering {len(artfiles)} files ...")
+
+        count = 0
+        batch_size = options["batch_size"]
+        with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+            for start in range(0, len(artfiles), batch_size):
+                batch = artfiles[start : start + batch_size]
+
+                # File I/O and database access stay in the main process, the
+                # workers only see raw bytes and the SAUCE render options.
+                jobs = []
+                for artfile in batch:
+                    with artfile.raw_file.open("rb") as fp:
+                        jobs.append((fp.read(), get_render_options(artfile)))
+
+                for artfile, result in zip(batch, executor.map(_render, jobs), strict=True):
+                    if isinstance(result, Exception):
+                        self.stderr.write(f"Failed to render {artfile}: {result}")
+                        continue
+
+                    save_artfile_images(artfile, *result)
+                    count += 1
+
+                self.stdout.write(f"Rendered {count} files")
+
+        self.stdout.write("Render finished")
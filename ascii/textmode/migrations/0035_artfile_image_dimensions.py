@@ -0,0 +1,59 @@
+# Generated by Django 5.2.10 on 2026-10-18 13:04
+
+import ascii.textmode.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("textmode", "0034_artfile_is_internal"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="artfile",
+            name="image_tn_height",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="artfile",
+            name="image_tn_width",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="artfile",
+            name="image_x1_height",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="artfile",
+            name="image_x1_width",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="artfile",
+            name="image_tn",
+            field=models.ImageField(
+                blank=True,
+                height_field="image_tn_height",
+                max_length=130,
+                null=True,
+                upload_to=ascii.textmode.models.upload_to_tn,
+                verbose_name="Image (thumbnail)",
+                width_field="image_tn_width",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="artfile",
+            name="image_x1",
+            field=models.ImageField(
+                blank=True,
+                height_field="image_x1_height",
+                max_length=130,
+                null=True,
+                upload_to=ascii.textmode.models.upload_to_x1,
+                verbose_name="Image (x1)",
+                width_field="image_x1_width",
+            ),
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.10 on 2026-10-18 13:30
+
+from django.db import migrations
+
+# Index the artfiles with alias ``a`` matching the given WHERE clause.
+INDEX = """
+INSERT INTO textmode_artfile_fts (rowid, name, title, author, "group", comments, tags)
+SELECT a.id, a.name, a.title, a.author, a."group", a.comments, (
+    SELECT COALESCE(GROUP_CONCAT(t.name, ' '), '')
+    FROM textmode_artfiletag t
+    INNER JOIN textmode_artfile_tags m ON m.artfiletag_id = t.id
+    WHERE m.artfile_id = a.id
+)
+FROM textmode_artfile a
+WHERE {where};
+"""
+
+# FTS5 doesn't honor INSERT OR REPLACE inside of a trigger, so delete first.
+REINDEX = (
+    """
+DELETE FROM textmode_artfile_fts
+WHERE rowid IN (SELECT a.id FROM textmode_artfile a WHERE {where});
+"""
+    + INDEX
+)
+
+TAGGED_ARTFILES = """
+a.id IN (SELECT artfile_id FROM textmode_artfile_tags WHERE artfiletag_id = new.id)
+"""
+
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE textmode_artfile_fts USING fts5(
+        name,
+        title,
+        author,
+        "group",
+        comments,
+        tags,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    );
+    """,
+    f"""
+    CREATE TRIGGER textmode_artfile_fts_insert AFTER INSERT ON textmode_artfile BEGIN
+        {REINDEX.format(where="a.id = new.id")}
+    END;
+    """,
+    f"""
+    CREATE TRIGGER textmode_artfile_fts_update
+    AFTER UPDATE OF name, title, author, "group", comments ON textmode_artfile BEGIN
+        {REINDEX.format(where="a.id = new.id")}
+    END;
+    """,
+    """
+    CREATE TRIGGER textmode_artfile_fts_delete AFTER DELETE ON textmode_artfile BEGIN
+        DELETE FROM textmode_artfile_fts WHERE rowid = old.id;
+    END;
+    """,
+    f"""
+    CREATE TRIGGER textmode_artfile_tags_fts_insert AFTER INSERT ON textmode_artfile_tags BEGIN
+        {REINDEX.format(where="a.id = new.artfile_id")}
+    END;
+    """,
+    f"""
+    CREATE TRIGGER textmode_artfile_tags_fts_delete AFTER DELETE ON textmode_artfile_tags BEGIN
+        {REINDEX.format(where="a.id = old.artfile_id")}
+    END;
+    """,
+    f"""
+    CREATE TRIGGER textmode_artfiletag_fts_update AFTER UPDATE OF name ON textmode_artfiletag BEGIN
+        {REINDEX.format(where=TAGGED_ARTFILES)}
+    END;
+    """,
+    INDEX.format(where="1"),
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS textmode_artfiletag_fts_update;",
+    "DROP TRIGGER IF EXISTS textmode_artfile_tags_fts_delete;",
+    "DROP TRIGGER IF EXISTS textmode_artfile_tags_fts_insert;",
+    "DROP TRIGGER IF EXISTS textmode_artfile_fts_delete;",
+    "DROP TRIGGER IF EXISTS textmode_artfile_fts_update;",
+    "DROP TRIGGER IF EXISTS textmode_artfile_fts_insert;",
+    "DROP TABLE IF EXISTS textmode_artfile_fts;",
+]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("textmode", "0035_artfile_image_dimensions"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SQL, DROP_SQL),  # type: ignore[arg-type]
+    ]
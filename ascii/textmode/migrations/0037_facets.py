@@ -0,0 +1,34 @@
+# Generated by Django 5.2.10 on 2026-10-18 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("textmode", "0036_artfile_fts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogFacet",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("key", models.CharField(max_length=50, unique=True)),
+                ("values", models.JSONField(default=list)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.AddField(
+            model_name="artpack",
+            name="facets",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
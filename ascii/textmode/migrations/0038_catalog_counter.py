@@ -0,0 +1,64 @@
+# Generated by Django 5.2.10 on 2026-10-18 13:30
+
+from django.db import migrations, models
+
+BUMP = "UPDATE textmode_catalogcounter SET value = value + 1 WHERE key = '{key}';"
+
+# Fields that the search posting index reads, see ascii.textmode.postings
+ARTFILE_FIELDS = """
+name, pack_id, file_extension, filesize, number_of_lines, character_width,
+ice_colors, letter_spacing, aspect_ratio, font_name, is_joint
+"""
+
+# (name, event, table, counter key)
+TRIGGERS = [
+    ("artfile_insert", "AFTER INSERT", "textmode_artfile", "added"),
+    ("artfile_update", f"AFTER UPDATE OF {ARTFILE_FIELDS}", "textmode_artfile", "changed"),
+    ("artfile_delete", "AFTER DELETE", "textmode_artfile", "changed"),
+    ("artfile_tags_insert", "AFTER INSERT", "textmode_artfile_tags", "added"),
+    ("artfile_tags_delete", "AFTER DELETE", "textmode_artfile_tags", "changed"),
+    ("artpack_update", "AFTER UPDATE OF year, visible", "textmode_artpack", "changed"),
+]
+
+CREATE_SQL = [
+    "INSERT INTO textmode_catalogcounter (key, value) VALUES ('added', 0), ('changed', 0);",
+    *(
+        f"""
+        CREATE TRIGGER textmode_counter_{name} {event} ON {table} BEGIN
+            {BUMP.format(key=key)}
+        END;
+        """
+        for name, event, table, key in TRIGGERS
+    ),
+]
+
+DROP_SQL = [
+    *(f"DROP TRIGGER IF EXISTS textmode_counter_{name};" for name, *_ in TRIGGERS),
+    "DELETE FROM textmode_catalogcounter;",
+]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("textmode", "0037_facets"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("key", models.CharField(max_length=50, unique=True)),
+                ("value", models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.RunSQL(CREATE_SQL, DROP_SQL),  # type: ignore[arg-type]
+    ]
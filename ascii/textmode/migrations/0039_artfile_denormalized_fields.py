@@ -0,0 +1,119 @@
+# Generated by Django 5.2.10 on 2026-10-18 13:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Adding NOT NULL columns or foreign keys through the schema editor rebuilds
+# the table on SQLite, which would drop the triggers from 0036 and 0038.
+COLUMNS = [
+    ("visible", "bool NOT NULL DEFAULT 1", "textmode_artfile_visible_9e371156"),
+    ("year", "integer NOT NULL DEFAULT 0", "textmode_artfile_year_eea55bfb"),
+    ("author_tag_id", "bigint NULL", "textmode_artfile_author_tag_id_ba473cad"),
+    ("group_tag_id", "bigint NULL", "textmode_artfile_group_tag_id_d665e09e"),
+    ("title_tag_id", "bigint NULL", "textmode_artfile_title_tag_id_f0376551"),
+]
+
+ADD_COLUMNS_SQL = [
+    *(f'ALTER TABLE "textmode_artfile" ADD COLUMN "{name}" {sql};' for name, sql, _ in COLUMNS),
+    *(f'CREATE INDEX "{index}" ON "textmode_artfile" ("{name}");' for name, _, index in COLUMNS),
+]
+
+DROP_COLUMNS_SQL = [
+    *(f'DROP INDEX "{index}";' for _, _, index in COLUMNS),
+    *(f'ALTER TABLE "textmode_artfile" DROP COLUMN "{name}";' for name, _, _ in COLUMNS),
+]
+
+SAUCE_TAG = """
+(
+    SELECT t.id FROM textmode_artfiletag t
+    WHERE t.category = '{category}' AND t.name = LOWER(textmode_artfile."{field}")
+    LIMIT 1
+)
+"""
+
+BACKFILL_SQL = f"""
+UPDATE textmode_artfile SET
+    year = (SELECT p.year FROM textmode_artpack p WHERE p.id = pack_id),
+    visible = (SELECT p.visible FROM textmode_artpack p WHERE p.id = pack_id),
+    author_tag_id = {SAUCE_TAG.format(category="artist", field="author")},
+    group_tag_id = {SAUCE_TAG.format(category="group", field="group")},
+    title_tag_id = {SAUCE_TAG.format(category="content", field="title")};
+"""
+
+# The search posting index reads year and visible from the artfile now
+COUNTER_TRIGGER_SQL = """
+CREATE TRIGGER textmode_counter_artfile_update
+AFTER UPDATE OF
+    name, pack_id, file_extension, filesize, number_of_lines, character_width,
+    ice_colors, letter_spacing, aspect_ratio, font_name, is_joint{extra}
+ON textmode_artfile BEGIN
+    UPDATE textmode_catalogcounter SET value = value + 1 WHERE key = 'changed';
+END;
+"""
+
+FORWARD_SQL = [
+    *ADD_COLUMNS_SQL,
+    BACKFILL_SQL,
+    "DROP TRIGGER IF EXISTS textmode_counter_artfile_update;",
+    COUNTER_TRIGGER_SQL.format(extra=", year, visible"),
+]
+
+BACKWARD_SQL = [
+    "DROP TRIGGER IF EXISTS textmode_counter_artfile_update;",
+    COUNTER_TRIGGER_SQL.format(extra=""),
+    *DROP_COLUMNS_SQL,
+]
+
+
+def tag_field():
+    return models.ForeignKey(
+        blank=True,
+        db_constraint=False,
+        editable=False,
+        null=True,
+        on_delete=django.db.models.deletion.SET_NULL,
+        related_name="+",
+        to="textmode.artfiletag",
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("textmode", "0038_catalog_counter"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(FORWARD_SQL, BACKWARD_SQL),  # type: ignore[arg-type]
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name="artfile",
+                    name="author_tag",
+                    field=tag_field(),
+                ),
+                migrations.AddField(
+                    model_name="artfile",
+                    name="group_tag",
+                    field=tag_field(),
+                ),
+                migrations.AddField(
+                    model_name="artfile",
+                    name="title_tag",
+                    field=tag_field(),
+                ),
+                migrations.AddField(
+                    model_name="artfile",
+                    name="visible",
+                    field=models.BooleanField(db_index=True, default=True, editable=False),
+                ),
+                migrations.AddField(
+                    model_name="artfile",
+                    name="year",
+                    field=models.IntegerField(db_index=True, default=0, editable=False),
+                    preserve_default=False,
+                ),
+            ],
+        ),
+    ]
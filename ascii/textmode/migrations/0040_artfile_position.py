@@ -0,0 +1,31 @@
+# Generated by Django 5.2.10 on 2026-10-18 13:38
+
+from django.db import migrations, models
+
+BACKFILL_SQL = """
+UPDATE textmode_artfile SET position = ranked.position
+FROM (
+    SELECT id, ROW_NUMBER() OVER (PARTITION BY pack_id ORDER BY name, id) AS position
+    FROM textmode_artfile
+) AS ranked
+WHERE textmode_artfile.id = ranked.id;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("textmode", "0039_artfile_denormalized_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="artfile",
+            name="position",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="artfile",
+            index=models.Index(fields=["pack", "position"], name="artfile_pack_position"),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.10 on 2026-10-18 19:10
+
+from django.db import migrations
+
+BUMP = "UPDATE textmode_catalogcounter SET value = value + 1 WHERE key = 'changed';"
+
+# Fields that the search posting index reads, see ascii.textmode.postings
+ARTFILE_FIELDS = [
+    "name",
+    "pack_id",
+    "file_extension",
+    "filesize",
+    "number_of_lines",
+    "character_width",
+    "ice_colors",
+    "letter_spacing",
+    "aspect_ratio",
+    "font_name",
+    "is_joint",
+    "year",
+    "visible",
+]
+ARTPACK_FIELDS = ["year", "visible"]
+
+# (name, table, fields)
+TRIGGERS = [
+    ("artfile_update", "textmode_artfile", ARTFILE_FIELDS),
+    ("artpack_update", "textmode_artpack", ARTPACK_FIELDS),
+]
+
+
+def create_trigger(name: str, table: str, fields: list[str], when: bool) -> str:
+    # Django's save() writes every column, so without the WHEN clause a save
+    # that doesn't change anything still forces a full rebuild of the index.
+    condition = " OR ".join(f"OLD.{field} IS NOT NEW.{field}" for field in fields)
+    return f"""
+    CREATE TRIGGER textmode_counter_{name}
+    AFTER UPDATE OF {", ".join(fields)} ON {table}
+    {f"WHEN {condition}" if when else ""}
+    BEGIN
+        {BUMP}
+    END;
+    """
+
+
+FORWARD_SQL = [
+    *(f"DROP TRIGGER IF EXISTS textmode_counter_{name};" for name, _, _ in TRIGGERS),
+    *(create_trigger(name, table, fields, when=True) for name, table, fields in TRIGGERS),
+]
+
+BACKWARD_SQL = [
+    *(f"DROP TRIGGER IF EXISTS textmode_counter_{name};" for name, _, _ in TRIGGERS),
+    *(create_trigger(name, table, fields, when=False) for name, table, fields in TRIGGERS),
+]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("textmode", "0040_artfile_position"),
+    ]
+
+    operations = [
+        migrations.RunSQL(FORWARD_SQL, BACKWARD_SQL),  # type: ignore[arg-type]
+    ]
@@ -7,13 +7,17 @@ from typing import cast
 from urllib.parse import quote
 
 from django.db import models
-from django.db.models import Count, Exists, Manager, OuterRef, Prefetch
+from django.db.models import Count, Exists, Func, Manager, OuterRef, Prefetch, Q, Subquery
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThan
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.crypto import get_random_string
 from django.utils.html import format_html
 
 from ascii.core.models import BaseModel
+from ascii.core.positions import get_neighbors, refresh_positions
 from ascii.textmode.choices import (
     AspectRatio,
     DataType,
@@ -22,11 +26,20 @@ from ascii.textmode.choices import (
     TagCategory,
 )
 from ascii.textmode.constants import AUDIO_MIMETYPES, VIDEO_MIMETYPES
+from ascii.textmode.search import FTS_TABLE, build_match_query
 
 # https://stackoverflow.com/a/67857443
 ALT_SLASH = "%2F"
 
 
+# The tag category that each SAUCE field links to, see ArtFile.author_tag, etc.
+SAUCE_TAG_FIELDS = {
+    "author": TagCategory.ARTIST,
+    "group": TagCategory.GROUP,
+    "title": TagCategory.CONTENT,
+}
+
+
 class ArtFileTagQuerySet(models.QuerySet):
     def visible(self) -> ArtFileTagQuerySet:
         return self.filter(artfile_count__gt=0)
@@ -54,6 +67,36 @@ class ArtFileTagQuerySet(models.QuerySet):
         )
         return qs
 
+    def get_or_create_many(self, keys: set[tuple[str, str]]) -> dict[tuple[str, str], ArtFileTag]:
+        """
+        Resolve (category, name) pairs to tags with one lookup query, and
+        bulk-create the ones that don't exist yet.
+        """
+        if not keys:
+            return {}
+
+        query = Q()
+        for category in {category for category, _ in keys}:
+            names = [name for c, name in keys if c == category]
+            query |= Q(category=category, name__in=names)
+
+        tags = {(tag.category, tag.name): tag for tag in self.filter(query)}
+        missing = [ArtFileTag(category=c, name=n) for c, n in sorted(keys - tags.keys())]
+        for tag in self.bulk_create(missing):
+            tags[(tag.category, tag.name)] = tag
+
+        return tags
+
+    def refresh_artfile_count(self) -> int:
+        """
+        Recompute artfile_count for every tag in the queryset in a single UPDATE.
+        """
+        # A plain COUNT() function instead of the Count aggregate, so that
+        # no GROUP BY gets added to the correlated subquery.
+        through = ArtFile.tags.through.objects.filter(artfiletag_id=OuterRef("pk"))
+        count = through.values(count=Func("id", function="COUNT"))
+        return self.update(artfile_count=Coalesce(Subquery(count), 0))
+
 
 ArtFileTagManager = Manager.from_queryset(ArtFileTagQuerySet)  # noqa
 
@@ -109,6 +152,13 @@ class ArtPackQuerySet(models.QuerySet):
     def list_years(self) -> list[int]:
         return list(self.order_by("year").values_list("year", flat=True).distinct())
 
+    def refresh_artfile_positions(self) -> int:
+        """
+        Renumber the files in each of the packs by name, used for prev/next navigation.
+        """
+        artfiles = ArtFile.objects.filter(pack__in=self.values("pk"))
+        return refresh_positions(artfiles, ["name", "id"], partition_by="pack_id")
+
 
 ArtPackManager = Manager.from_queryset(ArtPackQuerySet)  # noqa
 
@@ -128,6 +178,8 @@ class ArtPack(BaseModel):
         null=True,
         blank=True,
     )
+    # Precomputed filter sidebar counts, see ascii.textmode.facets
+    facets = models.JSONField(blank=True, default=dict, editable=False)
 
     objects = ArtPackManager()
 
@@ -147,6 +199,18 @@ class ArtPack(BaseModel):
 
 
 class ArtFileQuerySet(models.QuerySet):
+    def refresh_is_joint(self) -> int:
+        """
+        Recompute is_joint (more than one artist tag) for every file in the queryset in a
+        single UPDATE.
+        """
+        artists = ArtFile.tags.through.objects.filter(
+            artfile_id=OuterRef("pk"),
+            artfiletag__category=TagCategory.ARTIST,
+        )
+        count = artists.values(count=Func("id", function="COUNT"))
+        return self.update(is_joint=GreaterThan(Coalesce(Subquery(count), 0), 1))
+
     def not_tagged(self, category: TagCategory) -> ArtFileQuerySet:
         """
         Return files that do not contain a tag within the given category.
@@ -190,13 +254,78 @@ class ArtFileQuerySet(models.QuerySet):
         )
 
     def years(self) -> list[int]:
-        return list(self.order_by("pack__year").values_list("pack__year", flat=True).distinct())
+        return list(self.order_by("year").values_list("year", flat=True).distinct())
+
+    def refresh_pack_fields(self) -> int:
+        """
+        Copy the year and visible flag from each file's pack, in a single UPDATE.
+        """
+        packs = ArtPack.objects.filter(pk=OuterRef("pack_id"))
+        return self.update(
+            year=Subquery(packs.values("year")),
+            visible=Subquery(packs.values("visible")),
+        )
+
+    def refresh_sauce_tags(self) -> int:
+        """
+        Link each file to the artist, group and content tags matching its SAUCE
+        author, group and title. Returns the number of links that changed.
+
+        The names are lowercased in Python, because SQLite's LOWER() only
+        folds ASCII characters. Only the files whose links changed are
+        written, with an UPDATE per tag.
+        """
+        fields = list(SAUCE_TAG_FIELDS)
+        rows = list(self.values_list("pk", *fields, *(f"{field}_tag" for field in fields)))
+
+        names = {value.lower() for row in rows for value in row[1 : len(fields) + 1] if value}
+        tag_ids: dict[tuple[str, str], int] = {}
+        names_list = sorted(names)
+        for i in range(0, len(names_list), 500):
+            tags = ArtFileTag.objects.filter(
+                category__in=SAUCE_TAG_FIELDS.values(), name__in=names_list[i : i + 500]
+            )
+            for pk, category, name in tags.values_list("pk", "category", "name"):
+                tag_ids[(category, name)] = pk
+
+        changes: dict[tuple[str, int | None], list[int]] = {}
+        for pk, *values in rows:
+            for i, (field, category) in enumerate(SAUCE_TAG_FIELDS.items()):
+                value, current = values[i], values[len(fields) + i]
+                tag_id = tag_ids.get((category, value.lower())) if value else None
+                if tag_id != current:
+                    changes.setdefault((field, tag_id), []).append(pk)
+
+        count = 0
+        for (field, tag_id), pks in changes.items():
+            for i in range(0, len(pks), 500):
+                artfiles = ArtFile.objects.filter(pk__in=pks[i : i + 500])
+                count += artfiles.update(**{f"{field}_tag": tag_id})
+
+        return count
 
     def search(self, text: str) -> ArtFileQuerySet:
+        """
+        Full-text search over the file name, SAUCE fields and tag names.
+
+        Results are ordered by relevance, callers can still apply their own
+        order_by() afterwards.
+        """
         if not text:
             return self
 
-        return self.filter(name__icontains=text)
+        query = build_match_query(text)
+        if not query:
+            return self.none()
+
+        match_sql = f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+        rank_sql = (
+            f"SELECT rank FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = {ArtFile._meta.db_table}.id"
+        )
+        qs = self.filter(id__in=RawSQL(match_sql, [query]))
+        qs = qs.annotate(search_rank=RawSQL(rank_sql, [query]))
+        return qs.order_by("search_rank", "id")
 
     def ansi(self) -> ArtFileQuerySet:
         return self.filter(file_extension=".ans")
@@ -205,7 +334,7 @@ class ArtFileQuerySet(models.QuerySet):
         return self.filter(image_tn__isnull=False).distinct()[:4]
 
     def visible(self) -> ArtFileQuerySet:
-        return self.filter(pack__visible=True)
+        return self.filter(visible=True)
 
 
 ArtFileManager = Manager.from_queryset(ArtFileQuerySet)  # noqa
@@ -242,14 +371,22 @@ class ArtFile(BaseModel):
         null=True,
         blank=True,
         max_length=130,
+        width_field="image_tn_width",
+        height_field="image_tn_height",
     )
+    image_tn_width = models.PositiveIntegerField(blank=True, null=True)
+    image_tn_height = models.PositiveIntegerField(blank=True, null=True)
     image_x1 = models.ImageField(
         verbose_name="Image (x1)",
         upload_to=upload_to_x1,
         null=True,
         blank=True,
         max_length=130,
+        width_field="image_x1_width",
+        height_field="image_x1_height",
     )
+    image_x1_width = models.PositiveIntegerField(blank=True, null=True)
+    image_x1_height = models.PositiveIntegerField(blank=True, null=True)
 
     tags = models.ManyToManyField(ArtFileTag, blank=True, related_name="artfiles")
     sauce_data = models.JSONField(blank=True, default=dict)
@@ -291,6 +428,45 @@ class ArtFile(BaseModel):
     font_name = models.CharField(max_length=50, blank=True, db_index=True)
     is_joint = models.BooleanField(default=False, db_index=True)
 
+    # Copied from the pack on save, and kept in sync by the ArtPack post_save signal
+    year = models.IntegerField(db_index=True, editable=False)
+    visible = models.BooleanField(default=True, db_index=True, editable=False)
+
+    # The tags matching the SAUCE fields, resolved on save (see resolve_sauce_tags)
+    # and when tags are added or renamed (see refresh_sauce_tags).
+    # Without a database constraint, so the columns can be dropped on SQLite
+    # without rebuilding the table and losing its triggers.
+    author_tag = models.ForeignKey(
+        ArtFileTag,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="+",
+        db_constraint=False,
+    )
+    group_tag = models.ForeignKey(
+        ArtFileTag,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="+",
+        db_constraint=False,
+    )
+    title_tag = models.ForeignKey(
+        ArtFileTag,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="+",
+        db_constraint=False,
+    )
+
+    # Index within the pack ordered by name, see ArtPackQuerySet.refresh_artfile_positions
+    position = models.PositiveIntegerField(blank=True, null=True, editable=False)
+
     objects = ArtFileManager()
 
     class Meta:
@@ -298,20 +474,49 @@ class ArtFile(BaseModel):
         constraints = [
             models.UniqueConstraint(fields=["name", "pack"], name="unique_artfile_name_pack"),
         ]
+        indexes = [
+            models.Index(fields=["pack", "position"], name="artfile_pack_position"),
+        ]
 
     def __str__(self):
         return self.name
 
     def save(self, *args, **kwargs):
         self.file_extension = os.path.splitext(self.name)[1].lower()
+        self.year = self.pack.year
+        self.visible = self.pack.visible
 
         if self.raw_file:
             self.file_size = self.raw_file.size
         else:
             self.file_size = 0
 
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or SAUCE_TAG_FIELDS.keys() & set(update_fields):
+            self.resolve_sauce_tags()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "author_tag", "group_tag", "title_tag"}
+
         super().save(*args, **kwargs)
 
+    def resolve_sauce_tags(self) -> None:
+        """
+        Link the tags matching the SAUCE author, group and title, with a
+        single lookup query.
+        """
+        query = Q()
+        for field, category in SAUCE_TAG_FIELDS.items():
+            if value := getattr(self, field):
+                query |= Q(category=category, name=value.lower())
+
+        tags = {}
+        if query:
+            tags = {(tag.category, tag.name): tag for tag in ArtFileTag.objects.filter(query)}
+
+        for field, category in SAUCE_TAG_FIELDS.items():
+            value = getattr(self, field)
+            setattr(self, f"{field}_tag", tags.get((category, value.lower())))
+
     @property
     def sixteencolors_url(self) -> str | None:
         if self.is_internal:
@@ -327,9 +532,20 @@ class ArtFile(BaseModel):
     def thumb_width(self) -> int:
         return 160
 
+    @property
+    def thumb_aspect_ratio(self) -> float:
+        """
+        Use the stored dimensions instead of image_tn.height / image_tn.width,
+        which would need to open and decode the image file on every access.
+        """
+        if not self.image_tn_width or not self.image_tn_height:
+            return 1.0
+
+        return self.image_tn_height / self.image_tn_width
+
     @property
     def thumb_height(self) -> int:
-        return min(int(self.thumb_width * (self.image_tn.height / self.image_tn.width)), 800)
+        return min(int(self.thumb_width * self.thumb_aspect_ratio), 800)
 
     @property
     def thumb_width_2x(self) -> int:
@@ -338,7 +554,16 @@ class ArtFile(BaseModel):
 
     @property
     def thumb_height_2x(self) -> int:
-        return min(int(self.thumb_width_2x * (self.image_tn.height / self.image_tn.width)), 800)
+        return min(int(self.thumb_width_2x * self.thumb_aspect_ratio), 800)
+
+    def get_neighbors(self) -> tuple[ArtFile | None, ArtFile | None]:
+        """
+        Return the previous and next files in the pack.
+        """
+        if self.position is None:
+            return self.get_prev(), self.get_next()
+
+        return get_neighbors(ArtFile.objects.filter(pack_id=self.pack_id), self.position)
 
     def get_next(self) -> ArtFile | None:
         qs = self.pack.artfiles.filter(name__gt=self.name)
@@ -348,39 +573,27 @@ class ArtFile(BaseModel):
         qs = self.pack.artfiles.filter(name__lt=self.name)
         return qs.order_by("-name").first()
 
-    def get_author_tag(self) -> ArtFileTag | None:
-        if not self.author:
-            return None
-
-        return ArtFileTag.objects.artists().filter(name=self.author.lower()).first()
-
-    def get_group_tag(self) -> ArtFileTag | None:
-        if not self.group:
-            return None
-
-        return ArtFileTag.objects.groups().filter(name=self.group.lower()).first()
-
-    def get_title_tag(self) -> ArtFileTag | None:
-        if not self.title:
-            return None
-
-        return ArtFileTag.objects.content().filter(name=self.title.lower()).first()
-
     def get_sauce_display(self) -> dict[str, str]:
         data: dict = {}
 
-        if title_tag := self.get_title_tag():
-            data["Title"] = format_html("<a href='{}'>{}</a>", title_tag.public_url, self.title)
+        if self.title and self.title_tag:
+            data["Title"] = format_html(
+                "<a href='{}'>{}</a>", self.title_tag.public_url, self.title
+            )
         elif self.title:
             data["Title"] = self.title
 
-        if author_tag := self.get_author_tag():
-            data["Author"] = format_html("<a href='{}'>{}</a>", author_tag.public_url, self.author)
+        if self.author and self.author_tag:
+            data["Author"] = format_html(
+                "<a href='{}'>{}</a>", self.author_tag.public_url, self.author
+            )
         elif self.author:
             data["Author"] = self.author
 
-        if group_tag := self.get_group_tag():
-            data["Group"] = format_html("<a href='{}'>{}</a>", group_tag.public_url, self.group)
+        if self.group and self.group_tag:
+            data["Group"] = format_html(
+                "<a href='{}'>{}</a>", self.group_tag.public_url, self.group
+            )
         elif self.group:
             data["Group"] = self.group
 
@@ -484,3 +697,36 @@ class ArtCollectionMapping(BaseModel):
 
     class Meta:
         ordering = ["order"]
+
+
+class CatalogFacet(BaseModel):
+    """
+    Precomputed choice lists for the search forms, see ascii.textmode.facets.
+    """
+
+    key = models.CharField(max_length=50, unique=True)
+    values = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.key
+
+
+class CatalogCounter(BaseModel):
+    """
+    Change counters for the catalog, bumped by database triggers (see
+    migration 0038) so they also cover bulk_create() and queryset.update().
+    """
+
+    ADDED = "added"
+    CHANGED = "changed"
+
+    key = models.CharField(max_length=50, unique=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}={self.value}"
+
+    @classmethod
+    def get_values(cls) -> dict[str, int]:
+        return dict(cls.objects.values_list("key", "value"))
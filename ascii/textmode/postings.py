@@ -0,0 +1,311 @@
+"""
+In-memory posting list index over visible ArtFiles, used by the advanced search.
+
+Every visible ArtFile gets a position in a sorted array of ids. Each filter
+value (a tag, an extension, a font name, a year...) maps to the array of
+positions that have it, so a multi-facet query is a handful of numpy mask
+operations instead of a chain of JOINs against the database.
+
+Each worker process keeps its own snapshot, or shares the one built at
+startup when gunicorn runs with --preload (see SEARCH_INDEX_PRELOAD). The
+snapshot is refreshed from the CatalogCounter rows: when only the "added"
+counter moved the new rows are appended, any other change triggers a full
+rebuild. Snapshots are never mutated once published, so concurrent requests
+can keep using the one they started with.
+"""
+
+from __future__ import annotations
+
+import logging
+import sys
+import threading
+import time
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field, replace
+from typing import Any
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Max
+
+from ascii.textmode.models import ArtFile, CatalogCounter
+
+_logger = logging.getLogger(__name__)
+
+# Stands in for NULL in the numeric columns, none of them can be negative
+NULL = -1
+
+# Filters that match on exact values, keyed by the ArtFile field name
+VALUE_FIELDS = [
+    "file_extension",
+    "font_name",
+    "ice_colors",
+    "letter_spacing",
+    "aspect_ratio",
+    "is_joint",
+    "pack_id",
+    "year",
+]
+
+# Columns that support range filters and ordering
+NUMERIC_FIELDS = ["year", "filesize", "number_of_lines", "character_width"]
+
+ROW_FIELDS = {
+    "id": "id",
+    "name": "name",
+    "pack_id": "pack_id",
+    "year": "year",
+    "file_extension": "file_extension",
+    "font_name": "font_name",
+    "ice_colors": "ice_colors",
+    "letter_spacing": "letter_spacing",
+    "aspect_ratio": "aspect_ratio",
+    "is_joint": "is_joint",
+    "filesize": "filesize",
+    "number_of_lines": "number_of_lines",
+    "character_width": "character_width",
+}
+
+# Maps the search form's order choices onto the index columns
+ORDER_FIELDS = {
+    "pack__year": "year",
+    "name": "name",
+    "filesize": "filesize",
+    "number_of_lines": "number_of_lines",
+    "character_width": "character_width",
+}
+
+
+# Ids, positions and every numeric column fit comfortably in 32 bits
+DTYPE = np.int32
+
+
+def _empty_positions() -> np.ndarray:
+    return np.empty(0, dtype=DTYPE)
+
+
+def _rank_names(names: tuple[str, ...]) -> np.ndarray:
+    """
+    Return each name's position in sorted order, so ordering by name is an
+    integer sort.
+    """
+    order = sorted(range(len(names)), key=names.__getitem__)
+    ranks = np.empty(len(names), dtype=DTYPE)
+    ranks[order] = np.arange(len(names), dtype=DTYPE)
+    return ranks
+
+
+def _merge_postings(
+    postings: dict[Any, np.ndarray],
+    new_postings: dict[Any, list[int]],
+) -> dict[Any, np.ndarray]:
+    merged = dict(postings)
+    for key, positions in new_postings.items():
+        merged[key] = np.concatenate([merged.get(key, _empty_positions()), positions])
+    return merged
+
+
+@dataclass(frozen=True)
+class PostingIndex:
+    ids: np.ndarray = field(default_factory=_empty_positions)
+    names: tuple[str, ...] = ()
+    columns: dict[str, np.ndarray] = field(default_factory=dict)
+    postings: dict[str, dict[Any, np.ndarray]] = field(default_factory=dict)
+    tags: dict[int, np.ndarray] = field(default_factory=dict)
+    counters: dict[str, int] = field(default_factory=dict)
+    max_artfile_id: int = 0
+    max_tag_row_id: int = 0
+    checked_at: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls) -> PostingIndex:
+        return cls().extend()
+
+    def extend(self) -> PostingIndex:
+        """
+        Return a new snapshot with the rows added since this one was taken.
+        """
+        # Read before the rows, so a change made during the load is
+        # picked up by the next refresh.
+        counters = CatalogCounter.get_values()
+        through = ArtFile.tags.through
+
+        # Tag rows are read first, any ArtFile they point to already exists
+        # by the time the ArtFile rows are read below. The upper bound covers
+        # hidden ArtFiles too, so they don't make the index look stale.
+        tag_rows = list(
+            through.objects.filter(id__gt=self.max_tag_row_id)
+            .order_by("id")
+            .values_list("id", "artfile_id", "artfiletag_id")
+        )
+        max_artfile_id = ArtFile.objects.aggregate(value=Max("id"))["value"] or 0
+        rows = list(
+            ArtFile.objects.visible()
+            .filter(id__gt=self.max_artfile_id, id__lte=max_artfile_id)
+            .order_by("id")
+            .values_list(*ROW_FIELDS.values())
+        )
+
+        offset = len(self.ids)
+        new_ids = np.fromiter((row[0] for row in rows), dtype=DTYPE, count=len(rows))
+        ids = np.concatenate([self.ids, new_ids])
+
+        columns = {}
+        for name in NUMERIC_FIELDS:
+            i = list(ROW_FIELDS).index(name)
+            values = np.fromiter(
+                (NULL if row[i] is None else row[i] for row in rows),
+                dtype=DTYPE,
+                count=len(rows),
+            )
+            columns[name] = np.concatenate([self.columns.get(name, _empty_positions()), values])
+
+        postings = {}
+        for name in VALUE_FIELDS:
+            i = list(ROW_FIELDS).index(name)
+            new_postings: dict[Any, list[int]] = {}
+            for position, row in enumerate(rows, offset):
+                new_postings.setdefault(row[i], []).append(position)
+            postings[name] = _merge_postings(self.postings.get(name, {}), new_postings)
+
+        # Map tag rows onto positions, rows for hidden ArtFiles are dropped.
+        tag_postings: dict[Any, list[int]] = {}
+        if tag_rows:
+            artfile_ids = np.array([row[1] for row in tag_rows], dtype=DTYPE)
+            positions = np.searchsorted(ids, artfile_ids)
+            positions[positions >= len(ids)] = 0
+            found = ids[positions] == artfile_ids if len(ids) else np.zeros(0, dtype=bool)
+            for row, position, is_found in zip(tag_rows, positions, found, strict=True):
+                if is_found:
+                    tag_postings.setdefault(row[2], []).append(int(position))
+
+        # Names repeat a lot across packs (FILE_ID.DIZ, etc.)
+        names = self.names + tuple(sys.intern(row[1]) for row in rows)
+        columns["name_rank"] = _rank_names(names)
+
+        return replace(
+            self,
+            ids=ids,
+            names=names,
+            columns=columns,
+            postings=postings,
+            tags=_merge_postings(self.tags, tag_postings),
+            counters=counters,
+            max_artfile_id=max(self.max_artfile_id, max_artfile_id),
+            max_tag_row_id=max(self.max_tag_row_id, tag_rows[-1][0] if tag_rows else 0),
+            checked_at=time.monotonic(),
+        )
+
+    def refresh(self) -> PostingIndex:
+        """
+        Return an up-to-date snapshot, which may be this one.
+        """
+        counters = CatalogCounter.get_values()
+        if counters == self.counters:
+            return replace(self, checked_at=time.monotonic())
+
+        if counters.get(CatalogCounter.CHANGED) != self.counters.get(CatalogCounter.CHANGED):
+            _logger.info("Rebuilding search posting index")
+            return self.build()
+
+        return self.extend()
+
+    def match_any(self, positions: Iterable[np.ndarray]) -> np.ndarray:
+        mask = np.zeros(len(self.ids), dtype=bool)
+        for array in positions:
+            mask[array] = True
+        return mask
+
+    def filter(
+        self,
+        tags: Iterable[Iterable[int]] = (),
+        values: Mapping[str, Iterable[Any]] | None = None,
+        ranges: Mapping[str, tuple[int | None, int | None]] | None = None,
+    ) -> np.ndarray:
+        """
+        Return a boolean mask over the index positions.
+
+        Each group in ``tags`` and each entry in ``values`` matches any of
+        its values, and all of them are combined with AND.
+        """
+        mask = np.ones(len(self.ids), dtype=bool)
+
+        for tag_ids in tags:
+            empty = _empty_positions()
+            mask &= self.match_any(self.tags.get(tag_id, empty) for tag_id in tag_ids)
+
+        for name, allowed in (values or {}).items():
+            postings = self.postings[name]
+            empty = _empty_positions()
+            mask &= self.match_any(postings.get(value, empty) for value in allowed)
+
+        for name, (low, high) in (ranges or {}).items():
+            column = self.columns[name]
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+            if low is not None or high is not None:
+                mask &= column != NULL
+
+        return mask
+
+    def select(self, ids: Iterable[int]) -> np.ndarray:
+        """
+        Return the positions of the given ids, in the same order, skipping
+        any that aren't in the index.
+        """
+        ids = np.fromiter(ids, dtype=DTYPE)
+        if not len(self.ids):
+            return _empty_positions()
+
+        positions = np.searchsorted(self.ids, ids)
+        positions[positions >= len(self.ids)] = 0
+        return positions[self.ids[positions] == ids]
+
+    def order(self, mask: np.ndarray, ordering: str) -> np.ndarray:
+        """
+        Return the ids selected by the mask, sorted by the given search form
+        ordering with the id as a tie-breaker. Rows where the sort key is
+        NULL are left out.
+        """
+        descending = ordering.startswith("-")
+        name = ORDER_FIELDS[ordering.lstrip("-")]
+
+        positions = np.flatnonzero(mask)
+        if name == "name":
+            keys = self.columns["name_rank"][positions]
+        else:
+            keys = self.columns[name][positions]
+            keep = keys != NULL
+            positions, keys = positions[keep], keys[keep]
+
+        if descending:
+            keys = -keys
+
+        ids = self.ids[positions]
+        return ids[np.lexsort((ids, keys))]
+
+
+_index = PostingIndex()
+_lock = threading.Lock()
+
+
+def get_posting_index() -> PostingIndex:
+    """
+    Return this worker's snapshot of the index, refreshing it first if needed.
+    """
+    global _index
+
+    index = _index
+    if time.monotonic() - index.checked_at < settings.SEARCH_INDEX_CHECK_INTERVAL:
+        return index
+
+    with _lock:
+        if time.monotonic() - _index.checked_at >= settings.SEARCH_INDEX_CHECK_INTERVAL:
+            _index = _index.refresh()
+
+    return _index
@@ -0,0 +1,481 @@
+"""
+Rasterize textmode art (ANSI, ASCII and PCBoard) into PNG images.
+
+Files are first interpreted into a grid of (character, attribute) cells using
+the same layout as VGA text memory, where the attribute byte holds the
+foreground color in the low nibble and the background color + blink bit in
+the high nibble. The grid is then drawn in one pass by indexing a preloaded
+glyph atlas with NumPy, rather than plotting pixels one at a time.
+"""
+
+from __future__ import annotations
+
+import functools
+import io
+import logging
+import os
+import typing
+from dataclasses import dataclass
+
+import numpy as np
+from django.core.files.base import ContentFile
+from PIL import Image
+
+from ascii.core.sauce import strip_sauce
+from ascii.textmode.choices import AspectRatio, FileType, LetterSpacing
+from ascii.textmode.xbin import XBIN_ID, XBin
+
+if typing.TYPE_CHECKING:
+    from ascii.textmode.models import ArtFile
+
+_logger = logging.getLogger(__name__)
+
+FONT_DIR = os.path.join(os.path.dirname(__file__), "fonts")
+
+# Map SAUCE font names to the bundled bitmap fonts.
+FONT_FILES = {
+    "IBM VGA": ("IBM_VGA.F16", 16),
+    "IBM VGA 437": ("IBM_VGA.F16", 16),
+    "IBM VGA50": ("IBM_VGA50.F8", 8),
+    "IBM VGA50 437": ("IBM_VGA50.F8", 8),
+    "IBM EGA43": ("IBM_VGA50.F8", 8),
+}
+DEFAULT_FONT = "IBM VGA"
+
+# The standard VGA text mode palette, indexed by attribute color (not ANSI color).
+PALETTE = np.array(
+    [
+        (0x00, 0x00, 0x00),
+        (0x00, 0x00, 0xAA),
+        (0x00, 0xAA, 0x00),
+        (0x00, 0xAA, 0xAA),
+        (0xAA, 0x00, 0x00),
+        (0xAA, 0x00, 0xAA),
+        (0xAA, 0x55, 0x00),
+        (0xAA, 0xAA, 0xAA),
+        (0x55, 0x55, 0x55),
+        (0x55, 0x55, 0xFF),
+        (0x55, 0xFF, 0x55),
+        (0x55, 0xFF, 0xFF),
+        (0xFF, 0x55, 0x55),
+        (0xFF, 0x55, 0xFF),
+        (0xFF, 0xFF, 0x55),
+        (0xFF, 0xFF, 0xFF),
+    ],
+    dtype=np.uint8,
+)
+
+# ANSI SGR colors are in RGB bit order, VGA attributes are in BGR bit order.
+ANSI_TO_VGA = [0, 4, 2, 6, 1, 5, 3, 7]
+
+DEFAULT_ATTR = 0x07
+MAX_COLUMNS = 1000
+MAX_ROWS = 10000
+THUMBNAIL_WIDTH = 320
+
+RENDERABLE_EXTENSIONS = [".ans", ".asc", ".diz", ".ice", ".nfo", ".pcb", ".txt", ".xb"]
+RENDERABLE_FILETYPES = [FileType.ASCII, FileType.ANSI, FileType.PCBOARD, FileType.XBIN]
+
+
+@dataclass
+class Font:
+    glyphs: np.ndarray  # bool array with shape (256, height, width)
+
+    @property
+    def height(self) -> int:
+        return self.glyphs.shape[1]
+
+    @property
+    def width(self) -> int:
+        return self.glyphs.shape[2]
+
+    @classmethod
+    def from_bytes(cls, data: bytes, height: int) -> Font:
+        """
+        Load a raw VGA font, where each glyph is ``height`` bytes with one byte per row.
+        """
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+        return cls(bits.reshape(-1, height, 8).astype(bool))
+
+    def with_letter_spacing(self) -> Font:
+        """
+        Return the 9-pixel wide variant of the font. Like on real VGA hardware,
+        the line drawing characters 0xC0-0xDF extend into the 9th column.
+        """
+        glyphs = np.zeros((len(self.glyphs), self.height, 9), dtype=bool)
+        glyphs[:, :, :8] = self.glyphs
+        glyphs[0xC0:0xE0, :, 8] = self.glyphs[0xC0:0xE0, :, 7]
+        return Font(glyphs)
+
+
+@functools.cache
+def load_font(name: str = DEFAULT_FONT, letter_spacing: bool = False) -> Font:
+    filename, height = FONT_FILES.get(name, FONT_FILES[DEFAULT_FONT])
+    with open(os.path.join(FONT_DIR, filename), "rb") as fp:
+        font = Font.from_bytes(fp.read(), height)
+
+    if letter_spacing:
+        font = font.with_letter_spacing()
+
+    return font
+
+
+class TextScreen:
+    """
+    A virtual text mode screen that ANSI/PCBoard data can be written into.
+    """
+
+    def __init__(self, columns: int = 80):
+        self.columns = max(1, min(columns, MAX_COLUMNS))
+        self.chars = bytearray()
+        self.attrs = bytearray()
+        self.x = 0
+        self.y = 0
+        self.rows = 0
+        self.saved = (0, 0)
+
+    def move_to(self, x: int, y: int) -> None:
+        self.x = max(0, min(x, self.columns - 1))
+        self.y = max(0, min(y, MAX_ROWS - 1))
+
+    def put(self, char: int, attr: int) -> None:
+        if self.x >= self.columns:
+            self.x = 0
+            self.y += 1
+
+        if self.y >= MAX_ROWS:
+            return
+
+        if self.y >= self.rows:
+            grow = (self.y + 1 - self.rows) * self.columns
+            self.chars.extend(b" " * grow)
+            self.attrs.extend(bytes([DEFAULT_ATTR]) * grow)
+            self.rows = self.y + 1
+
+        offset = self.y * self.columns + self.x
+        self.chars[offset] = char
+        self.attrs[offset] = attr
+        self.x += 1
+
+    def clear(self) -> None:
+        self.chars.clear()
+        self.attrs.clear()
+        self.rows = 0
+        self.move_to(0, 0)
+
+    def clear_line(self, attr: int) -> None:
+        if self.y < self.rows:
+            start = self.y * self.columns + self.x
+            end = (self.y + 1) * self.columns
+            self.chars[start:end] = b" " * (end - start)
+            self.attrs[start:end] = bytes([attr]) * (end - start)
+
+    def to_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        shape = (max(self.rows, 1), self.columns)
+        if not self.rows:
+            return np.full(shape, 0x20, dtype=np.uint8), np.full(shape, DEFAULT_ATTR, np.uint8)
+
+        chars = np.frombuffer(bytes(self.chars), dtype=np.uint8).reshape(shape)
+        attrs = np.frombuffer(bytes(self.attrs), dtype=np.uint8).reshape(shape)
+        return chars, attrs
+
+
+class ANSIInterpreter:
+    """
+    Interpret ANSI escape sequences (and optionally PCBoard @X color codes)
+    from raw CP437 bytes.
+    """
+
+    def __init__(self, screen: TextScreen, pcboard: bool = False):
+        self.screen = screen
+        self.pcboard = pcboard
+        self.reset()
+
+    def reset(self) -> None:
+        self.fg = 7
+        self.bg = 0
+        self.bold = False
+        self.blink = False
+        self.inverse = False
+
+    @property
+    def attr(self) -> int:
+        fg, bg = self.fg, self.bg
+        if self.inverse:
+            fg, bg = bg, fg
+
+        attr = (bg << 4) | fg
+        if self.bold:
+            attr |= 0x08
+        if self.blink:
+            attr |= 0x80
+        return attr
+
+    def feed(self, data: bytes) -> None:
+        screen = self.screen
+        size = len(data)
+        i = 0
+        while i < size:
+            byte = data[i]
+            if byte == 0x1A:
+                # End of file marker, anything after this is SAUCE.
+                break
+            elif byte == 0x1B and i + 1 < size and data[i + 1] == ord("["):
+                end = i + 2
+                while end < size and not 0x40 <= data[end] <= 0x7E:
+                    end += 1
+                if end < size:
+                    self.apply_csi(data[i + 2 : end], chr(data[end]))
+                i = end + 1
+                continue
+            elif self.pcboard and byte == ord("@") and data[i + 1 : i + 2] == b"X":
+                code = data[i + 2 : i + 4]
+                try:
+                    attr = int(code, 16)
+                except ValueError:
+                    pass
+                else:
+                    self.fg = attr & 0x07
+                    self.bold = bool(attr & 0x08)
+                    self.bg = (attr >> 4) & 0x07
+                    self.blink = bool(attr & 0x80)
+                    i += 4
+                    continue
+            elif self.pcboard and data.startswith(b"@CLS@", i):
+                screen.clear()
+                i += 5
+                continue
+
+            if byte == 0x0D:
+                screen.x = 0
+            elif byte == 0x0A:
+                screen.x = 0
+                screen.y += 1
+            elif byte == 0x09:
+                for _ in range(8 - screen.x % 8):
+                    screen.put(0x20, self.attr)
+            else:
+                screen.put(byte, self.attr)
+            i += 1
+
+    def apply_csi(self, params: bytes, command: str) -> None:
+        screen = self.screen
+        try:
+            args = [int(p) if p else 0 for p in params.decode("ascii").split(";")]
+        except ValueError:
+            # Private sequences like ESC[?7h
+            return
+
+        n = args[0] or 1
+        match command:
+            case "m":
+                self.apply_sgr(args)
+            case "A":
+                screen.move_to(screen.x, screen.y - n)
+            case "B":
+                screen.move_to(screen.x, screen.y + n)
+            case "C":
+                screen.move_to(screen.x + n, screen.y)
+            case "D":
+                screen.move_to(screen.x - n, screen.y)
+            case "H" | "f":
+                row = args[0] or 1
+                col = args[1] if len(args) > 1 and args[1] else 1
+                screen.move_to(col - 1, row - 1)
+            case "J":
+                if args[0] == 2:
+                    screen.clear()
+            case "K":
+                screen.clear_line(self.attr)
+            case "s":
+                screen.saved = (screen.x, screen.y)
+            case "u":
+                screen.move_to(*screen.saved)
+
+    def apply_sgr(self, args: list[int]) -> None:
+        for code in args:
+            if code == 0:
+                self.reset()
+            elif code == 1:
+                self.bold = True
+            elif code == 5:
+                self.blink = True
+            elif code == 7:
+                self.inverse = True
+            elif code == 22:
+                self.bold = False
+            elif code == 25:
+                self.blink = False
+            elif code == 27:
+                self.inverse = False
+            elif 30 <= code <= 37:
+                self.fg = ANSI_TO_VGA[code - 30]
+            elif code == 39:
+                self.fg = 7
+            elif 40 <= code <= 47:
+                self.bg = ANSI_TO_VGA[code - 40]
+            elif code == 49:
+                self.bg = 0
+            elif 90 <= code <= 97:
+                self.fg = ANSI_TO_VGA[code - 90]
+                self.bold = True
+            elif 100 <= code <= 107:
+                self.bg = ANSI_TO_VGA[code - 100]
+                self.blink = True
+
+
+def render_cells(
+    chars: np.ndarray,
+    attrs: np.ndarray,
+    font: Font,
+    ice_colors: bool = False,
+    palette: np.ndarray = PALETTE,
+) -> Image.Image:
+    """
+    Draw a (rows, columns) grid of characters and VGA attributes.
+
+    Without iCE colors the high bit of the attribute means blink, which is
+    drawn as the "on" phase. With iCE colors it selects a bright background.
+    """
+    fg = attrs & 0x0F
+    bg = attrs >> 4
+    if not ice_colors:
+        bg = bg & 0x07
+
+    rows, columns = chars.shape
+    mask = font.glyphs[chars]  # (rows, columns, height, width)
+    pixels = np.where(mask, fg[:, :, None, None], bg[:, :, None, None]).astype(np.uint8)
+    pixels = pixels.transpose(0, 2, 1, 3).reshape(rows * font.height, columns * font.width)
+
+    image = Image.fromarray(pixels, mode="P")
+    image.putpalette(palette.tobytes())
+    return image
+
+
+def render_text(
+    data: bytes,
+    columns: int | None = 80,
+    font_name: str = "",
+    letter_spacing: int | None = None,
+    ice_colors: bool | None = False,
+    aspect_ratio: int | None = None,
+    pcboard: bool = False,
+) -> Image.Image:
+    """
+    Render a raw ANSI/ASCII/PCBoard file. Parameters mirror the SAUCE fields on ArtFile.
+    """
+    screen = TextScreen(columns or 80)
+    ANSIInterpreter(screen, pcboard=pcboard).feed(strip_sauce(data))
+    chars, attrs = screen.to_arrays()
+
+    font = load_font(font_name or DEFAULT_FONT, letter_spacing == LetterSpacing.NINE)
+    image = render_cells(chars, attrs, font, ice_colors=bool(ice_colors))
+
+    if aspect_ratio == AspectRatio.STRETCH:
+        # Simulate the non-square pixels of a 320x400 VGA display on a 4:3 monitor.
+        image = image.resize((image.width, round(image.height * 1.35)), Image.Resampling.NEAREST)
+
+    return image
+
+
+def render_xbin(xbin: XBin) -> Image.Image:
+    """
+    Render a decoded XBIN file using its embedded font and palette, if present.
+    """
+    if xbin.glyphs is not None:
+        font = Font(xbin.glyphs)
+    else:
+        font = load_font("IBM VGA50" if xbin.font_size == 8 else DEFAULT_FONT)
+
+    palette = xbin.palette if xbin.palette is not None else PALETTE
+    return render_cells(xbin.chars, xbin.attrs, font, xbin.ice_colors, palette)
+
+
+def render_font_atlas(font: Font, columns: int = 16) -> Image.Image:
+    """
+    Draw every glyph in the font on a grid, for previewing.
+    """
+    rows = len(font.glyphs) // columns
+    grid = font.glyphs.reshape(rows, columns, font.height, font.width)
+    pixels = grid.transpose(0, 2, 1, 3).reshape(rows * font.height, columns * font.width)
+    return Image.fromarray(pixels)
+
+
+def make_thumbnail(image: Image.Image, width: int = THUMBNAIL_WIDTH) -> Image.Image:
+    height = max(1, round(image.height * width / image.width))
+    return image.convert("RGB").resize((width, height), Image.Resampling.LANCZOS)
+
+
+def to_png(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def render_pngs(data: bytes, **options) -> tuple[bytes, bytes]:
+    """
+    Return the (x1, thumbnail) PNG bytes for a raw file.
+
+    This only deals with bytes so that it can be run in a process pool.
+    """
+    if data.startswith(XBIN_ID):
+        image = render_xbin(XBin.from_bytes(data))
+    else:
+        image = render_text(data, **options)
+    return to_png(image), to_png(make_thumbnail(image))
+
+
+def is_renderable(artfile: ArtFile) -> bool:
+    if artfile.font_name and artfile.font_name not in FONT_FILES:
+        # e.g. Amiga fonts, XBIN files always include their own font
+        if artfile.filetype != FileType.XBIN:
+            return False
+
+    if artfile.filetype:
+        return artfile.filetype in RENDERABLE_FILETYPES
+
+    return os.path.splitext(artfile.name)[1].lower() in RENDERABLE_EXTENSIONS
+
+
+def get_render_options(artfile: ArtFile) -> dict:
+    return {
+        "columns": artfile.character_width,
+        "font_name": artfile.font_name,
+        "letter_spacing": artfile.letter_spacing,
+        "ice_colors": artfile.ice_colors,
+        "aspect_ratio": artfile.aspect_ratio,
+        "pcboard": artfile.filetype == FileType.PCBOARD or artfile.file_extension == ".pcb",
+    }
+
+
+def save_artfile_images(artfile: ArtFile, image_x1: bytes, image_tn: bytes) -> None:
+    """
+    Replace the artfile's x1/thumbnail images with the given PNG data.
+    """
+    name = f"{artfile.name}.png"
+    for field, data in ((artfile.image_x1, image_x1), (artfile.image_tn, image_tn)):
+        if field:
+            field.delete(save=False)
+        field.save(name, ContentFile(data), save=False)
+
+    artfile.save(
+        update_fields=[
+            "image_x1",
+            "image_x1_width",
+            "image_x1_height",
+            "image_tn",
+            "image_tn_width",
+            "image_tn_height",
+        ]
+    )
+
+
+def render_artfile(artfile: ArtFile) -> None:
+    """
+    Render the artfile's raw file and store the resulting images.
+    """
+    with artfile.raw_file.open("rb") as fp:
+        data = fp.read()
+
+    image_x1, image_tn = render_pngs(data, **get_render_options(artfile))
+    save_artfile_images(artfile, image_x1, image_tn)
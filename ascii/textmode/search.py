@@ -0,0 +1,74 @@
+"""
+Full-text search over ArtFile metadata using an SQLite FTS5 virtual table.
+
+The index is kept in sync by triggers (see migration 0036), so it stays
+correct for bulk_create(), queryset.update() and raw M2M inserts that
+would bypass Django signals.
+"""
+
+import re
+
+from django.db import connection
+
+FTS_TABLE = "textmode_artfile_fts"
+
+_re_terms = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def build_match_query(text: str) -> str:
+    """
+    Convert user input into an FTS5 MATCH expression.
+
+    Bare words become prefix queries and "quoted strings" become phrase
+    queries, all terms are combined with an implicit AND. Everything is
+    quoted so that FTS5 operators in user input are treated as text.
+    """
+    terms: list[str] = []
+    for phrase, word in _re_terms.findall(text):
+        if phrase.strip():
+            terms.append('"{}"'.format(phrase.replace('"', '""')))
+        elif word:
+            word = word.replace('"', "")
+            if word:
+                terms.append(f'"{word}"*')
+
+    return " ".join(terms)
+
+
+def rebuild_search_index() -> int:
+    """
+    Repopulate the full-text index from scratch, returns the number of rows indexed.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"""
+            INSERT INTO {FTS_TABLE} (rowid, name, title, author, "group", comments, tags)
+            SELECT a.id, a.name, a.title, a.author, a."group", a.comments,
+                COALESCE(GROUP_CONCAT(t.name, ' '), '')
+            FROM textmode_artfile a
+            LEFT JOIN textmode_artfile_tags m ON m.artfile_id = a.id
+            LEFT JOIN textmode_artfiletag t ON t.id = m.artfiletag_id
+            GROUP BY a.id
+            """
+        )
+        count = cursor.rowcount
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+
+    return count
+
+
+def match_ids(text: str) -> list[int]:
+    """
+    Return the ids of all ArtFiles matching the search text, ordered by relevance.
+    """
+    query = build_match_query(text)
+    if not query:
+        return []
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rank, rowid",
+            [query],
+        )
+        return [row[0] for row in cursor.fetchall()]
@@ -1,31 +1,206 @@
-from django.db.models.signals import m2m_changed, pre_delete
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from django.db.models import F, Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
-from ascii.textmode.models import ArtFile, ArtFileTag
+from ascii.core.cache import bump_generation
+from ascii.core.positions import get_changed_fields
+from ascii.textmode.constants import PAGE_CACHE_NAMESPACE
+from ascii.textmode.facets import refresh_facets_on_commit
+from ascii.textmode.models import (
+    SAUCE_TAG_FIELDS,
+    ArtFile,
+    ArtFileTag,
+    ArtPack,
+    CatalogCounter,
+)
+
+# Packs that are being imported, see defer_pack_refresh()
+_deferred_packs: set[int] = set()
+
+
+@contextmanager
+def defer_pack_refresh(pack_id: int) -> Iterator[None]:
+    """
+    Skip refreshing the pack's file positions and facets on every file that
+    is saved, the importer refreshes them once when it's done instead.
+    """
+    _deferred_packs.add(pack_id)
+    try:
+        yield
+    finally:
+        _deferred_packs.discard(pack_id)
 
 
 @receiver(m2m_changed, sender=ArtFile.tags.through)
 def update_artfiletag_count_on_change(sender, instance, action, pk_set, reverse, **kwargs):
+    """
+    Keep ArtFileTag.artfile_count in sync using atomic UPDATE statements, so
+    concurrent changes can't overwrite each other's counts.
+
+    For "add", django only includes the ids that aren't linked yet in pk_set.
+    For "remove", pk_set is whatever was passed in, so it needs to be narrowed
+    down to the rows that actually exist before they're deleted.
+    """
     if reverse:
-        raise NotImplementedError
+        # instance is an ArtFileTag, pk_set contains ArtFile ids
+        tags = ArtFileTag.objects.filter(pk=instance.pk)
+        match action:
+            case "pre_add":
+                tags.update(artfile_count=F("artfile_count") + len(pk_set))
+            case "pre_remove":
+                count = instance.artfiles.filter(pk__in=pk_set).count()
+                tags.update(artfile_count=F("artfile_count") - count)
+            case "post_clear":
+                tags.update(artfile_count=0)
+        return
 
+    # instance is an ArtFile, pk_set contains ArtFileTag ids
     match action:
         case "pre_add":
-            for tag in ArtFileTag.objects.filter(pk__in=pk_set):
-                tag.artfile_count += 1
-                tag.save(update_fields=["artfile_count"])
+            tags = ArtFileTag.objects.filter(pk__in=pk_set)
+            tags.update(artfile_count=F("artfile_count") + 1)
         case "pre_remove":
-            for tag in ArtFileTag.objects.filter(pk__in=pk_set):
-                tag.artfile_count -= 1
-                tag.save(update_fields=["artfile_count"])
+            tags = ArtFileTag.objects.filter(pk__in=pk_set, artfiles=instance)
+            tags.update(artfile_count=F("artfile_count") - 1)
         case "pre_clear":
-            for tag in instance.tags.all():
-                tag.artfile_count -= 1
-                tag.save(update_fields=["artfile_count"])
+            tags = ArtFileTag.objects.filter(artfiles=instance)
+            tags.update(artfile_count=F("artfile_count") - 1)
 
 
 @receiver(pre_delete, sender=ArtFile)
 def update_artfiletag_count_on_delete(sender, instance, **kwargs):
-    for tag in instance.tags.all():
-        tag.artfile_count -= 1
-        tag.save(update_fields=["artfile_count"])
+    tags = ArtFileTag.objects.filter(artfiles=instance)
+    tags.update(artfile_count=F("artfile_count") - 1)
+
+
+@receiver(pre_save, sender=ArtFileTag)
+def check_artfiletag_changes(sender, instance, update_fields=None, **kwargs):
+    changed = get_changed_fields(instance, ["category", "name"], update_fields)
+    instance._sauce_changed = bool(changed)
+
+
+@receiver(post_save, sender=ArtFileTag)
+def update_sauce_tag_links(sender, instance, **kwargs):
+    """
+    Re-link the files whose SAUCE fields match the tag, or matched it under
+    its old name, after a tag is created or renamed.
+    """
+    if not instance._sauce_changed:
+        return
+
+    query = Q(author_tag=instance) | Q(group_tag=instance) | Q(title_tag=instance)
+    for field, category in SAUCE_TAG_FIELDS.items():
+        if category != instance.category:
+            continue
+
+        if instance.name.isascii():
+            query |= Q(**{f"{field}__iexact": instance.name})
+        else:
+            # SQLite only compares ASCII characters case-insensitively
+            values = ArtFile.objects.values_list(field, flat=True).distinct()
+            matches = [value for value in values if value.lower() == instance.name]
+            query |= Q(**{f"{field}__in": matches})
+
+    ArtFile.objects.filter(query).refresh_sauce_tags()
+
+
+@receiver(pre_save, sender=ArtPack)
+def check_artpack_changes(sender, instance, update_fields=None, **kwargs):
+    # New packs don't have any files yet, so only the list of years changes
+    changed = get_changed_fields(instance, ["year", "visible"], update_fields)
+    instance._facet_keys = set()
+    if "year" in changed:
+        instance._facet_keys.add("pack_years")
+    if "visible" in changed and not instance._state.adding:
+        instance._facet_keys.update(["file_extensions", "font_names"])
+
+
+@receiver(post_save, sender=ArtPack)
+def update_artfile_pack_fields(sender, instance, **kwargs):
+    artfiles = instance.artfiles.exclude(year=instance.year, visible=instance.visible)
+    artfiles.update(year=instance.year, visible=instance.visible)
+
+    if instance._facet_keys:
+        refresh_facets_on_commit(keys=instance._facet_keys)
+
+
+@receiver(post_delete, sender=ArtPack)
+def refresh_facets_on_artpack_delete(sender, instance, **kwargs):
+    refresh_facets_on_commit(keys=["file_extensions", "font_names", "pack_years"])
+
+
+@receiver(pre_save, sender=ArtFile)
+def check_artfile_changes(sender, instance, update_fields=None, **kwargs):
+    """
+    Work out which positions and facets need to be refreshed once the file is
+    saved. Only files that are new, renamed or moved to another pack change
+    the positions.
+    """
+    instance._position_pack_ids = set()
+    instance._facet_pack_ids = set()
+    instance._facet_keys = set()
+    if instance.pack_id in _deferred_packs:
+        return
+
+    changed = get_changed_fields(
+        instance, ["name", "pack", "file_extension", "font_name", "is_joint"], update_fields
+    )
+    pack_ids = {instance.pack_id, changed.get("pack")} - {None}
+    if changed.keys() & {"name", "pack"}:
+        instance._position_pack_ids = pack_ids
+    if changed.keys() & {"pack", "file_extension", "is_joint"}:
+        instance._facet_pack_ids = pack_ids
+    if "file_extension" in changed:
+        instance._facet_keys.add("file_extensions")
+    if "font_name" in changed:
+        instance._facet_keys.add("font_names")
+
+
+@receiver(post_save, sender=ArtFile)
+def update_artfile_positions(sender, instance, **kwargs):
+    if instance._position_pack_ids:
+        ArtPack.objects.filter(pk__in=instance._position_pack_ids).refresh_artfile_positions()
+    if instance._facet_pack_ids or instance._facet_keys:
+        refresh_facets_on_commit(instance._facet_pack_ids, instance._facet_keys)
+
+
+@receiver(post_delete, sender=ArtFile)
+def update_artfile_positions_on_delete(sender, instance, **kwargs):
+    if instance.pack_id in _deferred_packs:
+        return
+
+    ArtPack.objects.filter(pk=instance.pack_id).refresh_artfile_positions()
+    refresh_facets_on_commit([instance.pack_id], ["file_extensions", "font_names"])
+
+
+@receiver(m2m_changed, sender=ArtFile.tags.through)
+def refresh_facets_on_tag_change(sender, instance, action, pk_set, reverse, **kwargs):
+    # The pack facets count the artist and group tags. Scheduled from the
+    # pre_ actions while the links can still be found, the refresh happens
+    # after the change has been committed.
+    if not action.startswith("pre_"):
+        return
+
+    if not reverse:
+        pack_ids = {instance.pack_id}
+    elif pk_set is not None:
+        pack_ids = set(ArtFile.objects.filter(pk__in=pk_set).values_list("pack_id", flat=True))
+    else:
+        pack_ids = set(instance.artfiles.values_list("pack_id", flat=True))
+
+    if pack_ids := pack_ids - _deferred_packs:
+        refresh_facets_on_commit(pack_ids)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+@receiver(m2m_changed)
+def invalidate_page_cache(sender, **kwargs):
+    # Any change to the textmode models, including the auto-created m2m
+    # through tables. The counters are skipped since they're written while
+    # pages are being rendered.
+    if sender._meta.app_label == "textmode" and sender is not CatalogCounter:
+        bump_generation(PAGE_CACHE_NAMESPACE)
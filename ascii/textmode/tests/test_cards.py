@@ -0,0 +1,31 @@
+from ascii.textmode.cards import build_cards, card_values
+from ascii.textmode.models import ArtFile
+from ascii.textmode.tests.factories import ArtFileFactory, ArtPackFactory
+
+
+def test_build_cards():
+    pack = ArtPackFactory(name="mist 1024", year=2024)
+    artfile = ArtFileFactory(pack=pack, name="a&b #1.ans", image_tn_width=640, image_tn_height=960)
+    ArtFileFactory(pack=pack, name="plain.txt")
+
+    cards = build_cards(card_values(ArtFile.objects.order_by("id")))
+    assert len(cards) == 2
+    assert cards[0].public_url == artfile.public_url
+    assert cards[0].thumb_height == artfile.thumb_height == 240
+    assert cards[0].thumb_height_2x == artfile.thumb_height_2x
+    assert cards[0].pack_name == "mist 1024"
+    assert cards[1].image_tn_url is None
+    assert cards[1].mimetype == "text/plain"
+
+
+def test_artfile_grid_views(client):
+    pack = ArtPackFactory(year=2024)
+    artfile = ArtFileFactory(pack=pack, name="a.ans")
+
+    response = client.get(pack.public_url)
+    assert response.status_code == 200
+    assert artfile.public_url in response.content.decode()
+
+    response = client.get("/textmode/search/", {"order": "name"})
+    assert response.status_code == 200
+    assert artfile.public_url in response.content.decode()
@@ -0,0 +1,35 @@
+import io
+import zipfile
+
+from factory.django import FileField
+
+from ascii.textmode.choices import TagCategory
+from ascii.textmode.tests.factories import ArtFileFactory, ArtFileTagFactory
+
+
+def test_tag_download(client, settings):
+    tag = ArtFileTagFactory(category=TagCategory.ARTIST, name="mozz")
+    for name, data in [("b.ans", b"\x1b[0m" * 10000), ("ä.asc", b"hello")]:
+        artfile = ArtFileFactory(name=name, raw_file=FileField(data=data))
+        artfile.tags.add(tag)
+
+    url = tag.public_url + "download/"
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response["Content-Disposition"] == 'attachment; filename="mozz.zip"'
+
+    # The precomputed size should match the stored archive exactly
+    content = b"".join(response.streaming_content)
+    assert int(response["Content-Length"]) == len(content)
+    with zipfile.ZipFile(io.BytesIO(content)) as zf:
+        assert [info.filename.split("/")[1] for info in zf.infolist()] == ["b.ans", "ä.asc"]
+        assert zf.testzip() is None
+
+    response = client.get(url, {"compress": "1"})
+    content = b"".join(response.streaming_content)
+    assert "Content-Length" not in response
+    with zipfile.ZipFile(io.BytesIO(content)) as zf:
+        assert zf.read(zf.infolist()[0]) == b"\x1b[0m" * 10000
+
+    settings.ZIP_DOWNLOAD_MAX_FILES = 1
+    assert client.get(url).status_code == 400
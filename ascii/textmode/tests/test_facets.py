@@ -0,0 +1,56 @@
+from ascii.textmode.choices import TagCategory
+from ascii.textmode.facets import get_global_facets, get_pack_facets, refresh_global_facets
+from ascii.textmode.forms import PackFilterForm
+from ascii.textmode.models import ArtPack, CatalogFacet
+from ascii.textmode.tests.factories import ArtFileFactory, ArtFileTagFactory, ArtPackFactory
+
+
+def test_pack_facets(django_capture_on_commit_callbacks):
+    pack = ArtPackFactory(year=1996)
+    tag = ArtFileTagFactory(category=TagCategory.ARTIST, name="mozz")
+    ArtFileFactory(pack=pack, name="a.ans").tags.add(tag)
+    ArtFileFactory(pack=pack, name="b.ans", is_joint=True).tags.add(tag)
+    ArtFileFactory(pack=pack, name="c.asc")
+
+    # Missing facets are computed without being stored
+    pack.refresh_from_db()
+    assert get_pack_facets(pack) == {
+        "artist": [["mozz", 2]],
+        "group": [],
+        "extension": [[".ans", 2], [".asc", 1]],
+        "collab": [[False, 2], [True, 1]],
+    }
+    assert not ArtPack.objects.get(pk=pack.pk).facets
+
+    form = PackFilterForm(pack, data={"artist": "mozz", "collab": "joint"})
+    assert form.is_valid()
+    assert form.cleaned_data["artist"] == tag
+    assert list(form.fields["extension"].choices) == [(".ans", ".ans (2)"), (".asc", ".asc (1)")]
+
+    # Adding a file refreshes the stored facets once the change is committed
+    with django_capture_on_commit_callbacks(execute=True):
+        ArtFileFactory(pack=pack, name="d.asc")
+    pack.refresh_from_db()
+    assert pack.facets["extension"] == [[".ans", 2], [".asc", 2]]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        tag.artfiles.clear()
+    pack.refresh_from_db()
+    assert pack.facets["artist"] == []
+
+    facets = get_global_facets()
+    assert facets["pack_years"] == [1996]
+    assert facets["file_extensions"] == [".ans", ".asc"]
+
+
+def test_global_facets(django_capture_on_commit_callbacks):
+    pack = ArtPackFactory(year=1996)
+    ArtFileFactory(pack=pack, name="a.ans")
+    refresh_global_facets()
+    assert get_global_facets()["file_extensions"] == [".ans"]
+
+    # Hiding the pack removes its files from the search choices
+    with django_capture_on_commit_callbacks(execute=True):
+        pack.visible = False
+        pack.save()
+    assert CatalogFacet.objects.get(key="file_extensions").values == []
@@ -0,0 +1,80 @@
+import io
+import zipfile
+
+from ascii.core.utils import get_project_file
+from ascii.textmode.choices import FileType
+from ascii.textmode.clients import SixteenColorsClient
+from ascii.textmode.loaders import (
+    LocalPackImporter,
+    SixteenColorsPackImporter,
+    find_local_packs,
+    read_local_pack,
+)
+
+
+def test_import_local_pack(tmp_path):
+    with open(get_project_file("core/tests/data/clouds.xb"), "rb") as fp:
+        clouds = fp.read()
+
+    (tmp_path / "1996").mkdir()
+    zip_path = tmp_path / "1996" / "mist0196.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        zf.writestr("FILE_ID.DIZ", b"\x1b[1;33mmistigris")
+        zf.writestr("art/clouds.xb", clouds)
+
+    assert find_local_packs(str(tmp_path)) == [(str(zip_path), 1996)]
+
+    files = read_local_pack(str(zip_path))
+    pack = LocalPackImporter(str(zip_path), 1996).process(files)
+    assert pack.name == "mist0196"
+
+    fileid = pack.artfiles.get(is_fileid=True)
+    assert fileid.name == "FILE_ID.DIZ"
+    assert fileid.image_x1
+
+    artfile = pack.artfiles.get(name="clouds.xb")
+    assert artfile.title == "clouds"
+    assert artfile.filetype == FileType.XBIN
+    assert artfile.filesize == len(clouds)
+    assert artfile.raw_file.read() == clouds
+    assert (artfile.image_x1_width, artfile.image_x1_height) == (320, 240)
+
+    # Importing again skips the existing files
+    LocalPackImporter(str(zip_path), 1996).process(files)
+    assert pack.artfiles.count() == 2
+
+
+def test_import_pack_tags_existing_files(monkeypatch):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("FILE_ID.DIZ", b"mistigris")
+        zf.writestr("mozz.ans", b"\x1b[31mhello")
+
+    pack_data = {
+        "year": 1996,
+        "fileid": "FILE_ID.DIZ",
+        "archive": "mist0196.zip",
+        "files": {
+            "FILE_ID.DIZ": {"file": {"raw": "FILE_ID.DIZ"}},
+            "mozz.ans": {"file": {"raw": "mozz.ans"}, "artists": ["mozz"]},
+        },
+    }
+    monkeypatch.setattr(SixteenColorsClient, "get_pack", lambda self, name: pack_data)
+    monkeypatch.setattr(SixteenColorsClient, "get_file", lambda self, path: archive.getvalue())
+
+    # An import that stopped before the files were tagged
+    pack = SixteenColorsPackImporter("mist0196", skip_tags=True).process()
+    assert pack is not None
+    artfile = pack.artfiles.get(name="mozz.ans")
+    assert not artfile.tags.exists()
+    assert artfile.image_x1
+
+    SixteenColorsPackImporter("mist0196").process()
+    assert [tag.name for tag in artfile.tags.all()] == ["mozz"]
+
+    # The positions and facets are refreshed once the import is done
+    artfile.refresh_from_db()
+    assert artfile.position == 2
+    pack.refresh_from_db()
+    assert pack.facets["artist"] == [["mozz", 1]]
+    assert artfile.tags.get().artfile_count == 1
@@ -1,4 +1,11 @@
-from ascii.textmode.tests.factories import ArtFileFactory, ArtFileTagFactory
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from factory.django import ImageField
+
+from ascii.textmode.choices import TagCategory
+from ascii.textmode.models import ArtFile, ArtFileTag
+from ascii.textmode.search import rebuild_search_index
+from ascii.textmode.tests.factories import ArtFileFactory, ArtFileTagFactory, ArtPackFactory
 
 
 def test_artfile_tag_signals():
@@ -26,6 +33,184 @@ def test_artfile_tag_signals():
     tag.refresh_from_db()
     assert tag.artfile_count == 1
 
+    # Removing a tag that isn't linked shouldn't change the count
+    artfile1.tags.remove(tag)
+    tag.refresh_from_db()
+    assert tag.artfile_count == 1
+
     artfile3.delete()
     tag.refresh_from_db()
     assert tag.artfile_count == 0
+
+    # Reverse side of the relation
+    tag.artfiles.add(artfile1, artfile2)
+    tag.refresh_from_db()
+    assert tag.artfile_count == 2
+
+    tag.artfiles.remove(artfile1)
+    tag.refresh_from_db()
+    assert tag.artfile_count == 1
+
+    tag.artfiles.clear()
+    tag.refresh_from_db()
+    assert tag.artfile_count == 0
+
+
+def test_artfile_image_dimensions():
+    """
+    Image dimensions should be stored on the model when the images are saved.
+    """
+    artfile = ArtFileFactory(
+        image_tn=ImageField(width=160, height=320),
+        image_x1=ImageField(width=640, height=1280),
+    )
+    artfile.refresh_from_db()
+
+    assert artfile.image_tn_width == 160
+    assert artfile.image_tn_height == 320
+    assert artfile.image_x1_width == 640
+    assert artfile.image_x1_height == 1280
+    assert artfile.thumb_height == 320
+    assert artfile.thumb_height_2x == 700
+
+
+def test_artfile_search():
+    """
+    The full-text index should stay in sync with artfile fields and tags.
+    """
+    artfile1 = ArtFileFactory(name="CLOUDS.XB", author="mozz")
+    artfile2 = ArtFileFactory(name="ROOTS.ANS", group="mistigris")
+
+    tag = ArtFileTagFactory(name="blocktronics")
+    artfile2.tags.add(tag)
+
+    assert list(ArtFile.objects.search("cloud")) == [artfile1]
+    assert list(ArtFile.objects.search("mist")) == [artfile2]
+    assert list(ArtFile.objects.search("blocktron")) == [artfile2]
+    assert list(ArtFile.objects.search('"roots ans"')) == [artfile2]
+    assert list(ArtFile.objects.search("clouds mozz")) == [artfile1]
+    assert not ArtFile.objects.search("clouds mistigris").exists()
+
+    ArtFileTag.objects.filter(pk=tag.pk).update(name="impure")
+    assert list(ArtFile.objects.search("impure")) == [artfile2]
+
+    artfile2.tags.clear()
+    assert not ArtFile.objects.search("impure").exists()
+
+    artfile1.name = "SKY.XB"
+    artfile1.save()
+    assert not ArtFile.objects.search("clouds").exists()
+
+    assert rebuild_search_index() == 2
+    assert list(ArtFile.objects.search("sky")) == [artfile1]
+
+
+def test_artfile_tag_bulk_helpers():
+    existing = ArtFileTagFactory(category=TagCategory.ARTIST, name="mozz")
+
+    keys = {(TagCategory.ARTIST, "mozz"), (TagCategory.GROUP, "mozz"), (TagCategory.GROUP, "fire")}
+    tags = ArtFileTag.objects.get_or_create_many(keys)
+    assert tags.keys() == keys
+    assert tags[(TagCategory.ARTIST, "mozz")] == existing
+    assert ArtFileTag.objects.count() == 3
+
+    artfile = ArtFileFactory()
+    ArtFile.tags.through.objects.create(artfile=artfile, artfiletag=existing)
+    ArtFileTag.objects.update(artfile_count=5)
+
+    assert ArtFileTag.objects.all().refresh_artfile_count() == 3
+    assert dict(ArtFileTag.objects.values_list("id", "artfile_count")) == {
+        tag.pk: 1 if tag == existing else 0 for tag in tags.values()
+    }
+
+
+def test_refresh_is_joint():
+    artfile1 = ArtFileFactory(is_joint=True)
+    artfile2 = ArtFileFactory()
+    artfile2.tags.set(ArtFileTagFactory.create_batch(2, category=TagCategory.ARTIST))
+
+    assert ArtFile.objects.all().refresh_is_joint() == 2
+
+    artfile1.refresh_from_db()
+    artfile2.refresh_from_db()
+    assert not artfile1.is_joint
+    assert artfile2.is_joint
+
+
+def test_artfile_denormalized_fields():
+    artist = ArtFileTagFactory(category=TagCategory.ARTIST, name="mozz")
+    artfile = ArtFileFactory(author="Mozz", group="Mistigris", pack__year=1996)
+    assert artfile.year == 1996
+    assert artfile.visible
+
+    pack = artfile.pack
+    pack.year = 1997
+    pack.visible = False
+    pack.save()
+    artfile.refresh_from_db()
+    assert artfile.year == 1997
+    assert not artfile.visible
+
+    ArtFile.objects.update(year=0, visible=True, author_tag=None)
+    assert ArtFile.objects.all().refresh_pack_fields() == 1
+    assert ArtFile.objects.all().refresh_sauce_tags() == 1
+
+    artfile.refresh_from_db()
+    assert (artfile.year, artfile.visible) == (1997, False)
+    assert artfile.author_tag == artist
+    assert artfile.group_tag is None
+    assert "Author" in artfile.get_sauce_display()
+
+
+def test_artfile_sauce_tags():
+    artfile = ArtFileFactory(author="Émile", group="Mistigris")
+    assert artfile.author_tag is None
+
+    # Creating or renaming a tag re-links the matching files
+    artist = ArtFileTagFactory(category=TagCategory.ARTIST, name="émile")
+    group = ArtFileTagFactory(category=TagCategory.GROUP, name="mistigris")
+    artfile.refresh_from_db()
+    assert (artfile.author_tag, artfile.group_tag) == (artist, group)
+
+    group.name = "blocktronics"
+    group.save()
+    artfile.refresh_from_db()
+    assert artfile.group_tag is None
+
+    # Editing the SAUCE fields looks the tags up again
+    artfile.group = "Blocktronics"
+    artfile.save()
+    assert artfile.group_tag == group
+
+    ArtFile.objects.update(author_tag=None)
+    assert ArtFile.objects.all().refresh_sauce_tags() == 1
+    artfile.refresh_from_db()
+    assert artfile.author_tag == artist
+
+
+def test_artfile_positions():
+    pack = ArtPackFactory()
+    artfile_b = ArtFileFactory(pack=pack, name="b.ans")
+    artfile_c = ArtFileFactory(pack=pack, name="c.ans")
+    artfile_a = ArtFileFactory(pack=pack, name="a.ans")
+    ArtFileFactory(name="a.ans")
+
+    for artfile in (artfile_a, artfile_b, artfile_c):
+        artfile.refresh_from_db()
+    assert [artfile_a.position, artfile_b.position, artfile_c.position] == [1, 2, 3]
+    assert artfile_b.get_neighbors() == (artfile_a, artfile_c)
+    assert artfile_a.get_neighbors() == (None, artfile_b)
+
+    artfile_b.delete()
+    artfile_c.refresh_from_db()
+    assert artfile_c.get_neighbors() == (artfile_a, None)
+
+    # Only saves that change the order renumber the pack
+    with CaptureQueriesContext(connection) as ctx:
+        artfile_a.save()
+    assert not any("ranked" in query["sql"] for query in ctx.captured_queries)
+
+    artfile_a.name = "d.ans"
+    artfile_a.save()
+    artfile_c.refresh_from_db()
+    assert artfile_c.get_neighbors() == (None, artfile_a)
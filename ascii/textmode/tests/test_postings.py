@@ -0,0 +1,58 @@
+from ascii.textmode.choices import TagCategory
+from ascii.textmode.postings import PostingIndex
+from ascii.textmode.tests.factories import ArtFileFactory, ArtFileTagFactory, ArtPackFactory
+
+
+def test_posting_index():
+    pack1 = ArtPackFactory(year=1996)
+    pack2 = ArtPackFactory(year=1998)
+    hidden = ArtPackFactory(year=1998, visible=False)
+    artist = ArtFileTagFactory(category=TagCategory.ARTIST)
+    group = ArtFileTagFactory(category=TagCategory.GROUP)
+
+    a = ArtFileFactory(pack=pack1, name="a.ans", file_extension=".ans", number_of_lines=25)
+    b = ArtFileFactory(pack=pack2, name="b.ans", file_extension=".ans", ice_colors=True)
+    c = ArtFileFactory(pack=pack2, name="c.asc", file_extension=".asc", number_of_lines=100)
+    d = ArtFileFactory(pack=hidden, name="d.ans", file_extension=".ans")
+    a.tags.add(artist, group)
+    b.tags.add(artist)
+    d.tags.add(artist)
+
+    index = PostingIndex.build()
+    assert len(index) == 3
+
+    def ids(mask):
+        return list(index.ids[mask])
+
+    assert ids(index.filter(values={"file_extension": [".ans"]})) == [a.pk, b.pk]
+    assert ids(index.filter(values={"ice_colors": [True]})) == [b.pk]
+    assert ids(index.filter(tags=[[artist.pk]])) == [a.pk, b.pk]
+    assert ids(index.filter(tags=[[artist.pk], [group.pk]])) == [a.pk]
+    assert ids(index.filter(ranges={"year": (1997, None)})) == [b.pk, c.pk]
+    assert ids(index.filter(ranges={"number_of_lines": (None, 50)})) == [a.pk]
+
+    mask = index.filter()
+    assert list(index.order(mask, "-name")) == [c.pk, b.pk, a.pk]
+    assert list(index.order(mask, "name")) == [a.pk, b.pk, c.pk]
+    assert list(index.order(mask, "-number_of_lines")) == [c.pk, a.pk]
+    assert list(index.select([c.pk, d.pk, a.pk])) == [2, 0]
+
+    assert index.refresh().ids is index.ids
+
+    # New rows are appended without rebuilding the existing postings
+    e = ArtFileFactory(pack=pack1, name="e.ans", file_extension=".ans")
+    c.tags.add(group)
+    index = index.refresh()
+    assert ids(index.filter(values={"file_extension": [".ans"]})) == [a.pk, b.pk, e.pk]
+    assert ids(index.filter(tags=[[group.pk]])) == [a.pk, c.pk]
+
+    # Saves that don't change any of the indexed values are ignored
+    a.save()
+    pack1.save()
+    assert index.refresh().ids is index.ids
+
+    # Anything else rebuilds the index
+    hidden.visible = True
+    hidden.save()
+    index = index.refresh()
+    assert ids(index.filter(tags=[[artist.pk]])) == [a.pk, b.pk, d.pk]
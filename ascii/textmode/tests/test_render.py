@@ -0,0 +1,26 @@
+from ascii.textmode.choices import LetterSpacing
+from ascii.textmode.render import PALETTE, render_text
+
+
+def test_render_ansi():
+    data = b"\x1b[0;1;31mA\x1b[44mB\r\nC\x1b[5;32m\xdb\x1a\x1b[0mignored"
+
+    image = render_text(data, columns=4).convert("RGB")
+    assert image.size == (32, 32)
+
+    # Bold red foreground on black
+    assert image.getpixel((3, 2)) == tuple(PALETTE[12])
+    assert image.getpixel((0, 0)) == tuple(PALETTE[0])
+    # Blue background
+    assert image.getpixel((8, 0)) == tuple(PALETTE[1])
+    # Blink is drawn as a regular background without iCE colors
+    assert image.getpixel((12, 20)) == tuple(PALETTE[10])
+
+    image = render_text(data, columns=4, ice_colors=True, letter_spacing=LetterSpacing.NINE)
+    assert image.size == (36, 32)
+
+
+def test_render_pcboard():
+    image = render_text(b"@X1F\xdb", columns=1, pcboard=True).convert("RGB")
+    assert image.size == (8, 16)
+    assert image.getpixel((0, 0)) == tuple(PALETTE[15])
@@ -0,0 +1,45 @@
+import pytest
+
+from ascii.core.utils import get_project_file
+from ascii.textmode.render import render_pngs, render_xbin
+from ascii.textmode.xbin import XBin, XBinError, decode_rle
+
+
+def test_decode_rle():
+    data = bytes(
+        [
+            0b00000001, 65, 1, 66, 2,  # 2 uncompressed pairs
+            0b01000010, 67, 3, 4, 5,  # 3 x char "C"
+            0b10000001, 6, 68, 69,  # 2 x attr 6
+            0b11000011, 70, 7,  # 4 x "F" with attr 7
+        ]
+    )  # fmt: skip
+    chars, attrs = decode_rle(data, 0, 11)
+    assert chars == b"ABCCCDEFFFF"
+    assert attrs == bytes([1, 2, 3, 4, 5, 6, 6, 7, 7, 7, 7])
+
+    with pytest.raises(XBinError):
+        decode_rle(data, 0, 12)
+
+
+def test_xbin_clouds():
+    with open(get_project_file("core/tests/data/clouds.xb"), "rb") as fp:
+        data = fp.read()
+
+    xbin = XBin.from_bytes(data)
+    assert (xbin.width, xbin.height, xbin.font_size) == (40, 15, 16)
+    assert xbin.has_palette
+    assert xbin.has_font
+    assert xbin.ice_colors
+    assert xbin.glyphs is not None
+    assert xbin.glyphs.shape == (256, 16, 8)
+    assert xbin.chars.shape == xbin.attrs.shape == (15, 40)
+
+    image = render_xbin(xbin)
+    assert image.size == (320, 240)
+
+    image_x1, image_tn = render_pngs(data)
+    assert image_x1.startswith(b"\x89PNG")
+
+    with pytest.raises(XBinError):
+        XBin.from_bytes(b"XBIN")
@@ -1,13 +1,24 @@
+from datetime import datetime
 from typing import Any
 
+import numpy as np
 from dal import autocomplete
-from django.core.paginator import Paginator
+from django.conf import settings
+from django.db.models import F
 from django.http import Http404, HttpRequest
+from django.http.response import HttpResponseBase
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.text import slugify
+from django.views import View
 from django.views.generic import TemplateView
 
+from ascii.core.cache import ConditionalGetMixin, PageCacheMixin
+from ascii.core.pagination import CursorPaginator, IdListPaginator
+from ascii.textmode.cards import build_cards, card_values
 from ascii.textmode.choices import TagCategory
+from ascii.textmode.constants import PAGE_CACHE_NAMESPACE
+from ascii.textmode.downloads import build_zip_response
 from ascii.textmode.forms import (
     AdvancedSearchForm,
     PackFilterForm,
@@ -21,22 +32,15 @@ from ascii.textmode.forms import (
     SearchTagForm,
 )
 from ascii.textmode.models import ALT_SLASH, ArtCollection, ArtFile, ArtFileTag, ArtPack
+from ascii.textmode.postings import get_posting_index
+from ascii.textmode.search import match_ids
 
 PAGE_SIZE = 200
 
 
-def get_page_number(request: HttpRequest) -> int:
-    try:
-        page_str = request.GET.get("page")
-        page = int(page_str) if page_str else 1
-    except (TypeError, ValueError):
-        page = 1
-
-    return page
-
-
-class TextmodeIndexView(TemplateView):
+class TextmodeIndexView(PageCacheMixin, TemplateView):
     template_name = "textmode/index.html"
+    page_cache_namespace = PAGE_CACHE_NAMESPACE
 
     def get_context_data(self, **kwargs) -> dict[str, Any]:
         packs = ArtPack.objects.prefetch_fileid().visible().order_by("-year", "-created_at")[:8]
@@ -80,7 +84,15 @@ class TextmodeIndexView(TemplateView):
         }
 
 
-class TextmodePackView(TemplateView):
+class TextmodePackView(ConditionalGetMixin, TemplateView):
+    page_cache_namespace = PAGE_CACHE_NAMESPACE
+
+    def get_version(self, **kwargs) -> tuple[str, datetime | None] | None:
+        packs = ArtPack.objects.filter(name=kwargs["pack"])
+        if row := packs.values_list("id", "created_at").first():
+            return f"{row[0]}:{row[1].isoformat()}", row[1]
+        return None
+
     def get_template_names(self) -> list[str]:
         if self.request.headers.get("Hx-Request"):
             return ["textmode/fragments/artfile_grid_partial.html"]
@@ -90,9 +102,9 @@ class TextmodePackView(TemplateView):
     def get_context_data(self, **kwargs) -> dict[str, Any]:
         pack = get_object_or_404(ArtPack, name=kwargs["pack"])
 
-        artfiles = pack.artfiles.select_related("pack").order_by("-is_fileid", "name")
+        artfiles = pack.artfiles.all()
 
-        form = PackFilterForm(artfiles, data=self.request.GET)
+        form = PackFilterForm(pack, data=self.request.GET)
         if form.is_valid():
             if artist := form.cleaned_data["artist"]:
                 artfiles = artfiles.filter(tags=artist)
@@ -110,8 +122,9 @@ class TextmodePackView(TemplateView):
 
         is_filtered = any(form.cleaned_data.values())
 
-        p = Paginator(artfiles, PAGE_SIZE)
-        page = p.page(get_page_number(self.request))
+        p = CursorPaginator(card_values(artfiles), ["-is_fileid", "name"], PAGE_SIZE)
+        page = p.page(self.request.GET.get("page"))
+        page.object_list = build_cards(page.object_list)
 
         return {
             "pack": pack,
@@ -122,8 +135,9 @@ class TextmodePackView(TemplateView):
         }
 
 
-class TextmodePackListView(TemplateView):
+class TextmodePackListView(PageCacheMixin, TemplateView):
     template_name = "textmode/pack_list.html"
+    page_cache_namespace = PAGE_CACHE_NAMESPACE
 
     def get_context_data(self, **kwargs) -> dict[str, Any]:
         packs = ArtPack.objects.prefetch_fileid().visible().order_by("-year", "-created_at")
@@ -167,26 +181,44 @@ class TextmodePackYearListView(TemplateView):
         }
 
 
-class TextmodeArtFileView(TemplateView):
+class TextmodeArtFileView(ConditionalGetMixin, TemplateView):
     template_name = "textmode/artfile.html"
+    page_cache_namespace = PAGE_CACHE_NAMESPACE
+
+    def get_version(self, **kwargs) -> tuple[str, datetime | None] | None:
+        artfiles = ArtFile.objects.filter(pack__name=kwargs["pack"], name=kwargs["artfile"])
+        if row := artfiles.values_list("id", "pack__created_at").first():
+            return f"{row[0]}:{row[1].isoformat()}", row[1]
+        return None
 
     def get_context_data(self, **kwargs) -> dict[str, Any]:
         pack = get_object_or_404(ArtPack, name=kwargs["pack"])
-        artfile = get_object_or_404(ArtFile, pack=pack, name=kwargs["artfile"])
+        artfiles = ArtFile.objects.select_related("author_tag", "group_tag", "title_tag")
+        artfile = get_object_or_404(artfiles, pack=pack, name=kwargs["artfile"])
 
         tags = ArtFileTag.objects.order_by("category", "name").filter(artfiles=artfile)
+        prev, next = artfile.get_neighbors()
 
         return {
             "pack": pack,
             "tags": tags,
             "artfile": artfile,
-            "next": artfile.get_next(),
-            "prev": artfile.get_prev(),
+            "next": next,
+            "prev": prev,
             "sauce": artfile.get_sauce_display(),
         }
 
 
-class TextmodeTagView(TemplateView):
+class TextmodeTagView(ConditionalGetMixin, TemplateView):
+    page_cache_namespace = PAGE_CACHE_NAMESPACE
+
+    def get_version(self, **kwargs) -> tuple[str, datetime | None] | None:
+        name = kwargs["name"].replace(ALT_SLASH, "/")
+        tags = ArtFileTag.objects.filter(category=kwargs["category"], name=name)
+        if pk := tags.values_list("id", flat=True).first():
+            return str(pk), None
+        return None
+
     def get_template_names(self) -> list[str]:
         if self.request.headers.get("Hx-Request"):
             return ["textmode/fragments/artfile_grid_partial.html"]
@@ -199,10 +231,13 @@ class TextmodeTagView(TemplateView):
 
         tag = get_object_or_404(ArtFileTag, category=kwargs["category"], name=name)
 
-        artfiles = tag.artfiles.select_related("pack").order_by("name")
+        p = CursorPaginator(card_values(tag.artfiles.all()), ["name"], PAGE_SIZE)
+        page = p.page(self.request.GET.get("page"))
+        page.object_list = build_cards(page.object_list)
 
-        p = Paginator(artfiles, PAGE_SIZE)
-        page = p.page(get_page_number(self.request))
+        download_url = None
+        if p.count <= settings.ZIP_DOWNLOAD_MAX_FILES:
+            download_url = reverse("textmode-tag-download", args=[tag.category, kwargs["name"]])
 
         match tag.category:
             case TagCategory.GROUP:
@@ -218,11 +253,24 @@ class TextmodeTagView(TemplateView):
             "tag": tag,
             "page": page,
             "search_url": search_url,
+            "download_url": download_url,
         }
 
 
-class TextmodeTagListView(TemplateView):
+class TextmodeTagDownloadView(View):
+    def get(self, request: HttpRequest, category: str, name: str) -> HttpResponseBase:
+        name = name.replace(ALT_SLASH, "/")
+        tag = get_object_or_404(ArtFileTag, category=category, name=name)
+        return build_zip_response(
+            ArtFile.objects.filter(tags=tag).order_by("name"),
+            f"{slugify(tag.name) or tag.pk}.zip",
+            compress=bool(request.GET.get("compress")),
+        )
+
+
+class TextmodeTagListView(PageCacheMixin, TemplateView):
     template_name = "textmode/tag_list.html"
+    page_cache_namespace = PAGE_CACHE_NAMESPACE
 
     def get_context_data(self, **kwargs) -> dict[str, Any]:
         artist_tags = ArtFileTag.objects.for_tag_list(TagCategory.ARTIST)
@@ -276,6 +324,56 @@ class TextmodeTagCategoryListView(TemplateView):
         }
 
 
+def get_search_result_ids(form: AdvancedSearchForm) -> np.ndarray:
+    """
+    Return the ids of the matching artfiles in the display order.
+    """
+    index = get_posting_index()
+    if not form.is_valid():
+        return index.ids
+
+    data = form.cleaned_data
+
+    tags = [
+        [tag.pk for tag in data[category]]
+        for category in ("artist", "group", "content")
+        if data[category]
+    ]
+    values: dict[str, list] = {}
+    if data["extension"]:
+        values["file_extension"] = data["extension"]
+    if data["ice_colors"]:
+        values["ice_colors"] = [value == "True" for value in data["ice_colors"]]
+    if data["letter_spacing"]:
+        values["letter_spacing"] = [int(value) for value in data["letter_spacing"]]
+    if data["aspect_ratio"]:
+        values["aspect_ratio"] = [int(value) for value in data["aspect_ratio"]]
+    if data["font_name"]:
+        values["font_name"] = data["font_name"]
+    if data["pack"]:
+        values["pack_id"] = [pack.pk for pack in data["pack"]]
+    if data["is_joint"]:
+        values["is_joint"] = [value == "True" for value in data["is_joint"]]
+    ranges = {
+        "number_of_lines": (data["min_num_lines"] or None, data["max_num_lines"] or None),
+        "character_width": (data["min_char_width"] or None, data["max_char_width"] or None),
+        "year": (data["min_year"] or None, data["max_year"] or None),
+    }
+    ranges = {key: value for key, value in ranges.items() if value != (None, None)}
+
+    mask = index.filter(tags=tags, values=values, ranges=ranges)
+    if order := data["order"]:
+        if data["q"]:
+            mask &= index.match_any([index.select(match_ids(data["q"]))])
+        return index.order(mask, order)
+    elif data["q"]:
+        # Keep the full-text search relevance order
+        positions = index.select(match_ids(data["q"]))
+        return index.ids[positions[mask[positions]]]
+    else:
+        return index.ids[mask]
+
+
 class TextModeSearchView(TemplateView):
     def get_template_names(self) -> list[str]:
         if self.request.headers.get("Hx-Request"):
@@ -284,60 +382,41 @@ class TextModeSearchView(TemplateView):
             return ["textmode/search.html"]
 
     def get_context_data(self, **kwargs):
-        artfiles = ArtFile.objects.select_related("pack").visible()
-        form = AdvancedSearchForm(artfiles, data=self.request.GET)
+        form = AdvancedSearchForm(data=self.request.GET)
+        ids = get_search_result_ids(form)
 
-        if form.is_valid():
-            if q := form.cleaned_data["q"]:
-                artfiles = artfiles.search(q)
-            if extension := form.cleaned_data["extension"]:
-                artfiles = artfiles.filter(file_extension__in=extension)
-            if ice_colors := form.cleaned_data["ice_colors"]:
-                artfiles = artfiles.filter(ice_colors__in=ice_colors)
-            if letter_spacing := form.cleaned_data["letter_spacing"]:
-                artfiles = artfiles.filter(letter_spacing__in=letter_spacing)
-            if aspect_ratio := form.cleaned_data["aspect_ratio"]:
-                artfiles = artfiles.filter(aspect_ratio__in=aspect_ratio)
-            if font_name := form.cleaned_data["font_name"]:
-                artfiles = artfiles.filter(font_name__in=font_name)
-            if artist := form.cleaned_data["artist"]:
-                artfiles = artfiles.filter(tags__in=artist)
-            if group := form.cleaned_data["group"]:
-                artfiles = artfiles.filter(tags__in=group)
-            if content := form.cleaned_data["content"]:
-                artfiles = artfiles.filter(tags__in=content)
-            if pack := form.cleaned_data["pack"]:
-                artfiles = artfiles.filter(pack__in=pack)
-            if min_num_lines := form.cleaned_data["min_num_lines"]:
-                artfiles = artfiles.filter(number_of_lines__gte=min_num_lines)
-            if max_num_lines := form.cleaned_data["max_num_lines"]:
-                artfiles = artfiles.filter(number_of_lines__lte=max_num_lines)
-            if min_char_width := form.cleaned_data["min_char_width"]:
-                artfiles = artfiles.filter(character_width__gte=min_char_width)
-            if max_char_width := form.cleaned_data["max_char_width"]:
-                artfiles = artfiles.filter(character_width__lte=max_char_width)
-            if min_year := form.cleaned_data["min_year"]:
-                artfiles = artfiles.filter(pack__year__gte=min_year)
-            if max_year := form.cleaned_data["max_year"]:
-                artfiles = artfiles.filter(pack__year__lte=max_year)
-            if is_joint := form.cleaned_data["is_joint"]:
-                artfiles = artfiles.filter(is_joint__in=is_joint)
-            if order := form.cleaned_data["order"]:
-                artfiles = artfiles.filter(**{f"{order.lstrip('-')}__isnull": False})
-                artfiles = artfiles.order_by(order)
-
-        p = Paginator(artfiles, PAGE_SIZE)
-        page = p.page(get_page_number(self.request))
+        p = IdListPaginator(card_values(ArtFile.objects.all()), ids, PAGE_SIZE)
+        page = p.page(self.request.GET.get("page"))
+        page.object_list = build_cards(page.object_list)
 
         is_filtered = any(form.cleaned_data.values())
 
+        download_url = None
+        if p.count <= settings.ZIP_DOWNLOAD_MAX_FILES:
+            query = self.request.GET.copy()
+            query.pop("page", None)
+            download_url = reverse("textmode-search-download", query=query)
+
         return {
             "form": form,
             "page": page,
             "is_filtered": is_filtered,
+            "download_url": download_url,
         }
 
 
+class TextModeSearchDownloadView(View):
+    def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponseBase:
+        form = AdvancedSearchForm(data=request.GET)
+        ids = get_search_result_ids(form)
+        return build_zip_response(
+            ArtFile.objects.all(),
+            "search.zip",
+            ids=ids.tolist(),
+            compress=bool(request.GET.get("compress")),
+        )
+
+
 class TextModeArtCollectionView(TemplateView):
     def get_template_names(self) -> list[str]:
         if self.request.headers.get("Hx-Request"):
@@ -347,16 +426,36 @@ class TextModeArtCollectionView(TemplateView):
 
     def get_context_data(self, **kwargs):
         collection = get_object_or_404(ArtCollection, slug=kwargs["slug"])
-        artfiles = collection.ordered_artfiles.all()
 
-        p = Paginator(artfiles, PAGE_SIZE)
-        page = p.page(get_page_number(self.request))
+        # Annotate the mapping order so the cursor can seek on it without
+        # adding a second join against the m2m table.
+        artfiles = collection.artfiles.annotate(collection_order=F("artcollectionmapping__order"))
+        artfiles = card_values(artfiles, "collection_order")
+
+        p = CursorPaginator(artfiles, ["collection_order"], PAGE_SIZE)
+        page = p.page(self.request.GET.get("page"))
+        page.object_list = build_cards(page.object_list)
+
+        download_url = None
+        if p.count <= settings.ZIP_DOWNLOAD_MAX_FILES:
+            download_url = reverse("textmode-collection-download", args=[collection.slug])
 
-        return {"collection": collection, "page": page}
+        return {"collection": collection, "page": page, "download_url": download_url}
+
+
+class TextModeArtCollectionDownloadView(View):
+    def get(self, request: HttpRequest, slug: str) -> HttpResponseBase:
+        collection = get_object_or_404(ArtCollection, slug=slug)
+        return build_zip_response(
+            collection.artfiles.order_by("artcollectionmapping__order"),
+            f"{collection.slug}.zip",
+            compress=bool(request.GET.get("compress")),
+        )
 
 
-class TextModeArtCollectionListView(TemplateView):
+class TextModeArtCollectionListView(PageCacheMixin, TemplateView):
     template_name = "textmode/collection_list.html"
+    page_cache_namespace = PAGE_CACHE_NAMESPACE
 
     def get_context_data(self, **kwargs):
         collections = ArtCollection.objects.visible().annotate_artfile_count()
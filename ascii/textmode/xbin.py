@@ -0,0 +1,168 @@
+"""
+Decoder for the XBIN (eXtended BIN) textmode file format.
+
+https://web.archive.org/web/20120204063040/http://www.acid.org/info/xbin/x_spec.htm
+"""
+
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+
+import numpy as np
+
+XBIN_ID = b"XBIN\x1a"
+HEADER_FORMAT = "<5sHHBB"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+FLAG_PALETTE = 0b00000001
+FLAG_FONT = 0b00000010
+FLAG_COMPRESS = 0b00000100
+FLAG_NON_BLINK = 0b00001000
+FLAG_512_CHARS = 0b00010000
+
+
+class XBinError(ValueError):
+    pass
+
+
+@dataclass
+class XBin:
+    width: int
+    height: int
+    font_size: int
+    flags: int
+    palette: np.ndarray | None  # (16, 3) uint8 RGB
+    font_data: bytes
+    glyphs: np.ndarray | None  # (256 or 512, font_size, 8) bool
+    chars: np.ndarray  # (height, width) uint16
+    attrs: np.ndarray  # (height, width) uint8
+
+    @property
+    def has_palette(self) -> bool:
+        return bool(self.flags & FLAG_PALETTE)
+
+    @property
+    def has_font(self) -> bool:
+        return bool(self.flags & FLAG_FONT)
+
+    @property
+    def is_compressed(self) -> bool:
+        return bool(self.flags & FLAG_COMPRESS)
+
+    @property
+    def ice_colors(self) -> bool:
+        return bool(self.flags & FLAG_NON_BLINK)
+
+    @property
+    def has_512_chars(self) -> bool:
+        return bool(self.flags & FLAG_512_CHARS)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> XBin:
+        if len(data) < HEADER_SIZE:
+            raise XBinError("Invalid XBIN file: Header is too short.")
+
+        xbin_id, width, height, font_size, flags = struct.unpack_from(HEADER_FORMAT, data)
+        if xbin_id != XBIN_ID:
+            raise XBinError("Not an XBIN file.")
+
+        font_size = font_size or 16
+        offset = HEADER_SIZE
+
+        palette = None
+        if flags & FLAG_PALETTE:
+            raw = _read(data, offset, 48, "palette")
+            offset += 48
+            # Palette entries are 6-bit VGA DAC values, scale them up to 8 bits.
+            values = np.frombuffer(raw, dtype=np.uint8) & 0x3F
+            palette = ((values << 2) | (values >> 4)).reshape(16, 3)
+
+        font_data, glyphs = b"", None
+        if flags & FLAG_FONT:
+            char_count = 512 if flags & FLAG_512_CHARS else 256
+            font_data = _read(data, offset, font_size * char_count, "font")
+            offset += len(font_data)
+            bits = np.unpackbits(np.frombuffer(font_data, dtype=np.uint8))
+            glyphs = bits.reshape(char_count, font_size, 8).astype(bool)
+
+        size = width * height
+        if flags & FLAG_COMPRESS:
+            chars, attrs = decode_rle(data, offset, size)
+        else:
+            raw = _read(data, offset, size * 2, "image")
+            chars, attrs = raw[0::2], raw[1::2]
+
+        chars_array: np.ndarray = np.frombuffer(chars, dtype=np.uint8).astype(np.uint16)
+        attrs_array: np.ndarray = np.frombuffer(attrs, dtype=np.uint8)
+        if glyphs is not None and flags & FLAG_512_CHARS:
+            # In 512 character mode the foreground intensity bit selects the font bank.
+            chars_array = chars_array | ((attrs_array & 0x08).astype(np.uint16) << 5)
+            attrs_array = attrs_array & 0xF7
+
+        return cls(
+            width=width,
+            height=height,
+            font_size=font_size,
+            flags=flags,
+            palette=palette,
+            font_data=font_data,
+            glyphs=glyphs,
+            chars=chars_array.reshape(height, width),
+            attrs=attrs_array.reshape(height, width),
+        )
+
+
+def _read(data: bytes, offset: int, length: int, name: str) -> bytes:
+    chunk = data[offset : offset + length]
+    if len(chunk) < length:
+        raise XBinError(f"Incomplete {name} data in XBIN file.")
+    return chunk
+
+
+def decode_rle(data: bytes, offset: int, size: int) -> tuple[bytes, bytes]:
+    """
+    Decode XBIN compressed image data into separate character and attribute buffers.
+
+    Each run starts with a byte where the top two bits are the compression
+    type and the low six bits are the run length minus one.
+    """
+    chars = bytearray(size)
+    attrs = bytearray(size)
+    pos = 0
+    end = len(data)
+    while pos < size:
+        if offset >= end:
+            raise XBinError("Incomplete image data in XBIN file.")
+
+        header = data[offset]
+        count = min((header & 0x3F) + 1, size - pos)
+        offset += 1
+        match header >> 6:
+            case 0:
+                # No compression, character/attribute pairs
+                pairs = data[offset : offset + count * 2]
+                chars[pos : pos + count] = pairs[0::2]
+                attrs[pos : pos + count] = pairs[1::2]
+                offset += count * 2
+            case 1:
+                # Repeated character, followed by the attributes
+                chars[pos : pos + count] = data[offset : offset + 1] * count
+                attrs[pos : pos + count] = data[offset + 1 : offset + 1 + count]
+                offset += 1 + count
+            case 2:
+                # Repeated attribute, followed by the characters
+                attrs[pos : pos + count] = data[offset : offset + 1] * count
+                chars[pos : pos + count] = data[offset + 1 : offset + 1 + count]
+                offset += 1 + count
+            case _:
+                # Repeated character and attribute
+                chars[pos : pos + count] = data[offset : offset + 1] * count
+                attrs[pos : pos + count] = data[offset + 1 : offset + 2] * count
+                offset += 2
+        pos += count
+
+    if offset > end:
+        raise XBinError("Incomplete image data in XBIN file.")
+
+    return bytes(chars), bytes(attrs)
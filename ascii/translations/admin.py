@@ -3,7 +3,7 @@ from django.db import models
 from django.http import HttpRequest
 from django.utils.text import Truncator
 
-from ascii.translations.models import Translation
+from ascii.translations.models import Translation, TranslationLine
 
 
 @admin.register(Translation)
@@ -26,3 +26,11 @@ class TranslationAdmin(admin.ModelAdmin):
         for translation in queryset.all():
             translation.populate_translation()
             translation.save()
+
+
+@admin.register(TranslationLine)
+class TranslationLineAdmin(admin.ModelAdmin):
+    list_display = ["id", "language", "original", "translated"]
+    search_fields = ["original", "translated"]
+    readonly_fields = ["line_hash"]
+    fields = ["language", "line_hash", "original", "translated"]
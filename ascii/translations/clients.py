@@ -1,29 +1,57 @@
+from __future__ import annotations
+
+import logging
+from typing import Protocol
+
+from django.conf import settings
+from django.utils.module_loading import import_string
 from googletrans import Translator
 
+_logger = logging.getLogger(__name__)
+
+
+class TranslationClient(Protocol):
+    def translate_lines(self, lines: list[str], language: str) -> list[str]:
+        """
+        Translate each of the lines from the given language to English,
+        returning the same number of lines.
+        """
+        ...
+
+
+def get_translation_client() -> TranslationClient:
+    return import_string(settings.TRANSLATION_CLIENT)()
+
 
 class GoogleTranslateClient:
     def __init__(self):
         self.translator = Translator()
 
-    def split_text(self, text: str, chunk_size: int = 200):
-        lines = text.split("\n")
-        for i in range(0, len(lines), chunk_size):
-            yield "\n".join(lines[i : i + chunk_size])
-
-    def translate(self, text: str, language: str) -> str:
-        """Translates text to the specified language."""
-        if text.isspace():
+    def translate_text(self, text: str, language: str) -> str:
+        try:
+            return self.translator.translate(text, src=language).text
+        except TypeError:
+            # The client is buggy, this is raised when the API fails to
+            # translate the string for whatever reason.
+            #   ``TypeError: 'NoneType' object is not iterable``
             return text
 
-        translated_segments = []
-        for segment in self.split_text(text):
-            try:
-                translated = self.translator.translate(segment, src=language).text
-                translated_segments.append(translated)
-            except TypeError:
-                # The client is buggy, this is raised when the API fails to
-                # translate the string for whatever reason.
-                #   ``TypeError: 'NoneType' object is not iterable``
-                translated_segments.append(segment)
-
-        return "\n".join(translated_segments)
+    def translate_lines(self, lines: list[str], language: str) -> list[str]:
+        translated = self.translate_text("\n".join(lines), language).split("\n")
+        if len(translated) == len(lines):
+            return translated
+
+        # The API sometimes merges or splits lines, fall back to sending
+        # them one at a time so they still line up with the originals.
+        _logger.info(f"Line count mismatch ({len(translated)} != {len(lines)}), retrying")
+        return [self.translate_text(line, language) for line in lines]
+
+
+class LocalTranslateClient:
+    """
+    Stand-in for tests and local development that doesn't make any network
+    requests, the "translation" is the original line with a language tag.
+    """
+
+    def translate_lines(self, lines: list[str], language: str) -> list[str]:
+        return [f"[{language}] {line}" for line in lines]
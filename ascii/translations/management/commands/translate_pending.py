@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ascii.translations.memory import TranslationPipeline
+from ascii.translations.models import Translation
+
+
+class Command(BaseCommand):
+    help = "Fill in the pending translations that were queued by the fudan views"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Keep running and poll for newly queued translations",
+        )
+        parser.add_argument(
+            "--interval", type=float, default=5, help="Seconds between polls with --watch"
+        )
+        parser.add_argument("--workers", type=int, default=4, help="Concurrent client requests")
+
+    def handle(self, *args, **options):
+        # Skip anything that failed so --watch doesn't retry it in a loop
+        failed: set[int] = set()
+
+        while True:
+            queryset = Translation.objects.pending().exclude(pk__in=failed).order_by("pk")
+            translations = list(queryset[:100])
+            if not translations:
+                if not options["watch"]:
+                    break
+                time.sleep(options["interval"])
+                continue
+
+            for language in {translation.language for translation in translations}:
+                group = [t for t in translations if t.language == language]
+                pipeline = TranslationPipeline(language, workers=options["workers"])
+                results = pipeline.translate(translation.original for translation in group)
+
+                for translation in group:
+                    if translated := results.get(translation.original):
+                        translation.translated = translated
+                        translation.save(update_fields=["translated"])
+                        self.stdout.write(f"Translated {translation}")
+                    else:
+                        failed.add(translation.pk)
@@ -0,0 +1,147 @@
+"""
+Line-level translation memory.
+
+Texts are translated one line at a time, and each line is stored in
+TranslationLine keyed by the hash of its normalized form. Lines that repeat
+across texts (signatures, borders, headers) are only ever sent to the
+translation client once, and the full texts are reassembled from the
+stored lines.
+
+Untranslated lines are deduplicated and sent to the client in batches from
+a thread pool. The database is only touched from the calling thread.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ascii.translations.clients import TranslationClient, get_translation_client
+from ascii.translations.models import TranslationLine
+from ascii.translations.utils import get_text_hash
+
+_logger = logging.getLogger(__name__)
+
+# Keeps the IN (...) lookups under the SQLite variable limit
+LOOKUP_CHUNK_SIZE = 500
+
+
+def normalize_line(line: str) -> str:
+    # The indentation is restored from the original text after translating
+    return " ".join(line.split())
+
+
+class TranslationPipeline:
+    def __init__(
+        self,
+        language: str,
+        client: TranslationClient | None = None,
+        workers: int = 4,
+        batch_size: int = 100,
+    ):
+        self.language = language
+        self.client = client or get_translation_client()
+        self.workers = workers
+        self.batch_size = batch_size
+
+    def load_lines(self, lines: dict[str, str]) -> dict[str, str]:
+        """
+        Return the stored translations for the {hash: line} mapping.
+        """
+        hashes = list(lines)
+        translated: dict[str, str] = {}
+        for i in range(0, len(hashes), LOOKUP_CHUNK_SIZE):
+            rows = TranslationLine.objects.filter(
+                language=self.language,
+                line_hash__in=hashes[i : i + LOOKUP_CHUNK_SIZE],
+            )
+            translated.update(rows.values_list("line_hash", "translated"))
+
+        return translated
+
+    def save_lines(self, lines: dict[str, str], translated: dict[str, str]) -> None:
+        TranslationLine.objects.bulk_create(
+            [
+                TranslationLine(
+                    language=self.language,
+                    line_hash=line_hash,
+                    original=lines[line_hash],
+                    translated=translated_line,
+                )
+                for line_hash, translated_line in translated.items()
+            ],
+            ignore_conflicts=True,
+        )
+
+    def translate_lines(self, lines: Iterable[str]) -> dict[str, str]:
+        """
+        Translate the lines, returning a {hash: translated} mapping for the
+        normalized lines. Lines that the client failed on are left out.
+        """
+        pending: dict[str, str] = {}
+        for line in lines:
+            if line := normalize_line(line):
+                pending[get_text_hash(line)] = line
+
+        translated = self.load_lines(pending)
+        missing = [line_hash for line_hash in pending if line_hash not in translated]
+        if not missing:
+            return translated
+
+        batches = [
+            missing[i : i + self.batch_size] for i in range(0, len(missing), self.batch_size)
+        ]
+        _logger.info(f"Translating {len(missing)} new lines in {len(batches)} batches")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(
+                    self.client.translate_lines,
+                    [pending[line_hash] for line_hash in batch],
+                    self.language,
+                ): batch
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    results = future.result()
+                except Exception:
+                    _logger.exception(f"Failed to translate a batch of {len(batch)} lines")
+                    continue
+
+                if len(results) != len(batch):
+                    _logger.error(f"Expected {len(batch)} lines, got {len(results)}")
+                    continue
+
+                # Each result has to stay on one line for the texts to be reassembled
+                results = [result.replace("\n", " ") for result in results]
+                new = dict(zip(batch, results, strict=True))
+                self.save_lines(pending, new)
+                translated.update(new)
+
+        return translated
+
+    def translate(self, texts: Iterable[str]) -> dict[str, str]:
+        """
+        Translate the texts line by line and reassemble them. Texts with any
+        lines that couldn't be translated are left out.
+        """
+        texts = list(texts)
+        translated = self.translate_lines(line for text in texts for line in text.split("\n"))
+
+        results = {}
+        for text in texts:
+            lines = []
+            for line in text.split("\n"):
+                if normalized := normalize_line(line):
+                    if (translated_line := translated.get(get_text_hash(normalized))) is None:
+                        break
+                    lines.append(translated_line)
+                else:
+                    lines.append(line)
+            else:
+                results[text] = "\n".join(lines)
+
+        return results
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.10 on 2026-10-18 16:05
+
+import ascii.core.fields
+from django.db import migrations, models
+
+from ascii.translations.utils import get_text_hash
+
+
+def backfill_original_hash(apps, schema_editor):
+    Translation = apps.get_model("translations", "Translation")
+
+    batch = []
+    for translation in Translation.objects.only("original").iterator(chunk_size=500):
+        translation.original_hash = get_text_hash(translation.original)
+        batch.append(translation)
+        if len(batch) >= 500:
+            Translation.objects.bulk_update(batch, ["original_hash"])
+            batch = []
+
+    Translation.objects.bulk_update(batch, ["original_hash"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("translations", "0003_alter_translation_original_and_more"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="translation",
+            name="translation_unique_text",
+        ),
+        migrations.AlterField(
+            model_name="translation",
+            name="original",
+            field=ascii.core.fields.NonStrippingTextField(),
+        ),
+        migrations.AddField(
+            model_name="translation",
+            name="original_hash",
+            field=models.CharField(default="", editable=False, max_length=32),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_original_hash, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="translation",
+            constraint=models.UniqueConstraint(
+                fields=("original_hash", "language"), name="translation_unique_hash"
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.10 on 2026-10-18 13:57
+
+import ascii.core.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("translations", "0004_translation_original_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TranslationLine",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "language",
+                    models.CharField(choices=[("zh-cn", "zh-cn"), ("en", "en")], max_length=10),
+                ),
+                ("line_hash", models.CharField(max_length=32)),
+                ("original", ascii.core.fields.NonStrippingTextField()),
+                ("translated", ascii.core.fields.NonStrippingTextField()),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("line_hash", "language"), name="translationline_unique_hash"
+                    )
+                ],
+            },
+        ),
+    ]
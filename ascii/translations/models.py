@@ -1,38 +1,112 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
+
 from django.db import models
+from django.db.models import Manager
 
 from ascii.core.fields import NonStrippingTextField
 from ascii.core.models import BaseModel
 from ascii.translations.choices import TranslationLanguages
-from ascii.translations.clients import GoogleTranslateClient
+from ascii.translations.utils import get_text_hash
+
+
+class TranslationQuerySet(models.QuerySet):
+    def pending(self) -> TranslationQuerySet:
+        return self.filter(translated="").exclude(original="")
+
+    def get_by_hash(self, hashes: Iterable[str], language: str) -> dict[str, str | None]:
+        """
+        Look up translations by the hash of their original text, see
+        get_text_hash(). Pending translations map to None, and hashes that
+        aren't in the table are left out.
+        """
+        translations = self.filter(language=language, original_hash__in=set(hashes))
+        return {
+            original_hash: translated or None
+            for original_hash, translated in translations.values_list("original_hash", "translated")
+        }
+
+    def enqueue(self, originals: Iterable[str], language: str) -> None:
+        """
+        Add pending rows for the translate_pending command to fill in.
+        """
+        self.bulk_create(
+            [
+                Translation(
+                    language=language,
+                    original=original,
+                    original_hash=get_text_hash(original),
+                )
+                for original in originals
+            ],
+            ignore_conflicts=True,
+        )
+
+
+TranslationManager = Manager.from_queryset(TranslationQuerySet)  # noqa
 
 
 class Translation(BaseModel):
     """
     Simple backend for caching results from a translation API.
+
+    Rows with an empty translation are pending, see the translate_pending
+    command.
     """
 
     language = models.CharField(choices=TranslationLanguages.choices, max_length=10)
-    original = NonStrippingTextField(db_index=True)
+    original = NonStrippingTextField()
+    original_hash = models.CharField(max_length=32, editable=False)
     translated = NonStrippingTextField(blank=True)
 
+    objects = TranslationManager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
-                fields=["original", "language"],
-                name="translation_unique_text",
+                fields=["original_hash", "language"],
+                name="translation_unique_hash",
             )
         ]
 
     def __str__(self) -> str:
         return f"Translation: {self.pk}"
 
+    def save(self, *args, **kwargs):
+        self.original_hash = get_text_hash(self.original)
+        super().save(*args, **kwargs)
+
     def clean(self) -> None:
         self.original = self.original.replace("\r\n", "\n")
         self.translated = self.translated.replace("\r\n", "\n")
 
     def populate_translation(self) -> None:
-        client = GoogleTranslateClient()
-        self.translated = client.translate(self.original, self.language)  # noqa
+        from ascii.translations.memory import TranslationPipeline
+
+        pipeline = TranslationPipeline(self.language)
+        self.translated = pipeline.translate([self.original]).get(self.original, "")
         self.save(update_fields=["translated"])
+
+
+class TranslationLine(BaseModel):
+    """
+    Translation memory for single lines, shared by every text that contains
+    the line, see ascii.translations.memory.
+    """
+
+    language = models.CharField(choices=TranslationLanguages.choices, max_length=10)
+    line_hash = models.CharField(max_length=32)
+    original = NonStrippingTextField()
+    translated = NonStrippingTextField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["line_hash", "language"],
+                name="translationline_unique_hash",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"TranslationLine: {self.pk}"
@@ -0,0 +1,35 @@
+from ascii.translations.choices import TranslationLanguages
+from ascii.translations.clients import LocalTranslateClient
+from ascii.translations.memory import TranslationPipeline
+from ascii.translations.models import TranslationLine
+
+LANGUAGE = TranslationLanguages.CHINESE_SIMPLIFIED
+
+
+class RecordingClient(LocalTranslateClient):
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def translate_lines(self, lines: list[str], language: str) -> list[str]:
+        self.lines.extend(lines)
+        return super().translate_lines(lines, language)
+
+
+def test_translation_pipeline():
+    client = RecordingClient()
+    pipeline = TranslationPipeline(LANGUAGE, client=client, batch_size=2)
+
+    texts = ["你好\n  世界  \n\n签名", "签名\n你好"]
+    results = pipeline.translate(texts)
+    assert results == {
+        texts[0]: "[zh-cn] 你好\n[zh-cn] 世界\n\n[zh-cn] 签名",
+        texts[1]: "[zh-cn] 签名\n[zh-cn] 你好",
+    }
+
+    # Repeated lines are only sent once and stored for next time
+    assert sorted(client.lines) == ["世界", "你好", "签名"]
+    assert TranslationLine.objects.count() == 3
+
+    client.lines.clear()
+    assert pipeline.translate(["世界 \n签名"]) == {"世界 \n签名": "[zh-cn] 世界\n[zh-cn] 签名"}
+    assert client.lines == []
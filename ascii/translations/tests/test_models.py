@@ -0,0 +1,18 @@
+from ascii.translations.choices import TranslationLanguages
+from ascii.translations.models import Translation
+from ascii.translations.utils import get_text_hash
+
+LANGUAGE = TranslationLanguages.CHINESE_SIMPLIFIED
+
+
+def test_get_by_hash(django_assert_num_queries):
+    translation = Translation.objects.create(language=LANGUAGE, original="你好", translated="hello")
+    assert translation.original_hash == get_text_hash("你好")
+
+    Translation.objects.enqueue(["世界", "你好"], LANGUAGE)
+    assert list(Translation.objects.pending().values_list("original", flat=True)) == ["世界"]
+
+    hashes = [get_text_hash(text) for text in ["你好", "世界", "再见"]]
+    with django_assert_num_queries(1):
+        translations = Translation.objects.get_by_hash(hashes, LANGUAGE)
+    assert translations == {hashes[0]: "hello", hashes[1]: None}
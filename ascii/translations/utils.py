@@ -0,0 +1,8 @@
+import hashlib
+
+
+def get_text_hash(text: str) -> str:
+    """
+    Fixed-width key for looking up translations of a text.
+    """
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
@@ -1,5 +1,4 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from django.urls import include, path, register_converter
@@ -7,7 +6,7 @@ from django.views.generic.base import RedirectView
 from rest_framework import routers
 
 from ascii.core.converters import DateConverter
-from ascii.core.views import IndexView
+from ascii.core.views import IndexView, MediaFileView
 from ascii.fudan.views import (
     FudanAssetFileView,
     FudanBBSDocumentView,
@@ -17,6 +16,7 @@ from ascii.fudan.views import (
 from ascii.mozz.api import MozzArtPostModelViewSet
 from ascii.mozz.views import MozzArtPostView, MozzIndexView, MozzScrollFileView
 from ascii.textmode.views import (
+    TextModeArtCollectionDownloadView,
     TextModeArtCollectionListView,
     TextModeArtCollectionView,
     TextmodeArtFileView,
@@ -28,8 +28,10 @@ from ascii.textmode.views import (
     TextmodePackListView,
     TextmodePackView,
     TextmodePackYearListView,
+    TextModeSearchDownloadView,
     TextModeSearchView,
     TextmodeTagCategoryListView,
+    TextmodeTagDownloadView,
     TextmodeTagListView,
     TextmodeTagView,
 )
@@ -57,6 +59,11 @@ urlpatterns = [
         TextModeSearchView.as_view(),
         name="textmode-search",
     ),
+    path(
+        "textmode/search/download/",
+        TextModeSearchDownloadView.as_view(),
+        name="textmode-search-download",
+    ),
     path(
         "textmode/pack/",
         TextmodePackListView.as_view(),
@@ -87,6 +94,11 @@ urlpatterns = [
         TextmodeTagView.as_view(),
         name="textmode-tag",
     ),
+    path(
+        "textmode/tags/<slug:category>/<str:name>/download/",
+        TextmodeTagDownloadView.as_view(),
+        name="textmode-tag-download",
+    ),
     path(
         "textmode/pack/<int:year>/<str:pack>/a/<str:artfile>",
         TextmodeArtFileView.as_view(),
@@ -102,6 +114,11 @@ urlpatterns = [
         TextModeArtCollectionView.as_view(),
         name="textmode-collection",
     ),
+    path(
+        "textmode/collection/<slug:slug>/download/",
+        TextModeArtCollectionDownloadView.as_view(),
+        name="textmode-collection-download",
+    ),
     path(
         "textmode/autocomplete/artist/",
         TextModeArtistAutocomplete.as_view(),
@@ -166,6 +183,10 @@ urlpatterns = [
     path("api/v1/", include((router.urls, "api"), namespace="api")),
     path("__reload__/", include("django_browser_reload.urls")),
     path("__debug__/", include("debug_toolbar.urls")),
-    *static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT),
+    path(
+        f"{settings.MEDIA_URL.lstrip('/')}<path:path>",
+        MediaFileView.as_view(),
+        name="media",
+    ),
     *staticfiles_urlpatterns(),
 ]
@@ -5,3 +5,14 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ascii.settings")
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.SEARCH_INDEX_PRELOAD:
+    from django.db import connections  # noqa: E402
+
+    from ascii.textmode.postings import get_posting_index  # noqa: E402
+
+    get_posting_index()
+    # Don't let forked workers inherit the parent's database connection
+    connections.close_all()